@@ -30,7 +30,7 @@ export class Claim {
   @Column({ type: 'text' })
   text: string;
 
-  @Column({ type: 'vector', length: 1536, nullable: true })
+  @Column({ type: 'halfvec', length: 384, nullable: true })
   embedding: number[];
 
   @CreateDateColumn({ type: 'timestamp with time zone' })
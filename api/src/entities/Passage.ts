@@ -26,7 +26,7 @@ export class Passage {
   @Column({ type: 'text' })
   text: string;
 
-  @Column({ type: 'vector', length: 1536, nullable: true })
+  @Column({ type: 'halfvec', length: 384, nullable: true })
   embedding: number[];
 
   @CreateDateColumn({ type: 'timestamp with time zone' })
@@ -0,0 +1,39 @@
+import { MigrationInterface, QueryRunner } from 'typeorm';
+
+export class HalfvecEmbeddings1700000000001 implements MigrationInterface {
+  name = 'HalfvecEmbeddings1700000000001';
+
+  public async up(queryRunner: QueryRunner): Promise<void> {
+    // Drop vector indexes
+    await queryRunner.query(`DROP INDEX "IDX_passages_embedding"`);
+    await queryRunner.query(`DROP INDEX "IDX_clauses_embedding"`);
+    await queryRunner.query(`DROP INDEX "IDX_claims_embedding"`);
+
+    // Store all-MiniLM-L6-v2 embeddings as float16; existing vectors have a different
+    // dimension and are regenerated by the embed worker
+    await queryRunner.query(`ALTER TABLE "claims" ALTER COLUMN "embedding" TYPE halfvec(384) USING NULL`);
+    await queryRunner.query(`ALTER TABLE "clauses" ALTER COLUMN "embedding" TYPE halfvec(384) USING NULL`);
+    await queryRunner.query(`ALTER TABLE "passages" ALTER COLUMN "embedding" TYPE halfvec(384) USING NULL`);
+
+    // Create vector indexes
+    await queryRunner.query(`CREATE INDEX "IDX_claims_embedding" ON "claims" USING ivfflat ("embedding" halfvec_cosine_ops) WITH (lists = 100)`);
+    await queryRunner.query(`CREATE INDEX "IDX_clauses_embedding" ON "clauses" USING ivfflat ("embedding" halfvec_cosine_ops) WITH (lists = 100)`);
+    await queryRunner.query(`CREATE INDEX "IDX_passages_embedding" ON "passages" USING ivfflat ("embedding" halfvec_cosine_ops) WITH (lists = 100)`);
+  }
+
+  public async down(queryRunner: QueryRunner): Promise<void> {
+    // Drop vector indexes
+    await queryRunner.query(`DROP INDEX "IDX_passages_embedding"`);
+    await queryRunner.query(`DROP INDEX "IDX_clauses_embedding"`);
+    await queryRunner.query(`DROP INDEX "IDX_claims_embedding"`);
+
+    await queryRunner.query(`ALTER TABLE "claims" ALTER COLUMN "embedding" TYPE vector(1536) USING NULL`);
+    await queryRunner.query(`ALTER TABLE "clauses" ALTER COLUMN "embedding" TYPE vector(1536) USING NULL`);
+    await queryRunner.query(`ALTER TABLE "passages" ALTER COLUMN "embedding" TYPE vector(1536) USING NULL`);
+
+    // Create vector indexes
+    await queryRunner.query(`CREATE INDEX "IDX_claims_embedding" ON "claims" USING ivfflat ("embedding" vector_cosine_ops) WITH (lists = 100)`);
+    await queryRunner.query(`CREATE INDEX "IDX_clauses_embedding" ON "clauses" USING ivfflat ("embedding" vector_cosine_ops) WITH (lists = 100)`);
+    await queryRunner.query(`CREATE INDEX "IDX_passages_embedding" ON "passages" USING ivfflat ("embedding" vector_cosine_ops) WITH (lists = 100)`);
+  }
+}
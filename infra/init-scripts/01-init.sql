@@ -72,7 +72,7 @@ CREATE TABLE IF NOT EXISTS claims (
     claim_number INTEGER NOT NULL,
     is_independent BOOLEAN NOT NULL DEFAULT false,
     text TEXT NOT NULL,
-    embedding vector(1536), -- OpenAI embedding dimension
+    embedding halfvec(384), -- all-MiniLM-L6-v2 dimension, stored as float16
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     UNIQUE(patent_id, claim_number)
 );
@@ -84,7 +84,7 @@ CREATE TABLE IF NOT EXISTS clauses (
     clause_index INTEGER NOT NULL,
     clause_type VARCHAR(50), -- preamble, element, transition, etc.
     text TEXT NOT NULL,
-    embedding vector(1536),
+    embedding halfvec(384),
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     UNIQUE(claim_id, clause_index)
 );
@@ -95,7 +95,7 @@ CREATE TABLE IF NOT EXISTS passages (
     patent_id UUID NOT NULL REFERENCES patents(id) ON DELETE CASCADE,
     passage_index INTEGER NOT NULL,
     text TEXT NOT NULL,
-    embedding vector(1536),
+    embedding halfvec(384),
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     UNIQUE(patent_id, passage_index)
 );
@@ -191,9 +191,9 @@ CREATE INDEX IF NOT EXISTS idx_audit_log_workspace_id ON audit_log(workspace_id)
 CREATE INDEX IF NOT EXISTS idx_audit_log_created_at ON audit_log(created_at);
 
 -- Create vector indexes for similarity search
-CREATE INDEX IF NOT EXISTS idx_claims_embedding ON claims USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100);
-CREATE INDEX IF NOT EXISTS idx_clauses_embedding ON clauses USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100);
-CREATE INDEX IF NOT EXISTS idx_passages_embedding ON passages USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100);
+CREATE INDEX IF NOT EXISTS idx_claims_embedding ON claims USING ivfflat (embedding halfvec_cosine_ops) WITH (lists = 100);
+CREATE INDEX IF NOT EXISTS idx_clauses_embedding ON clauses USING ivfflat (embedding halfvec_cosine_ops) WITH (lists = 100);
+CREATE INDEX IF NOT EXISTS idx_passages_embedding ON passages USING ivfflat (embedding halfvec_cosine_ops) WITH (lists = 100);
 
 -- Row Level Security (RLS) setup
 ALTER TABLE patents ENABLE ROW LEVEL SECURITY;
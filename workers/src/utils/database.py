@@ -2,16 +2,76 @@
 
 import asyncio
 import json
-from typing import Optional, List, Dict, Any
+import struct
+import uuid
+from functools import partial
+from typing import Optional, List, Dict, Any, Iterable, Tuple
 from datetime import datetime
 
 import asyncpg
+import numpy as np
+import orjson
 import structlog
 
 from ..models.patent import PatentMetadata, PatentClaim
 
 logger = structlog.get_logger(__name__)
 
+# Statements that write staged vectors to their table, keyed by embedding kind.
+# Claims already exist and are updated by primary key; clauses and passages are
+# upserted on their (parent, index) unique constraints
+VECTOR_WRITES = {
+    'claims': """
+        UPDATE claims AS t
+        SET embedding = s.embedding
+        FROM vector_staging AS s
+        WHERE s.kind = 'claims' AND t.id = s.item_id
+    """,
+    'clauses': """
+        INSERT INTO clauses (claim_id, clause_index, text, embedding)
+        SELECT item_id, item_index, text, embedding
+        FROM vector_staging
+        WHERE kind = 'clauses'
+        ON CONFLICT (claim_id, clause_index)
+        DO UPDATE SET text = EXCLUDED.text, embedding = EXCLUDED.embedding
+    """,
+    'passages': """
+        INSERT INTO passages (patent_id, passage_index, text, embedding)
+        SELECT item_id, item_index, text, embedding
+        FROM vector_staging
+        WHERE kind = 'passages'
+        ON CONFLICT (patent_id, passage_index)
+        DO UPDATE SET text = EXCLUDED.text, embedding = EXCLUDED.embedding
+    """,
+}
+
+
+def _encode_vector(value, dtype: str = '>f4') -> bytes:
+    """Encode an embedding in pgvector's binary wire format (float32 vector or float16 halfvec)."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        value = np.frombuffer(value, dtype=np.float32)
+    vector = np.asarray(value, dtype=dtype).ravel()
+    return struct.pack('>HH', vector.size, 0) + vector.tobytes()
+
+
+def _decode_vector(data: bytes, dtype: str = '>f4') -> np.ndarray:
+    """Decode pgvector's binary wire format into a float32 array."""
+    dim, _ = struct.unpack_from('>HH', data)
+    return np.frombuffer(data, dtype=dtype, count=dim, offset=4).astype(np.float32)
+
+
+async def _init_connection(conn):
+    """Register the pgvector codecs so embeddings travel as binary floats."""
+    await conn.set_type_codec(
+        'vector', schema='public', encoder=_encode_vector, decoder=_decode_vector, format='binary'
+    )
+    await conn.set_type_codec(
+        'halfvec', schema='public',
+        encoder=partial(_encode_vector, dtype='>f2'),
+        decoder=partial(_decode_vector, dtype='>f2'),
+        format='binary'
+    )
+
 
 class DatabaseClient:
     """Client for PostgreSQL database operations."""
@@ -25,8 +85,10 @@ class DatabaseClient:
         try:
             self.pool = await asyncpg.create_pool(
                 self.connection_string,
-                min_size=5,
-                max_size=20
+                min_size=4,
+                max_size=32,
+                max_inactive_connection_lifetime=300,
+                init=_init_connection
             )
             logger.info("Connected to database")
         except Exception as e:
@@ -105,7 +167,10 @@ class DatabaseClient:
                         None   # s3_pdf_path
                     )
                     
-                    logger.info("Created patent", patent_id=patent_id, pub_number=metadata.pub_number)
+                    # Claims commit together with the patent row
+                    await self._copy_claims(conn, patent_id, claims)
+                    
+                    logger.info("Created patent", patent_id=patent_id, pub_number=metadata.pub_number, claims=len(claims))
                     return patent_id
         except Exception as e:
             logger.error("Failed to create patent", error=str(e))
@@ -130,6 +195,18 @@ class DatabaseClient:
             logger.error("Failed to create claim", error=str(e))
             raise
 
+    @staticmethod
+    async def _copy_claims(conn, patent_id: str, claims: List[PatentClaim]):
+        """COPY claim rows for one patent on an open connection."""
+        if not claims:
+            return
+        
+        await conn.copy_records_to_table(
+            'claims',
+            records=[(patent_id, claim.number, claim.is_independent, claim.text) for claim in claims],
+            columns=['patent_id', 'claim_number', 'is_independent', 'text']
+        )
+
     async def update_patent_embeddings(self, patent_id: str, embeddings: Dict[str, List[float]]):
         """Update patent embeddings."""
         try:
@@ -230,6 +307,50 @@ class DatabaseClient:
             logger.error("Failed to get patent family", error=str(e))
             return []
 
+    async def update_patent_metadata_bulk(self, rows: List[Tuple]) -> int:
+        """Write normalized metadata for many patents with a single UPDATE.
+
+        Each row is (patent_id, family_id, assignees, inventors, prio_date,
+        cpc_codes, ipc_codes); None leaves family_id, prio_date and code
+        columns unchanged.
+        """
+        if not rows:
+            return 0
+
+        try:
+            ids, family_ids, assignees, inventors, prio_dates, cpc_codes, ipc_codes = zip(*rows)
+            async with self.pool.acquire() as conn:
+                # One statement per batch with a fixed text, so each pooled connection
+                # parses and plans it once and reuses it from asyncpg's statement cache
+                status = await conn.execute(
+                    """
+                    UPDATE patents AS p SET
+                        family_id = COALESCE(v.family_id, p.family_id),
+                        assignees = v.assignees::jsonb,
+                        inventors = v.inventors::jsonb,
+                        prio_date = COALESCE(v.prio_date, p.prio_date),
+                        cpc_codes = COALESCE(v.cpc_codes::jsonb, p.cpc_codes),
+                        ipc_codes = COALESCE(v.ipc_codes::jsonb, p.ipc_codes)
+                    FROM unnest($1::uuid[], $2::text[], $3::text[], $4::text[],
+                                $5::date[], $6::text[], $7::text[])
+                        AS v(id, family_id, assignees, inventors, prio_date, cpc_codes, ipc_codes)
+                    WHERE p.id = v.id
+                    """,
+                    list(ids), list(family_ids),
+                    [orjson.dumps(value).decode() for value in assignees],
+                    [orjson.dumps(value).decode() for value in inventors],
+                    list(prio_dates),
+                    [orjson.dumps(value).decode() if value is not None else None for value in cpc_codes],
+                    [orjson.dumps(value).decode() if value is not None else None for value in ipc_codes]
+                )
+
+                updated = int(status.split()[-1])
+                logger.info("Updated patent metadata", count=updated)
+                return updated
+        except Exception as e:
+            logger.error("Failed to update patent metadata", error=str(e))
+            raise
+
     async def create_search_session(self, workspace_id: str, user_id: str, query: str, filters: Dict[str, Any], results: List[Dict[str, Any]]) -> str:
         """Create a search session record."""
         try:
@@ -355,6 +476,64 @@ class DatabaseClient:
             logger.error(f"Error upserting vector embeddings: {e}")
             return False
 
+    async def copy_vectors(self, rows: Iterable[Tuple[str, str, Optional[int], Optional[str], np.ndarray]]) -> int:
+        """Bulk-write (kind, item_id, index, text, embedding) rows via COPY into a staging table.
+        
+        For claims, item_id is the claim's UUID and index and text are unused.
+        For clauses and passages, item_id is the owning claim or patent UUID and
+        (item_id, index) identifies the row, which is created with ``text`` if
+        missing. Rows with an unknown kind or a non-UUID item_id are skipped and
+        logged. Returns the number of rows written.
+        """
+        records = []
+        skipped = 0
+        for kind, item_id, index, text, embedding in rows:
+            if kind not in VECTOR_WRITES:
+                skipped += 1
+                continue
+            try:
+                key = item_id if isinstance(item_id, uuid.UUID) else uuid.UUID(str(item_id))
+            except ValueError:
+                skipped += 1
+                continue
+            records.append((kind, key, index, text, embedding))
+        
+        if skipped:
+            logger.warning("Skipped vectors without a row id", count=skipped)
+        if not records:
+            return 0
+        
+        try:
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    await conn.execute(
+                        """
+                        CREATE TEMP TABLE vector_staging (
+                            kind TEXT, item_id UUID, item_index INTEGER, text TEXT, embedding halfvec
+                        ) ON COMMIT DROP
+                        """
+                    )
+                    await conn.copy_records_to_table(
+                        'vector_staging',
+                        records=records,
+                        columns=['kind', 'item_id', 'item_index', 'text', 'embedding']
+                    )
+                    await conn.execute("ANALYZE vector_staging")
+                    
+                    # Joins and conflict checks use the UUID key indexes
+                    written = 0
+                    for statement in VECTOR_WRITES.values():
+                        status = await conn.execute(statement)
+                        written += int(status.split()[-1])
+                
+                if written < len(records):
+                    logger.warning("Vectors matched no row", count=len(records) - written)
+                logger.info("Copied vectors", count=written)
+                return written
+        except Exception as e:
+            logger.error("Failed to copy vectors", error=str(e))
+            raise
+
     async def search_by_embedding(self, query_embedding: np.ndarray, workspace_id: str, 
                                 search_type: str = 'claims', limit: int = 10) -> List[Dict[str, Any]]:
         """Search by embedding similarity using pgvector."""
@@ -426,6 +605,32 @@ class DatabaseClient:
             logger.error(f"Error getting claim: {e}")
             return None
 
+    async def get_claims_bulk(self, keys: List[Tuple[str, int]]) -> List[Optional[Dict[str, Any]]]:
+        """Get many claims by (patent ID, claim number) in one query, aligned with ``keys``."""
+        if not keys:
+            return []
+        
+        try:
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch(
+                    """
+                    SELECT c.*, k.key_index
+                    FROM unnest($1::uuid[], $2::int[]) WITH ORDINALITY AS k(patent_id, claim_number, key_index)
+                    JOIN claims c ON c.patent_id = k.patent_id AND c.claim_number = k.claim_number
+                    """,
+                    [patent_id for patent_id, _ in keys],
+                    [int(claim_num) for _, claim_num in keys]
+                )
+                
+                claims: List[Optional[Dict[str, Any]]] = [None] * len(keys)
+                for row in rows:
+                    claim = dict(row)
+                    claims[claim.pop('key_index') - 1] = claim
+                return claims
+        except Exception as e:
+            logger.error(f"Error getting claims: {e}")
+            raise
+
     async def get_patent_claims(self, patent_id: str) -> List[Dict[str, Any]]:
         """Get all claims for a patent."""
         try:
@@ -481,6 +686,43 @@ class DatabaseClient:
             logger.error("Failed to create alignment", error=str(e))
             raise
 
+    async def create_alignments_bulk(self, alignments: List[Dict[str, Any]]) -> int:
+        """Create many alignment records in a single transaction."""
+        if not alignments:
+            return 0
+        
+        try:
+            records = [
+                (
+                    alignment['patent_id'], alignment['claim_num'],
+                    alignment['clause_index'], alignment['clause_text'],
+                    alignment['reference_patent_id'], alignment['reference_claim_id'],
+                    alignment['reference_clause_index'], alignment['reference_clause_text'],
+                    alignment['similarity_score'], alignment['alignment_type'],
+                    orjson.dumps(alignment['overlap_details']).decode()
+                )
+                for alignment in alignments
+            ]
+            
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    await conn.executemany(
+                        """
+                        INSERT INTO alignments (
+                            patent_id, claim_num, clause_index, clause_text,
+                            reference_patent_id, reference_claim_id, reference_clause_index,
+                            reference_clause_text, similarity_score, alignment_type, overlap_details
+                        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
+                        """,
+                        records
+                    )
+                
+                logger.info("Created alignments", count=len(records))
+                return len(records)
+        except Exception as e:
+            logger.error("Failed to create alignments", error=str(e))
+            raise
+
     async def get_claim_alignments(self, patent_id: str, claim_num: int) -> List[Dict[str, Any]]:
         """Get all alignments for a specific claim."""
         try:
@@ -501,6 +743,34 @@ class DatabaseClient:
             logger.error(f"Error getting claim alignments: {e}")
             return []
 
+    async def get_claim_alignments_bulk(self, keys: List[Tuple[str, int]]) -> List[List[Dict[str, Any]]]:
+        """Get the alignments of many claims in one query, aligned with ``keys``."""
+        if not keys:
+            return []
+        
+        try:
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch(
+                    """
+                    SELECT a.*, p.title as reference_patent_title, p.prio_date as reference_prio_date, k.key_index
+                    FROM unnest($1::uuid[], $2::int[]) WITH ORDINALITY AS k(patent_id, claim_num, key_index)
+                    JOIN alignments a ON a.patent_id = k.patent_id AND a.claim_num = k.claim_num
+                    LEFT JOIN patents p ON a.reference_patent_id = p.id
+                    ORDER BY k.key_index, a.similarity_score DESC
+                    """,
+                    [patent_id for patent_id, _ in keys],
+                    [int(claim_num) for _, claim_num in keys]
+                )
+                
+                alignments: List[List[Dict[str, Any]]] = [[] for _ in keys]
+                for row in rows:
+                    alignment = dict(row)
+                    alignments[alignment.pop('key_index') - 1].append(alignment)
+                return alignments
+        except Exception as e:
+            logger.error(f"Error getting claim alignments: {e}")
+            raise
+
     async def get_patent(self, patent_id: str) -> Optional[Dict[str, Any]]:
         """Get a patent by ID."""
         try:
@@ -518,6 +788,35 @@ class DatabaseClient:
             logger.error(f"Error getting patent: {e}")
             return None
 
+    async def get_patents_bulk(self, patent_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get family, assignee and CPC metadata for many patents in one query, keyed by ID."""
+        if not patent_ids:
+            return {}
+        
+        try:
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch(
+                    """
+                    SELECT id::text AS id, family_id, assignees, cpc_codes
+                    FROM patents
+                    WHERE id = ANY($1::uuid[])
+                    """,
+                    list(patent_ids)
+                )
+                
+                patents = {}
+                for row in rows:
+                    patent = dict(row)
+                    # JSONB columns arrive as JSON text without a registered codec
+                    for column in ('assignees', 'cpc_codes'):
+                        if isinstance(patent[column], str):
+                            patent[column] = orjson.loads(patent[column])
+                    patents[patent['id']] = patent
+                return patents
+        except Exception as e:
+            logger.error(f"Error getting patents: {e}")
+            return {}
+
     async def create_novelty_score(
         self,
         patent_id: str,
@@ -548,8 +847,10 @@ class DatabaseClient:
                     RETURNING id
                     """,
                     patent_id, claim_num, novelty_score, obviousness_score,
-                    confidence_band, json.dumps(calibration_factors), 
-                    json.dumps(clause_details), datetime.utcnow()
+                    confidence_band,
+                    orjson.dumps(calibration_factors, option=orjson.OPT_SERIALIZE_NUMPY).decode(),
+                    orjson.dumps(clause_details, option=orjson.OPT_SERIALIZE_NUMPY).decode(),
+                    datetime.utcnow()
                 )
                 
                 logger.info("Created/updated novelty score", novelty_id=novelty_id)
@@ -558,6 +859,76 @@ class DatabaseClient:
             logger.error("Failed to create novelty score", error=str(e))
             raise
 
+    async def create_novelty_scores_bulk(
+        self,
+        rows: Iterable[Tuple[str, int, float, float, str, Dict[str, Any], List[Dict[str, Any]]]]
+    ) -> int:
+        """Upsert many novelty score records via COPY into a staging table.
+
+        Each row is (patent_id, claim_num, novelty_score, obviousness_score,
+        confidence_band, calibration_factors, clause_details). When a claim
+        appears more than once, its last row wins.
+        """
+        now = datetime.utcnow()
+        records = {
+            (str(row[0]), int(row[1])): (
+                *row[:5],
+                orjson.dumps(row[5], option=orjson.OPT_SERIALIZE_NUMPY).decode(),
+                orjson.dumps(row[6], option=orjson.OPT_SERIALIZE_NUMPY).decode(),
+                now
+            )
+            for row in rows
+        }
+        if not records:
+            return 0
+        
+        try:
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    await conn.execute(
+                        """
+                        CREATE TEMP TABLE novelty_staging (
+                            patent_id UUID, claim_num INT, novelty_score FLOAT, obviousness_score FLOAT,
+                            confidence_band TEXT, calibration_factors JSONB, clause_details JSONB,
+                            created_at TIMESTAMP
+                        ) ON COMMIT DROP
+                        """
+                    )
+                    await conn.copy_records_to_table(
+                        'novelty_staging',
+                        records=list(records.values()),
+                        columns=[
+                            'patent_id', 'claim_num', 'novelty_score', 'obviousness_score',
+                            'confidence_band', 'calibration_factors', 'clause_details', 'created_at'
+                        ]
+                    )
+                    status = await conn.execute(
+                        """
+                        INSERT INTO novelty_scores (
+                            patent_id, claim_num, novelty_score, obviousness_score,
+                            confidence_band, calibration_factors, clause_details, created_at
+                        )
+                        SELECT patent_id, claim_num, novelty_score, obviousness_score,
+                               confidence_band, calibration_factors, clause_details, created_at
+                        FROM novelty_staging
+                        ON CONFLICT (patent_id, claim_num)
+                        DO UPDATE SET
+                            novelty_score = EXCLUDED.novelty_score,
+                            obviousness_score = EXCLUDED.obviousness_score,
+                            confidence_band = EXCLUDED.confidence_band,
+                            calibration_factors = EXCLUDED.calibration_factors,
+                            clause_details = EXCLUDED.clause_details,
+                            updated_at = EXCLUDED.created_at
+                        """
+                    )
+                
+                stored = int(status.split()[-1])
+                logger.info("Created/updated novelty scores", count=stored)
+                return stored
+        except Exception as e:
+            logger.error("Failed to create novelty scores", error=str(e))
+            raise
+
     async def get_novelty_score(self, patent_id: str, claim_num: int) -> Optional[Dict[str, Any]]:
         """Get novelty score for a specific claim."""
         try:
@@ -581,7 +952,8 @@ class DatabaseClient:
             async with self.pool.acquire() as conn:
                 rows = await conn.fetch(
                     """
-                    SELECT citing_patent_id, cited_patent_id, citation_date, citation_strength
+                    SELECT citing_patent_id::text AS citing_patent_id, cited_patent_id::text AS cited_patent_id,
+                           citation_date, citation_strength
                     FROM citations
                     WHERE citing_patent_id = ANY($1) AND cited_patent_id = ANY($1)
                     """,
@@ -610,6 +982,24 @@ class DatabaseClient:
             logger.error(f"Error getting patent families: {e}")
             return []
 
+    async def get_patent_family_pairs(self, patent_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get each pair of patents among patent_ids that share a family."""
+        try:
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch(
+                    """
+                    SELECT a.id::text AS patent_id, b.id::text AS related_patent_id
+                    FROM patents a
+                    JOIN patents b ON b.family_id = a.family_id AND b.id > a.id
+                    WHERE a.id = ANY($1::uuid[]) AND b.id = ANY($1::uuid[])
+                    """,
+                    patent_ids
+                )
+                return [dict(row) for row in rows]
+        except Exception as e:
+            logger.error(f"Error getting patent family pairs: {e}")
+            return []
+
     async def store_graph_analysis(self, analysis_id: str, graph_data: Dict[str, Any]) -> bool:
         """Store graph analysis results."""
         try:
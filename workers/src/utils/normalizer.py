@@ -1,6 +1,7 @@
 """Patent normalizer for standardizing various patent data fields."""
 
 import re
+from functools import lru_cache
 from typing import Optional, List
 from datetime import datetime, date
 import unicodedata
@@ -9,6 +10,45 @@ import structlog
 
 logger = structlog.get_logger(__name__)
 
+# Distinct inputs remembered per memoized normalizer
+NORMALIZE_CACHE_SIZE = 100_000
+
+# Normalizers that depend only on their string argument, memoized per instance
+_MEMOIZED_NORMALIZERS = (
+    'normalize_assignee', 'normalize_inventor', 'normalize_cpc_code',
+    'normalize_ipc_code',
+)
+
+# Patterns compiled once at import; classification codes, family IDs, dates and
+# publication numbers are ASCII, names are matched with full Unicode semantics
+_WHITESPACE_RE = re.compile(r'\s+')
+_NAME_SPLIT_RE = re.compile(r'[,\s]+')
+
+_ASSIGNEE_SUFFIX_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r'\s+inc\.?$', r'\s+corp\.?$', r'\s+llc$', r'\s+ltd\.?$',
+        r'\s+limited$', r'\s+company$', r'\s+co\.?$', r'\s+corporation$'
+    )
+)
+
+_INVENTOR_SUFFIX_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r'\s+ph\.?d\.?$', r'\s+md$', r'\s+esq\.?$', r'\s+jr\.?$',
+        r'\s+sr\.?$', r'\s+iii$', r'\s+iv$', r'\s+v$'
+    )
+)
+
+_FAMILY_ID_RE = re.compile(r'^[A-Z0-9\-]+$', re.ASCII)
+_FAMILY_ID_SEARCH_RE = re.compile(r'([A-Z0-9\-]{5,})', re.ASCII)
+
+# Classification codes with an optional slash before the group number
+_CPC_CODE_RE = re.compile(r'^([A-HY]\d{2}[A-Z]\d{1,3})(/)?(\d{1,3})$', re.ASCII)
+_IPC_CODE_RE = re.compile(r'^([A-H]\d{2}[A-Z]\d{1,3})(/)?(\d{1,3})$', re.ASCII)
+
+_NUMERIC_DATE_RE = re.compile(r'(\d{4})[-/](\d{1,2})[-/](\d{1,2})|(\d{4})(\d{2})(\d{2})', re.ASCII)
+_DATE_SEARCH_RE = re.compile(r'(\d{4})[-/](\d{1,2})[-/](\d{1,2})', re.ASCII)
+_US_PUB_NUMBER_RE = re.compile(r'^US(\d+)$', re.ASCII)
+
 
 class PatentNormalizer:
     """Normalizer for patent data fields."""
@@ -60,6 +100,18 @@ class PatentNormalizer:
             'H': 'Electricity',
         }
 
+        # Rollup labels keyed by section, built once so rollups are a dict lookup
+        self._cpc_rollup = {
+            section: f"{section} - {name}" for section, name in self.cpc_hierarchy.items()
+        }
+        self._ipc_rollup = {
+            section: f"{section} - {name}" for section, name in self.ipc_hierarchy.items()
+        }
+
+        # The same assignees, inventors and classification codes recur across the corpus
+        for name in _MEMOIZED_NORMALIZERS:
+            setattr(self, name, lru_cache(maxsize=NORMALIZE_CACHE_SIZE)(getattr(self, name)))
+
     def normalize_family_id(self, family_id: str) -> str:
         """Normalize patent family ID."""
         try:
@@ -82,11 +134,11 @@ class PatentNormalizer:
                     normalized = normalized[:-len(suffix)].strip()
             
             # Ensure it's a valid format (alphanumeric with possible hyphens)
-            if re.match(r'^[A-Z0-9\-]+$', normalized):
+            if _FAMILY_ID_RE.match(normalized):
                 return normalized
             else:
                 # Try to extract a valid family ID
-                match = re.search(r'([A-Z0-9\-]{5,})', normalized)
+                match = _FAMILY_ID_SEARCH_RE.search(normalized)
                 if match:
                     return match.group(1)
                 else:
@@ -106,13 +158,8 @@ class PatentNormalizer:
             normalized = unicodedata.normalize('NFKC', assignee.strip())
             
             # Remove common legal suffixes
-            legal_suffixes = [
-                r'\s+inc\.?$', r'\s+corp\.?$', r'\s+llc$', r'\s+ltd\.?$',
-                r'\s+limited$', r'\s+company$', r'\s+co\.?$', r'\s+corporation$'
-            ]
-            
-            for suffix in legal_suffixes:
-                normalized = re.sub(suffix, '', normalized, flags=re.IGNORECASE)
+            for suffix in _ASSIGNEE_SUFFIX_PATTERNS:
+                normalized = suffix.sub('', normalized)
             
             # Check for known variations
             lower_assignee = normalized.lower()
@@ -121,7 +168,7 @@ class PatentNormalizer:
                     return standard
             
             # Remove extra whitespace and normalize
-            normalized = re.sub(r'\s+', ' ', normalized).strip()
+            normalized = _WHITESPACE_RE.sub(' ', normalized).strip()
             
             return normalized if normalized else None
             
@@ -139,17 +186,12 @@ class PatentNormalizer:
             normalized = unicodedata.normalize('NFKC', inventor.strip())
             
             # Remove common suffixes
-            suffixes_to_remove = [
-                r'\s+ph\.?d\.?$', r'\s+md$', r'\s+esq\.?$', r'\s+jr\.?$',
-                r'\s+sr\.?$', r'\s+iii$', r'\s+iv$', r'\s+v$'
-            ]
-            
-            for suffix in suffixes_to_remove:
-                normalized = re.sub(suffix, '', normalized, flags=re.IGNORECASE)
+            for suffix in _INVENTOR_SUFFIX_PATTERNS:
+                normalized = suffix.sub('', normalized)
             
             # Standardize name format (Last, First Middle)
             # This is a simple approach - more sophisticated name parsing could be added
-            parts = re.split(r'[,\s]+', normalized)
+            parts = _NAME_SPLIT_RE.split(normalized)
             if len(parts) >= 2:
                 # Assume last name is first part, rest are first/middle names
                 last_name = parts[0]
@@ -157,7 +199,7 @@ class PatentNormalizer:
                 normalized = f"{last_name}, {first_names}"
             
             # Remove extra whitespace
-            normalized = re.sub(r'\s+', ' ', normalized).strip()
+            normalized = _WHITESPACE_RE.sub(' ', normalized).strip()
             
             return normalized if normalized else None
             
@@ -181,6 +223,13 @@ class PatentNormalizer:
             
             # If it's a string, try to parse it
             if isinstance(date_obj, str):
+                # Patent dates are almost always YYYY-MM-DD, YYYY/MM/DD or YYYYMMDD;
+                # parse those directly instead of trying each format in turn
+                match = _NUMERIC_DATE_RE.fullmatch(date_obj)
+                if match:
+                    year, month, day = (int(group) for group in match.groups() if group)
+                    return datetime(year, month, day)
+                
                 # Try common date formats
                 date_formats = [
                     '%Y-%m-%d',
@@ -202,7 +251,7 @@ class PatentNormalizer:
                         continue
                 
                 # If no format matches, try to extract date using regex
-                date_match = re.search(r'(\d{4})[-/](\d{1,2})[-/](\d{1,2})', date_obj)
+                date_match = _DATE_SEARCH_RE.search(date_obj)
                 if date_match:
                     year, month, day = date_match.groups()
                     return datetime(int(year), int(month), int(day))
@@ -219,24 +268,14 @@ class PatentNormalizer:
             if not code:
                 return None
             
-            # Remove whitespace and convert to uppercase
-            normalized = code.strip().upper()
-            
             # CPC format: A01B 1/00 or A01B1/00
-            # Remove spaces and ensure proper format
-            normalized = re.sub(r'\s+', '', normalized)
-            
-            # Validate CPC format
-            if re.match(r'^[A-HY]\d{2}[A-Z]\d{1,3}/\d{1,3}$', normalized):
-                return normalized
+            # Remove all whitespace and convert to uppercase
+            normalized = ''.join(code.split()).upper()
             
-            # Try to fix common format issues
-            # Add missing slash
-            if re.match(r'^[A-HY]\d{2}[A-Z]\d{1,3}\d{1,3}$', normalized):
-                # Insert slash before last group of digits
-                match = re.match(r'^([A-HY]\d{2}[A-Z]\d{1,3})(\d{1,3})$', normalized)
-                if match:
-                    return f"{match.group(1)}/{match.group(2)}"
+            # Validate CPC format, adding a missing slash before the last group of digits
+            match = _CPC_CODE_RE.match(normalized)
+            if match:
+                return normalized if match.group(2) else f"{match.group(1)}/{match.group(3)}"
             
             return normalized if normalized else None
             
@@ -250,24 +289,14 @@ class PatentNormalizer:
             if not code:
                 return None
             
-            # Remove whitespace and convert to uppercase
-            normalized = code.strip().upper()
-            
             # IPC format: A01B 1/00 or A01B1/00
-            # Remove spaces and ensure proper format
-            normalized = re.sub(r'\s+', '', normalized)
+            # Remove all whitespace and convert to uppercase
+            normalized = ''.join(code.split()).upper()
             
-            # Validate IPC format
-            if re.match(r'^[A-H]\d{2}[A-Z]\d{1,3}/\d{1,3}$', normalized):
-                return normalized
-            
-            # Try to fix common format issues
-            # Add missing slash
-            if re.match(r'^[A-H]\d{2}[A-Z]\d{1,3}\d{1,3}$', normalized):
-                # Insert slash before last group of digits
-                match = re.match(r'^([A-H]\d{2}[A-Z]\d{1,3})(\d{1,3})$', normalized)
-                if match:
-                    return f"{match.group(1)}/{match.group(2)}"
+            # Validate IPC format, adding a missing slash before the last group of digits
+            match = _IPC_CODE_RE.match(normalized)
+            if match:
+                return normalized if match.group(2) else f"{match.group(1)}/{match.group(3)}"
             
             return normalized if normalized else None
             
@@ -277,39 +306,17 @@ class PatentNormalizer:
 
     def get_cpc_rollup(self, code: str) -> Optional[str]:
         """Get CPC rollup code (section level)."""
-        try:
-            if not code:
-                return None
-            
-            # Extract section (first character)
-            section = code[0] if len(code) > 0 else None
-            
-            if section and section in self.cpc_hierarchy:
-                return f"{section} - {self.cpc_hierarchy[section]}"
-            
-            return None
-            
-        except Exception as e:
-            logger.error("CPC rollup failed", error=str(e), code=code)
+        if not code:
             return None
+        
+        return self._cpc_rollup.get(code[0])
 
     def get_ipc_rollup(self, code: str) -> Optional[str]:
         """Get IPC rollup code (section level)."""
-        try:
-            if not code:
-                return None
-            
-            # Extract section (first character)
-            section = code[0] if len(code) > 0 else None
-            
-            if section and section in self.ipc_hierarchy:
-                return f"{section} - {self.ipc_hierarchy[section]}"
-            
-            return None
-            
-        except Exception as e:
-            logger.error("IPC rollup failed", error=str(e), code=code)
+        if not code:
             return None
+        
+        return self._ipc_rollup.get(code[0])
 
     def normalize_publication_number(self, pub_number: str) -> str:
         """Normalize publication number."""
@@ -327,15 +334,14 @@ class PatentNormalizer:
                     normalized = normalized[len(prefix):].strip()
             
             # Standardize format for US patents
-            if re.match(r'^US\d+$', normalized):
+            match = _US_PUB_NUMBER_RE.match(normalized)
+            if match:
                 # Add proper formatting for US patents
-                match = re.match(r'^US(\d+)$', normalized)
-                if match:
-                    number = match.group(1)
-                    if len(number) <= 7:
-                        return f"US{number.zfill(7)}"
-                    else:
-                        return f"US{number}"
+                number = match.group(1)
+                if len(number) <= 7:
+                    return f"US{number.zfill(7)}"
+                else:
+                    return f"US{number}"
             
             return normalized
             
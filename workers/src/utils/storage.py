@@ -3,15 +3,26 @@
 import asyncio
 import tempfile
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Any, BinaryIO, Dict, Optional
 import json
 
 import boto3
+import urllib3
+from botocore.config import Config
+from botocore.exceptions import ClientError
 from minio import Minio
+from minio.commonconfig import CopySource
+from minio.error import S3Error
 import structlog
 
 logger = structlog.get_logger(__name__)
 
+# Part size for streamed multipart uploads of unknown length
+UPLOAD_PART_SIZE = 10 * 1024 * 1024
+
+# Keep-alive HTTP connections held per storage client
+CONNECTION_POOL_SIZE = 32
+
 
 class StorageClient:
     """Client for S3/MinIO storage operations."""
@@ -19,18 +30,26 @@ class StorageClient:
     def __init__(self):
         self.minio_client = None
         self.s3_client = None
+        self.http_pool: Optional[urllib3.PoolManager] = None
         self.bucket_name = "ai-patent-explorer"
         self._init_clients()
 
     def _init_clients(self):
         """Initialize storage clients."""
         try:
+            # Long-lived keep-alive connection pool shared by all MinIO requests
+            self.http_pool = urllib3.PoolManager(
+                maxsize=CONNECTION_POOL_SIZE,
+                retries=urllib3.Retry(total=3, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504])
+            )
+            
             # Initialize MinIO client for local development
             self.minio_client = Minio(
                 "localhost:9000",
                 access_key="minioadmin",
                 secret_key="minioadmin",
-                secure=False
+                secure=False,
+                http_client=self.http_pool
             )
             
             # Initialize S3 client for production
@@ -38,7 +57,8 @@ class StorageClient:
                 's3',
                 aws_access_key_id="YOUR_ACCESS_KEY",
                 aws_secret_access_key="YOUR_SECRET_KEY",
-                region_name="us-east-1"
+                region_name="us-east-1",
+                config=Config(max_pool_connections=CONNECTION_POOL_SIZE, tcp_keepalive=True)
             )
             
             # Ensure bucket exists
@@ -47,6 +67,22 @@ class StorageClient:
         except Exception as e:
             logger.error("Failed to initialize storage clients", error=str(e))
 
+    async def connect(self):
+        """Open a pooled storage connection that later requests reuse."""
+        await asyncio.to_thread(self._ensure_bucket_exists)
+        logger.info("Connected to storage", bucket=self.bucket_name)
+
+    async def disconnect(self):
+        """Close pooled storage connections."""
+        try:
+            if self.http_pool:
+                self.http_pool.clear()
+            if self.s3_client:
+                self.s3_client.close()
+            logger.info("Disconnected from storage")
+        except Exception as e:
+            logger.error("Storage disconnection failed", error=str(e))
+
     def _ensure_bucket_exists(self):
         """Ensure the storage bucket exists."""
         try:
@@ -70,6 +106,42 @@ class StorageClient:
             logger.error("File upload failed", error=str(e), local_path=local_path, remote_path=remote_path)
             raise
 
+    async def upload_fileobj(
+        self,
+        fileobj: BinaryIO,
+        remote_path: str,
+        content_type: str = "application/octet-stream"
+    ) -> str:
+        """Stream a file-like object to storage in multipart chunks."""
+        try:
+            if self.minio_client:
+                await asyncio.to_thread(
+                    self.minio_client.put_object,
+                    self.bucket_name,
+                    remote_path,
+                    fileobj,
+                    length=-1,
+                    part_size=UPLOAD_PART_SIZE,
+                    content_type=content_type
+                )
+                logger.info("Stream uploaded to MinIO", remote_path=remote_path)
+                return f"minio://{self.bucket_name}/{remote_path}"
+            elif self.s3_client:
+                await asyncio.to_thread(
+                    self.s3_client.upload_fileobj,
+                    fileobj,
+                    self.bucket_name,
+                    remote_path,
+                    ExtraArgs={"ContentType": content_type}
+                )
+                logger.info("Stream uploaded to S3", remote_path=remote_path)
+                return f"s3://{self.bucket_name}/{remote_path}"
+            else:
+                raise Exception("No storage client available")
+        except Exception as e:
+            logger.error("Stream upload failed", error=str(e), remote_path=remote_path)
+            raise
+
     async def download_file(self, remote_path: str) -> Path:
         """Download a file from storage."""
         try:
@@ -171,6 +243,69 @@ class StorageClient:
             logger.error("S3 download failed", error=str(e))
             raise
 
+    async def file_exists(self, remote_path: str) -> bool:
+        """Check whether a file exists in storage."""
+        try:
+            if self.minio_client:
+                await asyncio.to_thread(self.minio_client.stat_object, self.bucket_name, remote_path)
+            elif self.s3_client:
+                await asyncio.to_thread(
+                    self.s3_client.head_object, Bucket=self.bucket_name, Key=remote_path
+                )
+            else:
+                return False
+            return True
+        except (S3Error, ClientError):
+            return False
+
+    async def copy_file(self, source_path: str, remote_path: str) -> str:
+        """Copy a file within storage server-side, without downloading it."""
+        try:
+            if self.minio_client:
+                await asyncio.to_thread(
+                    self.minio_client.copy_object,
+                    self.bucket_name,
+                    remote_path,
+                    CopySource(self.bucket_name, source_path)
+                )
+                return f"minio://{self.bucket_name}/{remote_path}"
+            elif self.s3_client:
+                await asyncio.to_thread(
+                    self.s3_client.copy_object,
+                    Bucket=self.bucket_name,
+                    Key=remote_path,
+                    CopySource={"Bucket": self.bucket_name, "Key": source_path}
+                )
+                return f"s3://{self.bucket_name}/{remote_path}"
+            else:
+                raise Exception("No storage client available")
+        except Exception as e:
+            logger.error("File copy failed", error=str(e), source_path=source_path, remote_path=remote_path)
+            raise
+
+    async def delete_prefix(self, prefix: str) -> int:
+        """Delete every file under a prefix and return how many were removed."""
+        try:
+            return await asyncio.to_thread(self._delete_prefix, prefix)
+        except Exception as e:
+            logger.error("Prefix deletion failed", error=str(e), prefix=prefix)
+            return 0
+
+    def _delete_prefix(self, prefix: str) -> int:
+        """Delete every file under a prefix (blocking)."""
+        deleted = 0
+        if self.minio_client:
+            for obj in self.minio_client.list_objects(self.bucket_name, prefix=prefix, recursive=True):
+                self.minio_client.remove_object(self.bucket_name, obj.object_name)
+                deleted += 1
+        elif self.s3_client:
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+                for obj in page.get('Contents', []):
+                    self.s3_client.delete_object(Bucket=self.bucket_name, Key=obj['Key'])
+                    deleted += 1
+        return deleted
+
     async def delete_file(self, remote_path: str) -> bool:
         """Delete a file from storage."""
         try:
@@ -13,6 +13,29 @@ from ..models.patent import PatentDocument, PatentMetadata, PatentClaim
 
 logger = structlog.get_logger(__name__)
 
+# Shared parser: drops whitespace-only text nodes and skips the unused ID table,
+# DTD loading and entity resolution (no network access) to keep trees small
+_PARSER = etree.XMLParser(
+    huge_tree=True,
+    remove_blank_text=True,
+    collect_ids=False,
+    resolve_entities=False,
+    load_dtd=False,
+    no_network=True,
+    recover=True
+)
+
+# Compiled XPath expressions for USPTO party extraction; each runs as a single
+# libxml2 traversal instead of a findall plus per-element finds in Python
+_USPTO_ASSIGNEE_NAMES = etree.XPath(
+    './/assignee/descendant::orgname[1]/text()[1]', smart_strings=False
+)
+_USPTO_INVENTORS = etree.XPath('.//inventor[.//first-name and .//last-name]')
+_USPTO_INVENTOR_NAME = etree.XPath(
+    'concat(string((.//first-name)[1]), " ", string((.//last-name)[1]))',
+    smart_strings=False
+)
+
 
 class XMLPatentParser:
     """Parser for XML patent documents from various sources."""
@@ -28,7 +51,7 @@ class XMLPatentParser:
         """Parse an XML patent document."""
         try:
             # Parse XML file
-            tree = etree.parse(str(file_path))
+            tree = etree.parse(str(file_path), _PARSER)
             root = tree.getroot()
 
             # Detect source and parse accordingly
@@ -200,26 +223,12 @@ class XMLPatentParser:
 
     def _extract_uspto_assignees(self, root) -> List[str]:
         """Extract assignees from USPTO XML."""
-        assignees = []
-        assignee_elems = root.findall('.//assignee')
-        for assignee in assignee_elems:
-            org_name = assignee.find('.//orgname')
-            if org_name is not None and org_name.text:
-                assignees.append(org_name.text)
-        return assignees
+        return [name for name in _USPTO_ASSIGNEE_NAMES(root) if name]
 
     def _extract_uspto_inventors(self, root) -> List[str]:
         """Extract inventors from USPTO XML."""
-        inventors = []
-        inventor_elems = root.findall('.//inventor')
-        for inventor in inventor_elems:
-            first_name = inventor.find('.//first-name')
-            last_name = inventor.find('.//last-name')
-            if first_name is not None and last_name is not None:
-                name = f"{first_name.text} {last_name.text}".strip()
-                if name:
-                    inventors.append(name)
-        return inventors
+        names = (_USPTO_INVENTOR_NAME(inventor).strip() for inventor in _USPTO_INVENTORS(root))
+        return [name for name in names if name]
 
     def _extract_uspto_text(self, root) -> str:
         """Extract full text from USPTO XML."""
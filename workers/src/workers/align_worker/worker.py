@@ -1,13 +1,17 @@
 import asyncio
-import json
 import logging
+import os
 import re
+from collections import OrderedDict
 from typing import Dict, List, Optional, Any, Tuple
 import numpy as np
+import orjson
 from sentence_transformers import SentenceTransformer
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import torch
+import torch.multiprocessing as mp
+from numba import njit, prange
 
 from ..base import BaseWorker
 from ...utils.database import DatabaseClient
@@ -15,24 +19,142 @@ from ...utils.storage import StorageClient
 
 logger = logging.getLogger(__name__)
 
+# Alignment types indexed by the codes returned from combine_and_classify
+ALIGNMENT_TYPES = (
+    "no_match",
+    "low_similarity",
+    "moderate_similarity",
+    "high_similarity",
+    "exact_match",
+)
+
+# Lower score bound for each alignment type above "no_match"
+ALIGNMENT_THRESHOLDS = np.array([0.2, 0.4, 0.6, 0.8], dtype=np.float64)
+
+
+@njit(parallel=True, cache=True)
+def combine_and_classify(emb_scores, tfidf_scores, thresholds):
+    """Combine embedding and TF-IDF score matrices and classify each pair.
+
+    Returns the weighted score matrix and, for every cell, an index into
+    ALIGNMENT_TYPES. Rows run in parallel, so callers pass a whole claim's
+    clause x reference clause matrix rather than one row at a time.
+    """
+    n_rows, n_cols = emb_scores.shape
+    n_thresholds = thresholds.shape[0]
+    combined = np.empty((n_rows, n_cols), dtype=np.float64)
+    types_idx = np.zeros((n_rows, n_cols), dtype=np.int8)
+    
+    for i in prange(n_rows):
+        for j in range(n_cols):
+            score = 0.6 * emb_scores[i, j] + 0.4 * tfidf_scores[i, j]
+            combined[i, j] = score
+            
+            code = 0
+            for k in range(n_thresholds):
+                if score >= thresholds[k]:
+                    code = k + 1
+            types_idx[i, j] = code
+    
+    return combined, types_idx
+
+
+def classify_alignment(similarity_score: float) -> str:
+    """Alignment type of a single combined similarity score."""
+    code = int(np.count_nonzero(similarity_score >= ALIGNMENT_THRESHOLDS))
+    return ALIGNMENT_TYPES[code]
+
+
+# Maximum number of clause embeddings kept in the int8 embedding cache
+EMBEDDING_CACHE_SIZE = 50000
+
+# Maximum number of clause texts kept in the token cache before it is reset
+TOKEN_CACHE_SIZE = 50000
+
+# Clause separators in priority order, combined so a claim is scanned once;
+# group numbers 1-4 give the separator's priority
+CLAUSE_SEPARATOR_PATTERN = re.compile(
+    r'(\s*;\s*)'                                # Semicolon
+    r'|(\s*,\s*(?=wherein))'                    # Comma before "wherein"
+    r'|(\s*,\s*(?=and\s+wherein))'              # Comma before "and wherein"
+    r'|(\s*,\s*(?=further\s+wherein))'          # Comma before "further wherein"
+)
+CLAUSE_NUMBER_PREFIX_PATTERN = re.compile(r'^\d+\.\s*')
+
+
+def quantize_embeddings(embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Quantize embeddings to int8 with a symmetric per-vector scale."""
+    scales = np.abs(embeddings).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.round(embeddings / scales[:, None]).astype(np.int8)
+    
+    return quantized, scales.astype(np.float32)
+
+
+def quantized_similarity(
+    q_a: np.ndarray, 
+    scales_a: np.ndarray, 
+    q_b: np.ndarray, 
+    scales_b: np.ndarray
+) -> np.ndarray:
+    """Dot-product similarity matrix between two sets of int8 embeddings."""
+    # Sums of int8 products over 384 dims are exact in float32, so this SGEMM
+    # is an exact integer dot product without numpy's slow integer matmul
+    dots = q_a.astype(np.float32) @ q_b.astype(np.float32).T
+    
+    return dots * scales_a[:, None] * scales_b[None, :]
+
+# Embedding models already loaded in this process, keyed by device
+_EMBEDDING_MODELS: Dict[str, SentenceTransformer] = {}
+
+
+def load_embedding_model(device: torch.device) -> SentenceTransformer:
+    """Load the clause embedding model once per process and device.
+    
+    On CPU the weights are moved to shared memory, so child processes that
+    receive the model through torch.multiprocessing map the same pages
+    instead of holding their own copy.
+    """
+    key = str(device)
+    model = _EMBEDDING_MODELS.get(key)
+    if model is None:
+        model = SentenceTransformer('all-MiniLM-L6-v2', device=key)
+        if device.type == 'cuda':
+            # FP16 doubles tensor-core throughput; similarities are computed in FP32
+            model.half()
+        else:
+            model.share_memory()
+        _EMBEDDING_MODELS[key] = model
+    return model
+
 
 class AlignWorker(BaseWorker):
     """Worker for per-clause alignment using soft-TFIDF and embedding dynamic programming."""
     
-    def __init__(self, nats_url: str = "nats://localhost:4222"):
+    def __init__(
+        self,
+        nats_url: str = "nats://localhost:4222",
+        embedding_model: Optional[SentenceTransformer] = None
+    ):
         super().__init__(nats_url)
         self.db = DatabaseClient()
         self.storage = StorageClient()
         
-        # Initialize models
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        # Initialize models, reusing a model shared by the parent process if given
+        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        self.embedding_model = embedding_model or load_embedding_model(self.device)
         self.tfidf_vectorizer = TfidfVectorizer(
             ngram_range=(1, 3),
             max_features=10000,
             stop_words='english',
             min_df=2
         )
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        
+        # LRU cache of clause text -> (int8 embedding, scale)
+        self._embedding_cache: OrderedDict = OrderedDict()
+        
+        # Clause text -> (tokens, token set), shared by all overlap analyses
+        self._token_cache: Dict[str, Tuple[List[str], frozenset]] = {}
         
         logger.info(f"AlignWorker initialized with models on {self.device}")
     
@@ -56,7 +178,7 @@ class AlignWorker(BaseWorker):
     async def handle_align_request(self, msg):
         """Handle patent alignment requests."""
         try:
-            data = json.loads(msg.data.decode())
+            data = orjson.loads(msg.data)
             align_id = data.get('align_id')
             patent_id = data.get('patent_id')
             claim_num = data.get('claim_num')
@@ -105,24 +227,33 @@ class AlignWorker(BaseWorker):
             # Segment the claim into clauses
             target_clauses = self.segment_claim_into_clauses(target_claim['text'])
             
-            # Get reference claims from reference patents
-            reference_claims = []
-            for ref_patent_id in reference_patents:
-                ref_patent_claims = await self.db.get_patent_claims(ref_patent_id)
-                for claim in ref_patent_claims:
-                    reference_claims.append({
-                        'patent_id': ref_patent_id,
-                        'claim_id': claim['id'],
-                        'claim_number': claim['claim_number'],
-                        'text': claim['text'],
-                        'clauses': self.segment_claim_into_clauses(claim['text'])
-                    })
+            # Fetch reference claims from all reference patents concurrently
+            ref_claims_lists = await asyncio.gather(
+                *(self.db.get_patent_claims(ref_patent_id) for ref_patent_id in reference_patents)
+            )
+            reference_claims = [
+                {
+                    'patent_id': ref_patent_id,
+                    'claim_id': claim['id'],
+                    'claim_number': claim['claim_number'],
+                    'text': claim['text'],
+                    'clauses': self.segment_claim_into_clauses(claim['text'])
+                }
+                for ref_patent_id, ref_patent_claims in zip(reference_patents, ref_claims_lists)
+                for claim in ref_patent_claims
+            ]
+            
+            # Score every target clause against every reference clause at once
+            scores = self.score_clause_matrix(
+                target_clauses,
+                [clause for ref_claim in reference_claims for clause in ref_claim['clauses']]
+            )
             
             # Perform alignment for each target clause
             alignment_results = []
             for i, target_clause in enumerate(target_clauses):
-                clause_alignments = await self.align_single_clause(
-                    target_clause, reference_claims, i
+                clause_alignments = self.align_single_clause(
+                    target_clause, reference_claims, [matrix[i] for matrix in scores]
                 )
                 alignment_results.append({
                     'clause_index': i,
@@ -147,20 +278,57 @@ class AlignWorker(BaseWorker):
             logger.error(f"Error aligning claim clauses: {e}")
             raise
     
-    async def align_single_clause(
+    def score_clause_matrix(
+        self, 
+        target_clauses: List[str], 
+        reference_clauses: List[str]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Score target clauses against reference clauses.
+        
+        Returns the combined score, alignment type code, embedding score and
+        TF-IDF score matrices, one row per target clause.
+        """
+        shape = (len(target_clauses), len(reference_clauses))
+        if not all(shape):
+            empty = np.zeros(shape, dtype=np.float64)
+            return empty, np.zeros(shape, dtype=np.int8), empty, empty
+        
+        # Embeddings are L2-normalized, so cosine similarity is a single GEMM
+        q_target, target_scales = self.get_quantized_embeddings(target_clauses)
+        q_ref, ref_scales = self.get_quantized_embeddings(reference_clauses)
+        emb_scores = quantized_similarity(q_target, target_scales, q_ref, ref_scales).astype(np.float64)
+        
+        tfidf_scores = np.empty(shape, dtype=np.float64)
+        for i, target_clause in enumerate(target_clauses):
+            for j, ref_clause in enumerate(reference_clauses):
+                tfidf_scores[i, j] = self.calculate_tfidf_similarity(target_clause, ref_clause)
+        
+        # Combine and classify the whole matrix in one kernel call
+        combined, types_idx = combine_and_classify(emb_scores, tfidf_scores, ALIGNMENT_THRESHOLDS)
+        return combined, types_idx, emb_scores, tfidf_scores
+    
+    def align_single_clause(
         self, 
         target_clause: str, 
         reference_claims: List[Dict], 
-        clause_index: int
+        clause_scores: List[np.ndarray]
     ) -> List[Dict[str, Any]]:
-        """Align a single clause with all reference claims."""
+        """Align a single clause with all reference claims.
+        
+        ``clause_scores`` holds the clause's rows of the score_clause_matrix
+        matrices, with reference clauses in reference claim order.
+        """
         alignments = []
         
+        start = 0
         for ref_claim in reference_claims:
+            end = start + len(ref_claim['clauses'])
+            
             # Get best alignment for each reference claim
-            best_alignment = await self.find_best_alignment(
-                target_clause, ref_claim['clauses'], ref_claim
+            best_alignment = self.find_best_alignment(
+                target_clause, ref_claim['clauses'], [row[start:end] for row in clause_scores]
             )
+            start = end
             
             if best_alignment:
                 alignments.append({
@@ -179,37 +347,36 @@ class AlignWorker(BaseWorker):
         
         return alignments
     
-    async def find_best_alignment(
+    def find_best_alignment(
         self, 
         target_clause: str, 
         reference_clauses: List[str], 
-        ref_claim: Dict
+        scores: List[np.ndarray]
     ) -> Optional[Dict[str, Any]]:
-        """Find the best alignment for a target clause among reference clauses."""
-        best_alignment = None
-        best_score = 0.0
-        
-        for i, ref_clause in enumerate(reference_clauses):
-            # Calculate multiple similarity metrics
-            tfidf_similarity = self.calculate_tfidf_similarity(target_clause, ref_clause)
-            embedding_similarity = await self.calculate_embedding_similarity(target_clause, ref_clause)
-            
-            # Combined similarity score (weighted average)
-            combined_score = 0.6 * embedding_similarity + 0.4 * tfidf_similarity
-            
-            if combined_score > best_score:
-                best_score = combined_score
-                best_alignment = {
-                    'clause_index': i,
-                    'clause_text': ref_clause,
-                    'similarity_score': combined_score,
-                    'tfidf_score': tfidf_similarity,
-                    'embedding_score': embedding_similarity,
-                    'alignment_type': self.determine_alignment_type(combined_score),
-                    'overlap_details': self.analyze_overlap(target_clause, ref_clause)
-                }
+        """Find the best alignment for a target clause among reference clauses.
+        
+        ``scores`` holds the combined score, type code, embedding score and
+        TF-IDF score of the target clause against each reference clause.
+        """
+        if not reference_clauses:
+            return None
+        
+        combined, types_idx, emb_scores, tfidf_scores = scores
+        best = int(np.argmax(combined))
+        best_score = float(combined[best])
+        if best_score <= 0.0:
+            return None
         
-        return best_alignment
+        ref_clause = reference_clauses[best]
+        return {
+            'clause_index': best,
+            'clause_text': ref_clause,
+            'similarity_score': best_score,
+            'tfidf_score': float(tfidf_scores[best]),
+            'embedding_score': float(emb_scores[best]),
+            'alignment_type': ALIGNMENT_TYPES[types_idx[best]],
+            'overlap_details': self.analyze_overlap(target_clause, ref_clause)
+        }
     
     def calculate_tfidf_similarity(self, text1: str, text2: str) -> float:
         """Calculate TF-IDF similarity between two texts."""
@@ -231,38 +398,55 @@ class AlignWorker(BaseWorker):
     async def calculate_embedding_similarity(self, text1: str, text2: str) -> float:
         """Calculate embedding similarity between two texts."""
         try:
-            # Generate embeddings
-            embedding1 = self.embedding_model.encode(text1, convert_to_numpy=True)
-            embedding2 = self.embedding_model.encode(text2, convert_to_numpy=True)
+            # Normalized embeddings make cosine similarity a plain dot product
+            embeddings = self.encode_texts([text1, text2])
             
-            # Calculate cosine similarity
-            similarity = np.dot(embedding1, embedding2) / (
-                np.linalg.norm(embedding1) * np.linalg.norm(embedding2)
-            )
-            
-            return float(similarity)
+            return float(embeddings[0] @ embeddings[1])
         except Exception as e:
             logger.warning(f"Error calculating embedding similarity: {e}")
             return 0.0
     
+    def encode_texts(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into a contiguous float32 matrix of L2-normalized embeddings."""
+        embeddings = self.embedding_model.encode(
+            texts, convert_to_numpy=True, normalize_embeddings=True
+        )
+        
+        # Contiguous float32 keeps matrix products on the SGEMM path
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+    
+    def get_quantized_embeddings(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Get int8 embeddings and scales for texts, encoding only cache misses."""
+        cache = self._embedding_cache
+        
+        misses = [text for text in dict.fromkeys(texts) if text not in cache]
+        if misses:
+            quantized, scales = quantize_embeddings(self.encode_texts(misses))
+            for text, q_row, scale in zip(misses, quantized, scales):
+                cache[text] = (q_row, scale)
+        
+        rows = []
+        for text in texts:
+            cache.move_to_end(text)
+            rows.append(cache[text])
+        
+        while len(cache) > EMBEDDING_CACHE_SIZE:
+            cache.popitem(last=False)
+        
+        return (
+            np.stack([q_row for q_row, _ in rows]),
+            np.array([scale for _, scale in rows], dtype=np.float32)
+        )
+    
     def determine_alignment_type(self, similarity_score: float) -> str:
         """Determine the type of alignment based on similarity score."""
-        if similarity_score >= 0.8:
-            return "exact_match"
-        elif similarity_score >= 0.6:
-            return "high_similarity"
-        elif similarity_score >= 0.4:
-            return "moderate_similarity"
-        elif similarity_score >= 0.2:
-            return "low_similarity"
-        else:
-            return "no_match"
+        return classify_alignment(similarity_score)
     
     def analyze_overlap(self, text1: str, text2: str) -> Dict[str, Any]:
         """Analyze overlap between two texts."""
-        # Tokenize texts
-        tokens1 = set(self.tokenize_text(text1))
-        tokens2 = set(self.tokenize_text(text2))
+        # Tokenize texts (memoized per clause text)
+        _, tokens1 = self.get_tokens(text1)
+        _, tokens2 = self.get_tokens(text2)
         
         # Calculate overlap metrics
         intersection = tokens1.intersection(tokens2)
@@ -299,7 +483,7 @@ class AlignWorker(BaseWorker):
     
     def extract_ngrams(self, text: str, min_n: int, max_n: int) -> List[str]:
         """Extract n-grams from text."""
-        tokens = self.tokenize_text(text)
+        tokens, _ = self.get_tokens(text)
         ngrams = []
         
         for n in range(min_n, max_n + 1):
@@ -313,22 +497,22 @@ class AlignWorker(BaseWorker):
         """Segment a patent claim into individual clauses."""
         clauses = []
         
-        # Split by common clause separators
-        separators = [
-            r'\s*;\s*',  # Semicolon
-            r'\s*,\s*(?=wherein|wherein\s+the|wherein\s+said|wherein\s+each|wherein\s+at\s+least)',  # Comma before "wherein"
-            r'\s*,\s*(?=and\s+wherein|and\s+wherein\s+the|and\s+wherein\s+said)',  # Comma before "and wherein"
-            r'\s*,\s*(?=further\s+wherein|further\s+wherein\s+the|further\s+wherein\s+said)',  # Comma before "further wherein"
-        ]
-        
         # Start with the full claim
         remaining_text = claim_text.strip()
         
-        for separator in separators:
-            parts = re.split(separator, remaining_text)
-            if len(parts) > 1:
-                clauses.extend([part.strip() for part in parts if part.strip()])
-                break
+        # Collect separator spans by kind in a single scan, then split on the
+        # highest-priority kind present
+        spans_by_kind: Dict[int, List[Tuple[int, int]]] = {}
+        for match in CLAUSE_SEPARATOR_PATTERN.finditer(remaining_text):
+            spans_by_kind.setdefault(match.lastindex, []).append(match.span())
+        
+        if spans_by_kind:
+            position = 0
+            for sep_start, sep_end in spans_by_kind[min(spans_by_kind)]:
+                clauses.append(remaining_text[position:sep_start])
+                position = sep_end
+            clauses.append(remaining_text[position:])
+            clauses = [part.strip() for part in clauses if part.strip()]
         else:
             # If no separators found, treat as single clause
             clauses.append(remaining_text)
@@ -337,7 +521,7 @@ class AlignWorker(BaseWorker):
         cleaned_clauses = []
         for clause in clauses:
             # Remove common prefixes
-            clause = re.sub(r'^(\d+\.\s*)?', '', clause)
+            clause = CLAUSE_NUMBER_PREFIX_PATTERN.sub('', clause)
             clause = clause.strip()
             
             if clause and len(clause) > 10:  # Minimum clause length
@@ -365,6 +549,19 @@ class AlignWorker(BaseWorker):
         
         return tokens
     
+    def get_tokens(self, text: str) -> Tuple[List[str], frozenset]:
+        """Get the token list and token set for a text, tokenizing it at most once."""
+        cached = self._token_cache.get(text)
+        if cached is None:
+            if len(self._token_cache) >= TOKEN_CACHE_SIZE:
+                self._token_cache.clear()
+            
+            tokens = self.tokenize_text(text)
+            cached = (tokens, frozenset(tokens))
+            self._token_cache[text] = cached
+        
+        return cached
+    
     async def store_alignment_results(
         self, 
         patent_id: str, 
@@ -373,25 +570,26 @@ class AlignWorker(BaseWorker):
     ) -> None:
         """Store alignment results in the database."""
         try:
-            for alignment in alignment_results:
-                clause_index = alignment['clause_index']
-                clause_text = alignment['clause_text']
-                
-                for ref_alignment in alignment['alignments']:
-                    # Store alignment record
-                    await self.db.create_alignment(
-                        patent_id=patent_id,
-                        claim_num=claim_num,
-                        clause_index=clause_index,
-                        clause_text=clause_text,
-                        reference_patent_id=ref_alignment['reference_patent_id'],
-                        reference_claim_id=ref_alignment['reference_claim_id'],
-                        reference_clause_index=ref_alignment['reference_clause_index'],
-                        reference_clause_text=ref_alignment['reference_clause_text'],
-                        similarity_score=ref_alignment['similarity_score'],
-                        alignment_type=ref_alignment['alignment_type'],
-                        overlap_details=ref_alignment['overlap_details']
-                    )
+            # Flatten every clause/reference pair into one bulk insert
+            rows = [
+                {
+                    'patent_id': patent_id,
+                    'claim_num': claim_num,
+                    'clause_index': alignment['clause_index'],
+                    'clause_text': alignment['clause_text'],
+                    'reference_patent_id': ref_alignment['reference_patent_id'],
+                    'reference_claim_id': ref_alignment['reference_claim_id'],
+                    'reference_clause_index': ref_alignment['reference_clause_index'],
+                    'reference_clause_text': ref_alignment['reference_clause_text'],
+                    'similarity_score': ref_alignment['similarity_score'],
+                    'alignment_type': ref_alignment['alignment_type'],
+                    'overlap_details': ref_alignment['overlap_details']
+                }
+                for alignment in alignment_results
+                for ref_alignment in alignment['alignments']
+            ]
+            
+            await self.db.create_alignments_bulk(rows)
             
             logger.info(f"Stored alignment results for patent {patent_id}, claim {claim_num}")
             
@@ -400,9 +598,9 @@ class AlignWorker(BaseWorker):
             raise
 
 
-async def main():
+async def main(embedding_model: Optional[SentenceTransformer] = None):
     """Main entry point for the align worker."""
-    worker = AlignWorker()
+    worker = AlignWorker(embedding_model=embedding_model)
     
     try:
         await worker.start()
@@ -417,6 +615,33 @@ async def main():
         await worker.stop()
 
 
+def _run_worker_process(embedding_model: SentenceTransformer):
+    """Run one align worker in a child process on the shared model."""
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(embedding_model))
+
+
+def run_worker_processes(num_processes: int):
+    """Run several align worker processes that share one copy of the model weights."""
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    
+    if num_processes <= 1 or device.type == 'cuda':
+        # A single process owns the GPU copy of the model
+        asyncio.run(main())
+        return
+    
+    embedding_model = load_embedding_model(device)
+    context = mp.get_context('spawn')
+    processes = [
+        context.Process(target=_run_worker_process, args=(embedding_model,))
+        for _ in range(num_processes)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
-    asyncio.run(main())
+    run_worker_processes(int(os.getenv("ALIGN_WORKER_PROCESSES", "1")))
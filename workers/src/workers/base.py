@@ -2,23 +2,48 @@
 
 import asyncio
 import logging
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Union
 from abc import ABC, abstractmethod
 
 import nats
+import orjson
 import structlog
+from nats.errors import TimeoutError as NatsTimeoutError
+from nats.js.api import ConsumerConfig, RetentionPolicy
+from nats.js.errors import BadRequestError
 from pydantic import BaseModel
 
 logger = structlog.get_logger(__name__)
 
+# Cap on delivered-but-unacknowledged messages per batch consumer
+MAX_ACK_PENDING = 64
+
+# Seconds a pull fetch waits for messages before polling again
+FETCH_TIMEOUT = 5
+
+# Seconds to wait after a failed fetch before retrying
+FETCH_RETRY_DELAY = 2
+
+# Seconds before a message from a failed batch is redelivered
+REDELIVERY_DELAY = 10
+
+# Deliveries of a message before JetStream stops redelivering it
+MAX_DELIVER = 5
+
+# Seconds an unconsumed work item stays in its stream
+STREAM_MAX_AGE = 7 * 24 * 3600
+
 
 class BaseWorker(ABC):
     """Base class for all workers in the patent processing pipeline."""
 
     def __init__(self):
         self.nats_client: Optional[nats.NATS] = None
+        self.js = None
         self.running = False
+        self.stopped = asyncio.Event()
         self.subscriptions = []
+        self.batch_tasks: List[asyncio.Task] = []
 
     async def connect(self):
         """Connect to NATS and other services."""
@@ -29,6 +54,7 @@ class BaseWorker(ABC):
                 reconnect_time_wait=3,
                 max_reconnect_attempts=5
             )
+            self.js = self.nats_client.jetstream()
             logger.info("Connected to NATS")
 
         except Exception as e:
@@ -54,10 +80,72 @@ class BaseWorker(ABC):
             logger.error("Failed to subscribe", subject=subject, error=str(e))
             raise
 
-    async def publish(self, subject: str, data: Dict[str, Any]):
-        """Publish a message to a NATS subject."""
+    async def subscribe_batch(self, subject: str, handler: Callable, batch_size: int = 32):
+        """Consume a subject through a JetStream pull consumer and hand messages to handler in batches.
+
+        At most MAX_ACK_PENDING messages are in flight per consumer, so a burst
+        of requests queues in the stream instead of piling up in the worker.
+        """
+        stream = subject.replace(".", "_").upper()
         try:
-            await self.nats_client.publish(subject, data)
+            # Work-queue retention drops each message once it is acked
+            await self.js.add_stream(
+                name=stream,
+                subjects=[subject],
+                retention=RetentionPolicy.WORK_QUEUE,
+                max_age=STREAM_MAX_AGE
+            )
+        except BadRequestError as e:
+            logger.warning("Stream exists with a different configuration", stream=stream, error=str(e))
+
+        # Durable consumer shared by every instance of this worker type
+        durable = f"{type(self).__name__}_{stream}"
+        subscription = await self.js.pull_subscribe(
+            subject,
+            durable=durable,
+            stream=stream,
+            config=ConsumerConfig(max_ack_pending=MAX_ACK_PENDING, max_deliver=MAX_DELIVER)
+        )
+        self.subscriptions.append(subscription)
+        self.batch_tasks.append(
+            asyncio.create_task(self._batch_loop(subject, subscription, handler, batch_size))
+        )
+        logger.info("Pull-subscribed to subject", subject=subject, durable=durable)
+
+    async def _batch_loop(self, subject: str, subscription, handler: Callable, batch_size: int):
+        """Fetch batches from a pull consumer, process them, and acknowledge them.
+
+        A batch is acked only after its handler returns; if the handler raises,
+        the batch is nak'ed so JetStream redelivers it, up to MAX_DELIVER times.
+        """
+        while self.running:
+            try:
+                batch = await subscription.fetch(batch=batch_size, timeout=FETCH_TIMEOUT)
+            except NatsTimeoutError:
+                continue
+            except Exception as e:
+                logger.error("Batch fetch failed", subject=subject, error=str(e))
+                await asyncio.sleep(FETCH_RETRY_DELAY)
+                continue
+
+            try:
+                await handler(batch)
+            except Exception as e:
+                logger.error("Batch handler failed", subject=subject, size=len(batch), error=str(e))
+                await asyncio.gather(*(msg.nak(delay=REDELIVERY_DELAY) for msg in batch), return_exceptions=True)
+                continue
+
+            await asyncio.gather(*(msg.ack() for msg in batch), return_exceptions=True)
+
+    async def publish(self, subject: str, data: Union[Dict[str, Any], bytes]):
+        """Publish a message to a NATS subject.
+
+        ``data`` may be a dict, which is serialized here, or an already
+        serialized payload, which is sent as-is so callers can reuse it.
+        """
+        try:
+            payload = data if isinstance(data, bytes) else orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+            await self.nats_client.publish(subject, payload)
             logger.debug("Published message", subject=subject)
         except Exception as e:
             logger.error("Failed to publish message", subject=subject, error=str(e))
@@ -77,11 +165,16 @@ class BaseWorker(ABC):
         """Stop the worker."""
         try:
             self.running = False
+            self.stopped.set()
             
             # Unsubscribe from all subjects
             for subscription in self.subscriptions:
                 await subscription.unsubscribe()
             
+            for task in self.batch_tasks:
+                task.cancel()
+            self.batch_tasks.clear()
+            
             await self.disconnect()
             logger.info("Worker stopped")
         except Exception as e:
@@ -97,9 +190,8 @@ class BaseWorker(ABC):
         try:
             await self.start()
             
-            # Keep the worker running
-            while self.running:
-                await asyncio.sleep(1)
+            # Wait until stop() is called; messages are handled by subscriptions
+            await self.stopped.wait()
                 
         except KeyboardInterrupt:
             logger.info("Received interrupt signal")
@@ -1,11 +1,19 @@
 import asyncio
-import json
+import copy
+import hashlib
+import io
 import logging
-from typing import Dict, List, Optional, Any, Tuple
-from datetime import datetime
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Any, Tuple
+from datetime import datetime, timezone
 import os
+import time
+import zipfile
+from collections import OrderedDict
 from pathlib import Path
 
+import orjson
 from docx import Document
 from docx.shared import Inches, Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
@@ -17,12 +25,120 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
 from reportlab.pdfgen import canvas
+import structlog
 
 from ..base import BaseWorker
 from ...utils.database import DatabaseClient
 from ...utils.storage import StorageClient
 
-logger = logging.getLogger(__name__)
+logger = structlog.get_logger(__name__)
+
+# Maximum number of patent charts built concurrently for one export bundle
+EXPORT_CHART_CONCURRENCY = 8
+
+# In-process cache of read-only DB lookups (entries, seconds)
+LOOKUP_CACHE_SIZE = 4096
+LOOKUP_CACHE_TTL = 300
+
+# Storage prefix for rendered charts, reused across requests with the same inputs
+CHART_CACHE_PREFIX = "charts/cache"
+
+# Bumped when the cached rendering changes, so older renderings are not served
+CHART_CACHE_VERSION = 2
+
+# Events after which cached lookups and rendered charts for the event's patent are dropped
+CACHE_INVALIDATION_SUBJECTS = ("patent.updated", "align.complete", "novelty.complete")
+
+
+def _build_docx_template() -> bytes:
+    """Build the static start of every DOCX claim chart once, as bytes."""
+    doc = Document()
+    
+    # Add title
+    title = doc.add_heading('Claim Chart', 0)
+    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+# Pre-built DOCX chart template; each chart loads a copy instead of rebuilding it
+DOCX_TEMPLATE = _build_docx_template()
+
+# ReportLab styles shared by every PDF build
+PDF_STYLES = getSampleStyleSheet()
+PDF_TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=PDF_STYLES['Heading1'],
+    fontSize=16,
+    spaceAfter=30,
+    alignment=1  # Center
+)
+ALIGNMENT_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+
+def chart_cache_path(
+    patent_id: str,
+    claim_num: int,
+    chart_type: str,
+    include_alignments: bool,
+    include_novelty: bool
+) -> str:
+    """Storage path of the cached rendering of a chart with these inputs."""
+    key = hashlib.blake2b(
+        f"{CHART_CACHE_VERSION}|{patent_id}|{claim_num}|{include_alignments}|{include_novelty}|{chart_type}".encode(),
+        digest_size=16
+    ).hexdigest()
+    return f"{CHART_CACHE_PREFIX}/{patent_id}/{key}.{chart_type}"
+
+
+def _patent_display_fields(patent: Dict[str, Any]) -> Tuple[str, str, str]:
+    """Return the assignees, inventors and priority date display strings for a patent.
+    
+    The strings are stored on the patent row the first time, so a cached row
+    charted repeatedly (e.g. throughout an export bundle) formats them once.
+    """
+    if '_assignees_str' not in patent:
+        patent['_assignees_str'] = ', '.join(patent['assignees'])
+        patent['_inventors_str'] = ', '.join(patent['inventors'])
+        patent['_prio_date_str'] = str(patent['prio_date'])
+    return patent['_assignees_str'], patent['_inventors_str'], patent['_prio_date_str']
+
+
+def _truncate(text: str, limit: int) -> str:
+    """Truncate text to limit characters, marking the cut with an ellipsis."""
+    return text if len(text) <= limit else text[:limit] + '...'
+
+
+def _append_docx_row(tbl, cell_properties: List[Any], values: Tuple[str, ...]):
+    """Append a table row built directly from OXML elements."""
+    tr = OxmlElement('w:tr')
+    for tc_pr, value in zip(cell_properties, values):
+        tc = OxmlElement('w:tc')
+        if tc_pr is not None:
+            tc.append(copy.deepcopy(tc_pr))
+        p = OxmlElement('w:p')
+        r = OxmlElement('w:r')
+        r.text = value  # Handles tabs/line breaks like Cell.text
+        p.append(r)
+        tc.append(p)
+        tr.append(tc)
+    tbl.append(tr)
+
+
+async def _none() -> None:
+    """Placeholder for an optional lookup that was not requested."""
+    return None
 
 
 class ChartWorker(BaseWorker):
@@ -33,6 +149,12 @@ class ChartWorker(BaseWorker):
         self.db = DatabaseClient()
         self.storage = StorageClient()
         
+        # (lookup name, *args) -> (expiry time, result), in LRU order
+        self._lookup_cache: OrderedDict = OrderedDict()
+        
+        # Process pool for GIL-bound python-docx / ReportLab rendering
+        self._render_pool: Optional[ProcessPoolExecutor] = None
+        
         logger.info("ChartWorker initialized")
     
     async def start(self):
@@ -41,22 +163,97 @@ class ChartWorker(BaseWorker):
         await self.db.connect()
         await self.storage.connect()
         
+        self._render_pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=multiprocessing.get_context('spawn')
+        )
+        
         # Subscribe to chart generation requests
-        await self.subscribe("chart.generate", self.handle_chart_request)
+        await self.subscribe_batch("chart.generate", self.handle_chart_batch)
         await self.subscribe("export.bundle", self.handle_export_request)
         
+        # Drop cached lookups when a patent's data changes
+        for subject in CACHE_INVALIDATION_SUBJECTS:
+            await self.subscribe(subject, self.handle_cache_invalidation)
+        
         logger.info("ChartWorker started and listening for requests")
     
     async def stop(self):
         """Stop the chart worker."""
         await self.db.disconnect()
         await self.storage.disconnect()
+        if self._render_pool is not None:
+            self._render_pool.shutdown(wait=False, cancel_futures=True)
+            self._render_pool = None
         await super().stop()
     
-    async def handle_chart_request(self, msg):
-        """Handle claim chart generation requests."""
+    async def _render(self, builder: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking document build off the event loop."""
+        if self._render_pool is None:
+            return await asyncio.to_thread(builder, *args)
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._render_pool, builder, *args)
+    
+    async def cached_lookup(self, name: str, *args: Any) -> Any:
+        """Run a read-only DatabaseClient lookup through the in-process LRU cache."""
+        key = (name, *args)
+        now = time.monotonic()
+        
+        entry = self._lookup_cache.get(key)
+        if entry is not None and entry[0] > now:
+            self._lookup_cache.move_to_end(key)
+            return entry[1]
+        
+        result = await getattr(self.db, name)(*args)
+        
+        # Don't cache misses so newly ingested data shows up immediately
+        if result is not None:
+            self._lookup_cache[key] = (now + LOOKUP_CACHE_TTL, result)
+            self._lookup_cache.move_to_end(key)
+            while len(self._lookup_cache) > LOOKUP_CACHE_SIZE:
+                self._lookup_cache.popitem(last=False)
+        
+        return result
+    
+    def invalidate_patent_cache(self, patent_id: str):
+        """Drop every cached lookup for a patent."""
+        for key in [key for key in self._lookup_cache if key[1] == patent_id]:
+            del self._lookup_cache[key]
+    
+    async def handle_cache_invalidation(self, msg):
+        """Handle events that change a patent's data."""
         try:
-            data = json.loads(msg.data.decode())
+            patent_id = orjson.loads(msg.data).get('patent_id')
+            if patent_id:
+                self.invalidate_patent_cache(patent_id)
+                await self.storage.delete_prefix(f"{CHART_CACHE_PREFIX}/{patent_id}/")
+        except Exception as e:
+            logger.error("Error handling cache invalidation", error=str(e))
+    
+    async def handle_chart_batch(self, msgs):
+        """Handle a batch of claim chart generation requests concurrently."""
+        results = await asyncio.gather(
+            *(self.process_chart_request(msg) for msg in msgs),
+            return_exceptions=True
+        )
+        
+        # One failed request must not drop the other requests' events
+        events = []
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error("Unhandled error in chart request", error=str(result))
+            elif result is not None:
+                events.append(result)
+        
+        # Publish all completion/error events together
+        await asyncio.gather(*(self.publish(subject, payload) for subject, payload in events))
+    
+    async def process_chart_request(self, msg) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Process one claim chart generation request and return the event to publish."""
+        data = {}
+        try:
+            data = orjson.loads(msg.data)
             chart_id = data.get('chart_id')
             patent_id = data.get('patent_id')
             claim_num = data.get('claim_num')
@@ -66,48 +263,54 @@ class ChartWorker(BaseWorker):
             
             if not all([chart_id, patent_id, claim_num]):
                 logger.error("Missing required fields in chart request")
-                return
+                return None
             
-            logger.info(f"Processing chart request {chart_id} for patent {patent_id}, claim {claim_num}")
+            logger.info("Processing chart request", chart_id=chart_id, patent_id=patent_id, claim_num=claim_num)
             
-            # Generate claim chart
-            chart_data = await self.generate_claim_chart(
-                patent_id, claim_num, include_alignments, include_novelty
+            # Reuse a chart already rendered for the same inputs, if any
+            cache_path = chart_cache_path(
+                patent_id, claim_num, chart_type, include_alignments, include_novelty
             )
+            if not await self.storage.file_exists(cache_path):
+                # Generate claim chart; cached renderings carry no "Generated on"
+                # date, since they are handed out to later requests as well
+                chart_data = await self.generate_claim_chart(
+                    patent_id, claim_num, include_alignments, include_novelty, timestamped=False
+                )
+                
+                # Create document
+                if chart_type == 'docx':
+                    document = await self.create_docx_chart(chart_data)
+                else:
+                    document = await self.create_pdf_chart(chart_data)
+                
+                await self.upload_chart_to_storage(document, cache_path, chart_type)
             
-            # Create document
-            if chart_type == 'docx':
-                file_path = await self.create_docx_chart(chart_id, chart_data)
-            else:
-                file_path = await self.create_pdf_chart(chart_id, chart_data)
-            
-            # Upload to storage
-            s3_url = await self.upload_chart_to_storage(file_path, chart_id, chart_type)
-            
-            # Clean up local file
-            os.remove(file_path)
+            # Server-side copy to the request's own key
+            s3_url = await self.copy_chart_from_cache(cache_path, chart_id, chart_type)
             
-            # Publish completion event
-            await self.publish("chart.complete", {
+            # Completion event
+            return "chart.complete", {
                 "chart_id": chart_id,
                 "patent_id": patent_id,
                 "claim_num": claim_num,
                 "chart_type": chart_type,
                 "file_url": s3_url,
                 "status": "success"
-            })
+            }
             
         except Exception as e:
-            logger.error(f"Error processing chart request: {e}")
-            await self.publish("chart.error", {
-                "chart_id": data.get('chart_id'),
+            logger.error("Error processing chart request", error=str(e))
+            return "chart.error", {
+                "chart_id": data.get('chart_id') if isinstance(data, dict) else None,
                 "error": str(e)
-            })
+            }
     
     async def handle_export_request(self, msg):
         """Handle export bundle requests."""
+        now = datetime.now(timezone.utc)
         try:
-            data = json.loads(msg.data.decode())
+            data = orjson.loads(msg.data)
             export_id = data.get('export_id')
             patent_ids = data.get('patent_ids', [])
             export_type = data.get('export_type', 'zip')  # zip or pdf
@@ -119,19 +322,16 @@ class ChartWorker(BaseWorker):
                 logger.error("Missing required fields in export request")
                 return
             
-            logger.info(f"Processing export request {export_id} for {len(patent_ids)} patents")
+            logger.info("Processing export request", export_id=export_id, patent_count=len(patent_ids))
             
             # Generate export bundle
-            bundle_path = await self.create_export_bundle(
+            bundle = await self.create_export_bundle(
                 export_id, patent_ids, export_type, include_charts, 
-                include_alignments, include_novelty
+                include_alignments, include_novelty, now
             )
             
             # Upload to storage
-            s3_url = await self.upload_export_to_storage(bundle_path, export_id, export_type)
-            
-            # Clean up local file
-            os.remove(bundle_path)
+            s3_url = await self.upload_export_to_storage(bundle, export_id, export_type)
             
             # Publish completion event
             await self.publish("export.complete", {
@@ -143,7 +343,7 @@ class ChartWorker(BaseWorker):
             })
             
         except Exception as e:
-            logger.error(f"Error processing export request: {e}")
+            logger.error("Error processing export request", error=str(e))
             await self.publish("export.error", {
                 "export_id": data.get('export_id'),
                 "error": str(e)
@@ -154,236 +354,233 @@ class ChartWorker(BaseWorker):
         patent_id: str, 
         claim_num: int, 
         include_alignments: bool = True,
-        include_novelty: bool = True
+        include_novelty: bool = True,
+        now: Optional[datetime] = None,
+        timestamped: bool = True
     ) -> Dict[str, Any]:
-        """Generate claim chart data."""
+        """Generate claim chart data, stamped with the request time ``now`` unless ``timestamped`` is False."""
         try:
-            # Get patent and claim data
-            patent = await self.db.get_patent(patent_id)
-            claim = await self.db.get_claim(patent_id, claim_num)
+            # Fetch patent, claim, alignments and novelty data concurrently
+            patent, claim, alignments, novelty = await asyncio.gather(
+                self.cached_lookup('get_patent', patent_id),
+                self.cached_lookup('get_claim', patent_id, claim_num),
+                self.cached_lookup('get_claim_alignments', patent_id, claim_num) if include_alignments else _none(),
+                self.cached_lookup('get_novelty_score', patent_id, claim_num) if include_novelty else _none()
+            )
             
             if not patent or not claim:
                 raise ValueError(f"Patent or claim not found: {patent_id}, {claim_num}")
             
+            # Format display strings once on the (cached) patent row
+            _patent_display_fields(patent)
+            
             chart_data = {
                 'patent': patent,
                 'claim': claim,
-                'alignments': [],
-                'novelty': None,
-                'generated_at': datetime.utcnow().isoformat()
+                'alignments': alignments if include_alignments else [],
+                'novelty': novelty,
+                'generated_at': (now or datetime.now(timezone.utc)).isoformat() if timestamped else None
             }
             
-            # Get alignments if requested
-            if include_alignments:
-                alignments = await self.db.get_claim_alignments(patent_id, claim_num)
-                chart_data['alignments'] = alignments
-            
-            # Get novelty data if requested
-            if include_novelty:
-                novelty = await self.db.get_novelty_score(patent_id, claim_num)
-                chart_data['novelty'] = novelty
-            
             return chart_data
             
         except Exception as e:
-            logger.error(f"Error generating claim chart: {e}")
+            logger.error("Error generating claim chart", error=str(e))
             raise
     
-    async def create_docx_chart(self, chart_id: str, chart_data: Dict[str, Any]) -> str:
+    async def create_docx_chart(self, chart_data: Dict[str, Any]) -> bytes:
         """Create a DOCX claim chart."""
         try:
-            # Create document
-            doc = Document()
-            
-            # Add title
-            title = doc.add_heading('Claim Chart', 0)
-            title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            
-            # Add patent information
-            patent = chart_data['patent']
-            claim = chart_data['claim']
-            
-            doc.add_heading('Patent Information', level=1)
-            patent_info = doc.add_paragraph()
-            patent_info.add_run(f"Title: {patent['title']}\n")
-            patent_info.add_run(f"Publication Number: {patent['pub_number']}\n")
-            patent_info.add_run(f"Priority Date: {patent['prio_date']}\n")
-            patent_info.add_run(f"Assignee(s): {', '.join(patent['assignees'])}\n")
-            patent_info.add_run(f"Inventors: {', '.join(patent['inventors'])}\n")
-            
-            # Add claim text
-            doc.add_heading(f'Claim {claim["claim_number"]}', level=1)
-            claim_text = doc.add_paragraph(claim['text'])
-            claim_text.style = 'Quote'
-            
-            # Add novelty information if available
-            if chart_data.get('novelty'):
-                novelty = chart_data['novelty']
-                doc.add_heading('Novelty Analysis', level=1)
-                
-                novelty_info = doc.add_paragraph()
-                novelty_info.add_run(f"Novelty Score: {novelty['novelty_score']:.2f}\n")
-                novelty_info.add_run(f"Obviousness Score: {novelty['obviousness_score']:.2f}\n")
-                novelty_info.add_run(f"Confidence Band: {novelty['confidence_band']}\n")
-                
-                # Add clause-level details
-                if novelty.get('clause_details'):
-                    doc.add_heading('Clause-Level Analysis', level=2)
-                    for clause in novelty['clause_details']:
-                        clause_para = doc.add_paragraph()
-                        clause_para.add_run(f"Clause {clause['clause_index']}: {clause['clause_text']}\n")
-                        clause_para.add_run(f"Novelty Score: {clause['novelty_score']:.2f} (Confidence: {clause['confidence']})\n")
-            
-            # Add alignments if available
-            if chart_data.get('alignments'):
-                doc.add_heading('Reference Alignments', level=1)
-                
-                # Create alignment table
-                table = doc.add_table(rows=1, cols=5)
-                table.style = 'Table Grid'
-                
-                # Add headers
-                header_cells = table.rows[0].cells
-                header_cells[0].text = 'Reference Patent'
-                header_cells[1].text = 'Reference Clause'
-                header_cells[2].text = 'Similarity Score'
-                header_cells[3].text = 'Alignment Type'
-                header_cells[4].text = 'Overlap Details'
-                
-                # Add alignment data
-                for alignment in chart_data['alignments']:
-                    row_cells = table.add_row().cells
-                    row_cells[0].text = alignment.get('reference_patent_title', 'Unknown')
-                    row_cells[1].text = alignment['reference_clause_text'][:100] + '...' if len(alignment['reference_clause_text']) > 100 else alignment['reference_clause_text']
-                    row_cells[2].text = f"{alignment['similarity_score']:.3f}"
-                    row_cells[3].text = alignment['alignment_type']
-                    row_cells[4].text = str(alignment.get('overlap_details', {}))
-            
-            # Add footer
-            doc.add_paragraph()
-            footer = doc.add_paragraph(f"Generated on: {chart_data['generated_at']}")
-            footer.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            
-            # Save document
-            file_path = f"/tmp/chart_{chart_id}.docx"
-            doc.save(file_path)
-            
-            return file_path
+            return await self._render(self._build_docx_chart, chart_data)
             
         except Exception as e:
-            logger.error(f"Error creating DOCX chart: {e}")
+            logger.error("Error creating DOCX chart", error=str(e))
             raise
     
-    async def create_pdf_chart(self, chart_id: str, chart_data: Dict[str, Any]) -> str:
+    @staticmethod
+    def _build_docx_chart(chart_data: Dict[str, Any]) -> bytes:
+        """Build a DOCX claim chart in memory (blocking)."""
+        # Create document from the pre-built template (includes the title)
+        doc = Document(io.BytesIO(DOCX_TEMPLATE))
+        
+        # Add patent information
+        patent = chart_data['patent']
+        claim = chart_data['claim']
+        assignees, inventors, prio_date = _patent_display_fields(patent)
+        
+        doc.add_heading('Patent Information', level=1)
+        patent_info = doc.add_paragraph()
+        patent_info.add_run(f"Title: {patent['title']}\n")
+        patent_info.add_run(f"Publication Number: {patent['pub_number']}\n")
+        patent_info.add_run(f"Priority Date: {prio_date}\n")
+        patent_info.add_run(f"Assignee(s): {assignees}\n")
+        patent_info.add_run(f"Inventors: {inventors}\n")
+        
+        # Add claim text
+        doc.add_heading(f'Claim {claim["claim_number"]}', level=1)
+        claim_text = doc.add_paragraph(claim['text'])
+        claim_text.style = 'Quote'
+        
+        # Add novelty information if available
+        if chart_data.get('novelty'):
+            novelty = chart_data['novelty']
+            doc.add_heading('Novelty Analysis', level=1)
+            
+            novelty_info = doc.add_paragraph()
+            novelty_info.add_run(f"Novelty Score: {novelty['novelty_score']:.2f}\n")
+            novelty_info.add_run(f"Obviousness Score: {novelty['obviousness_score']:.2f}\n")
+            novelty_info.add_run(f"Confidence Band: {novelty['confidence_band']}\n")
+            
+            # Add clause-level details
+            if novelty.get('clause_details'):
+                doc.add_heading('Clause-Level Analysis', level=2)
+                for clause in novelty['clause_details']:
+                    clause_para = doc.add_paragraph()
+                    clause_para.add_run(f"Clause {clause['clause_index']}: {clause['clause_text']}\n")
+                    clause_para.add_run(f"Novelty Score: {clause['novelty_score']:.2f} (Confidence: {clause['confidence']})\n")
+        
+        # Add alignments if available
+        if chart_data.get('alignments'):
+            doc.add_heading('Reference Alignments', level=1)
+            
+            # Create alignment table
+            table = doc.add_table(rows=1, cols=5)
+            table.style = 'Table Grid'
+            
+            # Add headers
+            header_cells = table.rows[0].cells
+            header_cells[0].text = 'Reference Patent'
+            header_cells[1].text = 'Reference Clause'
+            header_cells[2].text = 'Similarity Score'
+            header_cells[3].text = 'Alignment Type'
+            header_cells[4].text = 'Overlap Details'
+            
+            # Add alignment data as raw <w:tr> elements; table.add_row() rescans
+            # the whole table per row, which is quadratic in the row count
+            tbl = table._tbl
+            cell_properties = [tc.tcPr for tc in tbl.tr_lst[0].tc_lst]
+            for alignment in chart_data['alignments']:
+                _append_docx_row(tbl, cell_properties, (
+                    alignment.get('reference_patent_title', 'Unknown'),
+                    _truncate(alignment['reference_clause_text'], 100),
+                    f"{alignment['similarity_score']:.3f}",
+                    alignment['alignment_type'],
+                    str(alignment.get('overlap_details', {}))
+                ))
+        
+        # Add footer
+        if chart_data['generated_at']:
+            doc.add_paragraph()
+            footer = doc.add_paragraph(f"Generated on: {chart_data['generated_at']}")
+            footer.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        
+        # Save document
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        
+        return buffer.getvalue()
+    
+    async def create_pdf_chart(self, chart_data: Dict[str, Any]) -> bytes:
         """Create a PDF claim chart."""
         try:
-            file_path = f"/tmp/chart_{chart_id}.pdf"
-            doc = SimpleDocTemplate(file_path, pagesize=A4)
-            
-            # Get styles
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=16,
-                spaceAfter=30,
-                alignment=1  # Center
-            )
-            
-            # Build content
-            story = []
+            return await self._render(self._build_pdf_chart, chart_data)
             
-            # Add title
-            story.append(Paragraph("Claim Chart", title_style))
-            story.append(Spacer(1, 20))
-            
-            # Add patent information
-            patent = chart_data['patent']
-            claim = chart_data['claim']
-            
-            story.append(Paragraph("Patent Information", styles['Heading2']))
-            patent_text = f"""
-            Title: {patent['title']}<br/>
-            Publication Number: {patent['pub_number']}<br/>
-            Priority Date: {patent['prio_date']}<br/>
-            Assignee(s): {', '.join(patent['assignees'])}<br/>
-            Inventors: {', '.join(patent['inventors'])}
+        except Exception as e:
+            logger.error("Error creating PDF chart", error=str(e))
+            raise
+    
+    @staticmethod
+    def _build_pdf_chart(chart_data: Dict[str, Any]) -> bytes:
+        """Build a PDF claim chart in memory (blocking)."""
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=A4)
+        
+        # Get styles
+        styles = PDF_STYLES
+        
+        # Build content
+        story = []
+        
+        # Add title
+        story.append(Paragraph("Claim Chart", PDF_TITLE_STYLE))
+        story.append(Spacer(1, 20))
+        
+        # Add patent information
+        patent = chart_data['patent']
+        claim = chart_data['claim']
+        assignees, inventors, prio_date = _patent_display_fields(patent)
+        
+        story.append(Paragraph("Patent Information", styles['Heading2']))
+        patent_text = f"""
+        Title: {patent['title']}<br/>
+        Publication Number: {patent['pub_number']}<br/>
+        Priority Date: {prio_date}<br/>
+        Assignee(s): {assignees}<br/>
+        Inventors: {inventors}
+        """
+        story.append(Paragraph(patent_text, styles['Normal']))
+        story.append(Spacer(1, 20))
+        
+        # Add claim text
+        story.append(Paragraph(f"Claim {claim['claim_number']}", styles['Heading2']))
+        story.append(Paragraph(claim['text'], styles['Normal']))
+        story.append(Spacer(1, 20))
+        
+        # Add novelty information if available
+        if chart_data.get('novelty'):
+            novelty = chart_data['novelty']
+            story.append(Paragraph("Novelty Analysis", styles['Heading2']))
+            
+            novelty_text = f"""
+            Novelty Score: {novelty['novelty_score']:.2f}<br/>
+            Obviousness Score: {novelty['obviousness_score']:.2f}<br/>
+            Confidence Band: {novelty['confidence_band']}
             """
-            story.append(Paragraph(patent_text, styles['Normal']))
+            story.append(Paragraph(novelty_text, styles['Normal']))
             story.append(Spacer(1, 20))
             
-            # Add claim text
-            story.append(Paragraph(f"Claim {claim['claim_number']}", styles['Heading2']))
-            story.append(Paragraph(claim['text'], styles['Normal']))
+            # Add clause-level details
+            if novelty.get('clause_details'):
+                story.append(Paragraph("Clause-Level Analysis", styles['Heading3']))
+                for clause in novelty['clause_details']:
+                    clause_text = f"""
+                    Clause {clause['clause_index']}: {clause['clause_text']}<br/>
+                    Novelty Score: {clause['novelty_score']:.2f} (Confidence: {clause['confidence']})
+                    """
+                    story.append(Paragraph(clause_text, styles['Normal']))
+                    story.append(Spacer(1, 10))
+        
+        # Add alignments if available
+        if chart_data.get('alignments'):
+            story.append(Paragraph("Reference Alignments", styles['Heading2']))
+            
+            # Create alignment table
+            table_data = [['Reference Patent', 'Reference Clause', 'Similarity', 'Type', 'Details']]
+            
+            for alignment in chart_data['alignments']:
+                clause_text = _truncate(alignment['reference_clause_text'], 50)
+                table_data.append([
+                    alignment.get('reference_patent_title', 'Unknown'),
+                    clause_text,
+                    f"{alignment['similarity_score']:.3f}",
+                    alignment['alignment_type'],
+                    str(alignment.get('overlap_details', {}))[:30] + '...'
+                ])
+            
+            table = Table(table_data)
+            table.setStyle(ALIGNMENT_TABLE_STYLE)
+            
+            story.append(table)
             story.append(Spacer(1, 20))
-            
-            # Add novelty information if available
-            if chart_data.get('novelty'):
-                novelty = chart_data['novelty']
-                story.append(Paragraph("Novelty Analysis", styles['Heading2']))
-                
-                novelty_text = f"""
-                Novelty Score: {novelty['novelty_score']:.2f}<br/>
-                Obviousness Score: {novelty['obviousness_score']:.2f}<br/>
-                Confidence Band: {novelty['confidence_band']}
-                """
-                story.append(Paragraph(novelty_text, styles['Normal']))
-                story.append(Spacer(1, 20))
-                
-                # Add clause-level details
-                if novelty.get('clause_details'):
-                    story.append(Paragraph("Clause-Level Analysis", styles['Heading3']))
-                    for clause in novelty['clause_details']:
-                        clause_text = f"""
-                        Clause {clause['clause_index']}: {clause['clause_text']}<br/>
-                        Novelty Score: {clause['novelty_score']:.2f} (Confidence: {clause['confidence']})
-                        """
-                        story.append(Paragraph(clause_text, styles['Normal']))
-                        story.append(Spacer(1, 10))
-            
-            # Add alignments if available
-            if chart_data.get('alignments'):
-                story.append(Paragraph("Reference Alignments", styles['Heading2']))
-                
-                # Create alignment table
-                table_data = [['Reference Patent', 'Reference Clause', 'Similarity', 'Type', 'Details']]
-                
-                for alignment in chart_data['alignments']:
-                    clause_text = alignment['reference_clause_text'][:50] + '...' if len(alignment['reference_clause_text']) > 50 else alignment['reference_clause_text']
-                    table_data.append([
-                        alignment.get('reference_patent_title', 'Unknown'),
-                        clause_text,
-                        f"{alignment['similarity_score']:.3f}",
-                        alignment['alignment_type'],
-                        str(alignment.get('overlap_details', {}))[:30] + '...'
-                    ])
-                
-                table = Table(table_data)
-                table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 10),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
-                
-                story.append(table)
-                story.append(Spacer(1, 20))
-            
-            # Add footer
+        
+        # Add footer
+        if chart_data['generated_at']:
             story.append(Paragraph(f"Generated on: {chart_data['generated_at']}", styles['Normal']))
-            
-            # Build PDF
-            doc.build(story)
-            
-            return file_path
-            
-        except Exception as e:
-            logger.error(f"Error creating PDF chart: {e}")
-            raise
+        
+        # Build PDF
+        doc.build(story)
+        
+        return buffer.getvalue()
     
     async def create_export_bundle(
         self,
@@ -392,142 +589,160 @@ class ChartWorker(BaseWorker):
         export_type: str,
         include_charts: bool,
         include_alignments: bool,
-        include_novelty: bool
-    ) -> str:
+        include_novelty: bool,
+        now: Optional[datetime] = None
+    ) -> bytes:
         """Create an export bundle with multiple patents."""
         try:
-            import zipfile
-            import tempfile
-            
-            # Create temporary directory for bundle
-            with tempfile.TemporaryDirectory() as temp_dir:
-                bundle_path = f"/tmp/export_{export_id}.zip"
+            now = now or datetime.now(timezone.utc)
+            buffer = io.BytesIO()
+            
+            # DOCX charts are already zip-compressed, so store them as-is
+            with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as zip_file:
+                # Add summary document
+                summary = await self.create_summary_document(
+                    patent_ids, include_charts, include_alignments, include_novelty, now
+                )
+                zip_file.writestr(
+                    "summary.pdf", summary, compress_type=zipfile.ZIP_DEFLATED, compresslevel=3
+                )
                 
-                with zipfile.ZipFile(bundle_path, 'w') as zip_file:
-                    # Add summary document
-                    summary_path = await self.create_summary_document(
-                        temp_dir, patent_ids, include_charts, include_alignments, include_novelty
+                # Add individual patent charts if requested
+                if include_charts:
+                    semaphore = asyncio.Semaphore(EXPORT_CHART_CONCURRENCY)
+                    
+                    async def build_patent_chart(patent_id: str) -> Optional[Tuple[str, bytes]]:
+                        async with semaphore:
+                            # Get first claim for each patent
+                            claims = await self.cached_lookup('get_patent_claims', patent_id)
+                            if not claims:
+                                return None
+                            claim_num = claims[0]['claim_number']
+                            
+                            # Generate chart data and document
+                            chart_data = await self.generate_claim_chart(
+                                patent_id, claim_num, include_alignments, include_novelty, now
+                            )
+                            chart = await self.create_docx_chart(chart_data)
+                            return f"charts/patent_{patent_id}_claim_{claim_num}.docx", chart
+                    
+                    results = await asyncio.gather(
+                        *(build_patent_chart(patent_id) for patent_id in patent_ids),
+                        return_exceptions=True
                     )
-                    zip_file.write(summary_path, "summary.pdf")
                     
-                    # Add individual patent charts if requested
-                    if include_charts:
-                        for patent_id in patent_ids:
-                            try:
-                                # Get first claim for each patent
-                                claims = await self.db.get_patent_claims(patent_id)
-                                if claims:
-                                    claim_num = claims[0]['claim_number']
-                                    
-                                    # Generate chart data
-                                    chart_data = await self.generate_claim_chart(
-                                        patent_id, claim_num, include_alignments, include_novelty
-                                    )
-                                    
-                                    # Create chart document
-                                    chart_path = await self.create_docx_chart(
-                                        f"{export_id}_{patent_id}", chart_data
-                                    )
-                                    
-                                    # Add to zip
-                                    zip_file.write(chart_path, f"charts/patent_{patent_id}_claim_{claim_num}.docx")
-                                    
-                                    # Clean up
-                                    os.remove(chart_path)
-                                    
-                            except Exception as e:
-                                logger.warning(f"Failed to create chart for patent {patent_id}: {e}")
-                                continue
-                
-                return bundle_path
+                    # ZipFile is not safe for concurrent writes; add charts in order
+                    for patent_id, result in zip(patent_ids, results):
+                        if isinstance(result, Exception):
+                            logger.warning("Failed to create chart for patent", patent_id=patent_id, error=str(result))
+                        elif result is not None:
+                            zip_file.writestr(*result)
+            
+            return buffer.getvalue()
                 
         except Exception as e:
-            logger.error(f"Error creating export bundle: {e}")
+            logger.error("Error creating export bundle", error=str(e))
             raise
     
     async def create_summary_document(
         self,
-        temp_dir: str,
         patent_ids: List[str],
         include_charts: bool,
         include_alignments: bool,
-        include_novelty: bool
-    ) -> str:
+        include_novelty: bool,
+        now: Optional[datetime] = None
+    ) -> bytes:
         """Create a summary document for the export bundle."""
         try:
-            file_path = os.path.join(temp_dir, "summary.pdf")
-            doc = SimpleDocTemplate(file_path, pagesize=A4)
-            
-            styles = getSampleStyleSheet()
-            story = []
-            
-            # Add title
-            story.append(Paragraph("Patent Analysis Summary", styles['Heading1']))
-            story.append(Spacer(1, 20))
-            
-            # Add summary information
-            story.append(Paragraph(f"Export Date: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal']))
-            story.append(Paragraph(f"Number of Patents: {len(patent_ids)}", styles['Normal']))
-            story.append(Spacer(1, 20))
+            export_date = (now or datetime.now(timezone.utc)).strftime('%Y-%m-%d %H:%M:%S')
             
-            # Add patent list
-            story.append(Paragraph("Patent List", styles['Heading2']))
-            
-            for i, patent_id in enumerate(patent_ids, 1):
-                try:
-                    patent = await self.db.get_patent(patent_id)
-                    if patent:
-                        patent_text = f"{i}. {patent['title']} ({patent['pub_number']})"
-                        story.append(Paragraph(patent_text, styles['Normal']))
-                except Exception as e:
-                    logger.warning(f"Failed to get patent {patent_id}: {e}")
-                    continue
+            results = await asyncio.gather(
+                *(self.cached_lookup('get_patent', patent_id) for patent_id in patent_ids),
+                return_exceptions=True
+            )
             
-            # Build PDF
-            doc.build(story)
+            patents = []
+            for patent_id, result in zip(patent_ids, results):
+                if isinstance(result, Exception):
+                    logger.warning("Failed to get patent", patent_id=patent_id, error=str(result))
+                    result = None
+                patents.append(result)
             
-            return file_path
+            return await self._render(self._build_summary_pdf, patents, export_date)
             
         except Exception as e:
-            logger.error(f"Error creating summary document: {e}")
+            logger.error("Error creating summary document", error=str(e))
             raise
     
-    async def upload_chart_to_storage(self, file_path: str, chart_id: str, chart_type: str) -> str:
-        """Upload chart to storage and return URL."""
+    @staticmethod
+    def _build_summary_pdf(patents: List[Optional[Dict[str, Any]]], export_date: str) -> bytes:
+        """Build the export summary PDF in memory (blocking)."""
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=A4)
+        
+        styles = PDF_STYLES
+        story = []
+        
+        # Add title
+        story.append(Paragraph("Patent Analysis Summary", styles['Heading1']))
+        story.append(Spacer(1, 20))
+        
+        # Add summary information
+        story.append(Paragraph(f"Export Date: {export_date}", styles['Normal']))
+        story.append(Paragraph(f"Number of Patents: {len(patents)}", styles['Normal']))
+        story.append(Spacer(1, 20))
+        
+        # Add patent list
+        story.append(Paragraph("Patent List", styles['Heading2']))
+        
+        for i, patent in enumerate(patents, 1):
+            if patent:
+                patent_text = f"{i}. {patent['title']} ({patent['pub_number']})"
+                story.append(Paragraph(patent_text, styles['Normal']))
+        
+        # Build PDF
+        doc.build(story)
+        
+        return buffer.getvalue()
+    
+    async def upload_chart_to_storage(self, data: bytes, s3_key: str, chart_type: str):
+        """Upload a rendered chart to storage."""
         try:
-            with open(file_path, 'rb') as f:
-                file_data = f.read()
+            await self.storage.upload_fileobj(io.BytesIO(data), s3_key, f"application/{chart_type}")
             
-            # Upload to S3/MinIO
+        except Exception as e:
+            logger.error("Error uploading chart to storage", error=str(e))
+            raise
+    
+    async def copy_chart_from_cache(self, cache_path: str, chart_id: str, chart_type: str) -> str:
+        """Copy a cached chart to the request's key and return its URL."""
+        try:
             s3_key = f"charts/{chart_id}.{chart_type}"
-            await self.storage.upload_file(s3_key, file_data, f"application/{chart_type}")
+            await self.storage.copy_file(cache_path, s3_key)
             
             # Generate signed URL
-            url = await self.storage.get_signed_url(s3_key, expires_in=3600)
+            url = self.storage.get_signed_url(s3_key, expires_in=3600)
             
             return url
             
         except Exception as e:
-            logger.error(f"Error uploading chart to storage: {e}")
+            logger.error("Error copying chart from cache", error=str(e))
             raise
     
-    async def upload_export_to_storage(self, file_path: str, export_id: str, export_type: str) -> str:
+    async def upload_export_to_storage(self, data: bytes, export_id: str, export_type: str) -> str:
         """Upload export bundle to storage and return URL."""
         try:
-            with open(file_path, 'rb') as f:
-                file_data = f.read()
-            
             # Upload to S3/MinIO
             s3_key = f"exports/{export_id}.{export_type}"
-            await self.storage.upload_file(s3_key, file_data, f"application/{export_type}")
+            await self.storage.upload_fileobj(io.BytesIO(data), s3_key, f"application/{export_type}")
             
             # Generate signed URL
-            url = await self.storage.get_signed_url(s3_key, expires_in=3600)
+            url = self.storage.get_signed_url(s3_key, expires_in=3600)
             
             return url
             
         except Exception as e:
-            logger.error(f"Error uploading export to storage: {e}")
+            logger.error("Error uploading export to storage", error=str(e))
             raise
 
 
@@ -550,4 +765,10 @@ async def main():
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
-    asyncio.run(main())
+    try:
+        import uvloop
+    except ImportError:
+        # uvloop is unavailable on Windows; fall back to the default loop
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
@@ -1,9 +1,19 @@
 import asyncio
+import hashlib
 import json
 import logging
-from typing import Dict, List, Optional, Any
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple
+import diskcache
 import numpy as np
+import onnxruntime as ort
+from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+from optimum.onnxruntime.configuration import AutoQuantizationConfig
 from sentence_transformers import SentenceTransformer
+from transformers import AutoTokenizer
 import torch
 
 from ..base import BaseWorker
@@ -13,6 +23,79 @@ from ...models.patent import PatentClaim, PatentDocument
 
 logger = logging.getLogger(__name__)
 
+EMBEDDING_MODEL_ID = 'sentence-transformers/all-MiniLM-L6-v2'
+
+# MiniLM token limit; description chunks stay below it, leaving room for special tokens
+MAX_SEQ_LENGTH = 256
+CHUNK_TOKENS = 240
+CHUNK_OVERLAP_TOKENS = 32
+
+# Quantized ONNX export of the embedding model used when no GPU is available
+ONNX_CACHE_DIR = Path(os.getenv("EMBED_ONNX_CACHE", Path.home() / ".cache" / "embed_worker" / "minilm-int8"))
+ONNX_QUANTIZED_FILE = "model_quantized.onnx"
+
+# Patents pulled per embed batch, and concurrent database operations within one
+EMBED_BATCH_SIZE = 16
+DB_CONCURRENCY = 4
+
+# On-disk embedding cache shared by worker processes on the same host
+EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR", "/var/cache/embed_worker")
+EMBED_CACHE_SIZE_LIMIT = 2 ** 30
+
+# Characters stripped before embedding: anything but word characters, whitespace and basic punctuation
+_DISALLOWED_CHARS_PATTERN = re.compile(r'[^\w\s.,;:!?\-()]')
+_DISALLOWED_ASCII_TABLE = str.maketrans({
+    char: ' ' for char in map(chr, range(128)) if _DISALLOWED_CHARS_PATTERN.match(char)
+})
+
+
+class OnnxSentenceEncoder:
+    """INT8-quantized ONNX Runtime encoder exposing the SentenceTransformer.encode interface."""
+    
+    def __init__(self, model_id: str = EMBEDDING_MODEL_ID, cache_dir: Path = ONNX_CACHE_DIR, max_seq_length: int = 256):
+        cache_dir = Path(cache_dir)
+        model_path = cache_dir / ONNX_QUANTIZED_FILE
+        
+        if not model_path.exists():
+            # Export and dynamically quantize once, then reuse the cached file
+            logger.info(f"Exporting {model_id} to INT8 ONNX under {cache_dir}")
+            onnx_model = ORTModelForFeatureExtraction.from_pretrained(model_id, export=True)
+            quantizer = ORTQuantizer.from_pretrained(onnx_model)
+            quantizer.quantize(
+                save_dir=cache_dir,
+                quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+            )
+            AutoTokenizer.from_pretrained(model_id).save_pretrained(cache_dir)
+        
+        self.tokenizer = AutoTokenizer.from_pretrained(cache_dir)
+        self.session = ort.InferenceSession(str(model_path), providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.max_seq_length = max_seq_length
+    
+    def encode(self, sentences: List[str], batch_size: int = 32, normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        """Mean-pool token embeddings for each batch of sentences."""
+        batches = []
+        
+        for start in range(0, len(sentences), batch_size):
+            features = self.tokenizer(
+                sentences[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np"
+            )
+            inputs = {name: value.astype(np.int64) for name, value in features.items() if name in self.input_names}
+            token_embeddings = self.session.run(None, inputs)[0]
+            
+            mask = features["attention_mask"][..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            
+            if normalize_embeddings:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            batches.append(pooled.astype(np.float32))
+        
+        return np.concatenate(batches) if batches else np.empty((0, 0), dtype=np.float32)
+
 
 class EmbedWorker(BaseWorker):
     """Worker for generating embeddings for patent claims, clauses, and passages."""
@@ -22,14 +105,41 @@ class EmbedWorker(BaseWorker):
         self.db = DatabaseClient()
         self.storage = StorageClient()
         
-        # Initialize sentence transformer model
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+        # Initialize sentence transformer model; CPU-only hosts use the quantized ONNX export
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        self.model.to(self.device)
+        self.use_fp16 = self.device.type == 'cuda' and os.getenv("EMBED_FP16") == "1"
+        if self.device.type == 'cuda':
+            self.model = SentenceTransformer('all-MiniLM-L6-v2')
+            self.model.to(self.device)
+            self.model.max_seq_length = MAX_SEQ_LENGTH
+            if self.use_fp16:
+                self.model.half()
+        else:
+            self.model = OnnxSentenceEncoder(max_seq_length=MAX_SEQ_LENGTH)
+        self.tokenizer = self.model.tokenizer
         
         # Embedding dimensions
         self.embedding_dim = 384  # all-MiniLM-L6-v2 dimension
         
+        # Content-addressed embedding cache, keyed by model variant and text hash,
+        # so unchanged claims are not re-encoded when a patent is republished
+        self.model_name = 'all-MiniLM-L6-v2'
+        if self.use_fp16:
+            self.model_name += '-fp16'
+        elif self.device.type == 'cpu':
+            self.model_name += '-int8'
+        self.emb_cache = diskcache.Cache(
+            EMBED_CACHE_DIR,
+            size_limit=EMBED_CACHE_SIZE_LIMIT,
+            eviction_policy='least-recently-used'
+        )
+        
+        # Encoding blocks, so it runs on a single worker thread off the event loop
+        self._encode_executor = ThreadPoolExecutor(max_workers=1)
+        
+        # Bounds concurrent database reads and writes across a batch of patents
+        self._db_semaphore = asyncio.Semaphore(DB_CONCURRENCY)
+        
         logger.info(f"EmbedWorker initialized with model on {self.device}")
     
     async def start(self):
@@ -39,8 +149,9 @@ class EmbedWorker(BaseWorker):
         await self.storage.connect()
         
         # Subscribe to embedding requests
-        await self.subscribe("patent.embed", self.handle_embed_request)
+        await self.subscribe_batch("patent.embed", self.handle_embed_batch, batch_size=EMBED_BATCH_SIZE)
         await self.subscribe("index.upsert", self.handle_index_upsert)
+        await self.subscribe("index.upsert_batch", self.handle_index_upsert_batch)
         
         logger.info("EmbedWorker started and listening for requests")
     
@@ -48,8 +159,38 @@ class EmbedWorker(BaseWorker):
         """Stop the embed worker."""
         await self.db.disconnect()
         await self.storage.disconnect()
+        self._encode_executor.shutdown(wait=False)
+        self.emb_cache.close()
         await super().stop()
     
+    async def handle_embed_batch(self, msgs):
+        """Handle a batch of patent embedding requests with a single encode call."""
+        patent_ids = []
+        for msg in msgs:
+            try:
+                patent_id = json.loads(msg.data.decode()).get('patent_id')
+            except Exception as e:
+                logger.error(f"Invalid embed request: {e}")
+                continue
+            
+            if not patent_id:
+                logger.error("Missing patent_id in embed request")
+                continue
+            patent_ids.append(patent_id)
+        
+        if not patent_ids:
+            return
+        
+        logger.info(f"Processing embedding requests for {len(patent_ids)} patents")
+        errors = await self.embed_patents(patent_ids)
+        
+        await asyncio.gather(*(
+            self.publish("embed.error", {"patent_id": patent_id, "error": str(errors[patent_id])})
+            if errors.get(patent_id) else
+            self.publish("embed.complete", {"patent_id": patent_id, "status": "success"})
+            for patent_id in patent_ids
+        ))
+    
     async def handle_embed_request(self, msg):
         """Handle patent embedding requests."""
         try:
@@ -96,154 +237,279 @@ class EmbedWorker(BaseWorker):
         except Exception as e:
             logger.error(f"Error processing index upsert: {e}")
     
+    async def handle_index_upsert_batch(self, msg):
+        """Handle coalesced index upsert requests (from normalize worker)."""
+        try:
+            patent_ids = json.loads(msg.data.decode()).get('patent_ids')
+            
+            if not patent_ids:
+                logger.error("Missing patent_ids in index upsert batch")
+                return
+            
+            logger.info(f"Processing index upsert for {len(patent_ids)} patents")
+            
+            # Generate embeddings for the whole batch with a single encode call
+            errors = await self.embed_patents(patent_ids)
+            for patent_id, error in errors.items():
+                if error:
+                    logger.error(f"Error processing index upsert for patent {patent_id}: {error}")
+            
+        except Exception as e:
+            logger.error(f"Error processing index upsert batch: {e}")
+    
     async def embed_patent(self, patent_id: str):
         """Generate embeddings for all claims, clauses, and passages of a patent."""
+        errors = await self.embed_patents([patent_id])
+        if errors.get(patent_id):
+            raise errors[patent_id]
+    
+    async def embed_patents(self, patent_ids: List[str]) -> Dict[str, Optional[Exception]]:
+        """Embed several patents, sharing one encode call across all of their texts.
+        
+        Returns the exception raised for each patent, or None where embedding succeeded.
+        """
+        errors: Dict[str, Optional[Exception]] = {patent_id: None for patent_id in patent_ids}
+        
+        # Read every patent's texts concurrently; DB access is bounded by the semaphore
+        collected = await asyncio.gather(
+            *(self.collect_patent_texts(patent_id) for patent_id in patent_ids),
+            return_exceptions=True
+        )
+        
+        texts = []
+        spans = []
+        for patent_id, result in zip(patent_ids, collected):
+            if isinstance(result, Exception):
+                logger.error(f"Error embedding patent {patent_id}: {result}")
+                errors[patent_id] = result
+            elif result is not None:
+                keys, patent_texts = result
+                spans.append((patent_id, keys, len(texts)))
+                texts.extend(patent_texts)
+        
+        if not spans:
+            return errors
+        
         try:
+            vectors = np.empty((0, self.embedding_dim), dtype=np.float32)
+            if texts:
+                # Encode off the event loop; the single-thread executor serializes model access
+                loop = asyncio.get_running_loop()
+                vectors = await loop.run_in_executor(self._encode_executor, self._encode_batch, texts)
+            
+            # Embeddings are stored as pgvector halfvec, so ship them as float16
+            vectors = vectors.astype(np.float16)
+        except Exception as e:
+            logger.error(f"Error encoding {len(spans)} patents: {e}")
+            for patent_id, _, _ in spans:
+                errors[patent_id] = e
+            return errors
+        
+        stored = await asyncio.gather(
+            *(self.store_patent_vectors(patent_id, keys, vectors[start:start + len(keys)])
+              for patent_id, keys, start in spans),
+            return_exceptions=True
+        )
+        for (patent_id, _, _), result in zip(spans, stored):
+            if isinstance(result, Exception):
+                logger.error(f"Error embedding patent {patent_id}: {result}")
+                errors[patent_id] = result
+            else:
+                logger.info(f"Successfully embedded patent {patent_id}")
+        
+        return errors
+    
+    async def collect_patent_texts(self, patent_id: str) -> Optional[Tuple[List[Tuple], List[str]]]:
+        """Fetch a patent and return copy_vectors keys with the matching texts to embed.
+        
+        Each key is (kind, item_id, index, text), the row copy_vectors writes the
+        vector to without its embedding.
+        """
+        async with self._db_semaphore:
             # Get patent data from database
             patent = await self.db.get_patent(patent_id)
             if not patent:
                 logger.error(f"Patent {patent_id} not found")
-                return
+                return None
             
             claims = await self.db.get_patent_claims(patent_id)
-            
-            # Generate embeddings for claims
-            claim_embeddings = await self.embed_claims(claims)
-            
-            # Generate embeddings for individual clauses
-            clause_embeddings = await self.embed_clauses(claims)
-            
-            # Generate embeddings for passages (abstract, description sections)
-            passage_embeddings = await self.embed_passages(patent)
-            
-            # Update database with embeddings
-            await self.db.update_patent_embeddings(
-                patent_id=patent_id,
-                claim_embeddings=claim_embeddings,
-                clause_embeddings=clause_embeddings,
-                passage_embeddings=passage_embeddings
+        
+        # Collect claim, clause and passage texts so they share one encode call
+        claim_ids, claim_texts = self.embed_claims(claims)
+        clause_keys, clause_texts = self.embed_clauses(claims)
+        passage_keys, passage_texts = self.embed_passages(patent)
+        
+        texts = claim_texts + clause_texts + passage_texts
+        keys = (
+            [('claims', claim_id, None, None) for claim_id in claim_ids] +
+            [('clauses', *clause_key) for clause_key in clause_keys] +
+            [('passages', *passage_key) for passage_key in passage_keys]
+        )
+        return keys, texts
+    
+    async def store_patent_vectors(self, patent_id: str, keys: List[Tuple], vectors: np.ndarray):
+        """Write every vector for the patent in one COPY."""
+        async with self._db_semaphore:
+            await self.db.copy_vectors(
+                (*key, vector) for key, vector in zip(keys, vectors)
             )
-            
-            # Store embeddings in vector database (pgvector)
-            await self.db.upsert_vector_embeddings(
-                patent_id=patent_id,
-                embeddings={
-                    'claims': claim_embeddings,
-                    'clauses': clause_embeddings,
-                    'passages': passage_embeddings
-                }
+    
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed texts in input order, encoding only those missing from the embedding cache."""
+        cache_keys = [
+            f"{self.model_name}:{hashlib.sha256(text.encode()).hexdigest()}" for text in texts
+        ]
+        vectors = np.empty((len(texts), self.embedding_dim), dtype=np.float32)
+        misses = []
+        
+        for i, cache_key in enumerate(cache_keys):
+            cached = self.emb_cache.get(cache_key)
+            if cached is None:
+                misses.append(i)
+            else:
+                vectors[i] = cached
+        
+        if misses:
+            encoded = self._encode_sorted([texts[i] for i in misses])
+            for i, vector in zip(misses, encoded):
+                vectors[i] = vector
+                self.emb_cache.set(cache_keys[i], vector)
+        
+        return vectors
+    
+    def _encode_sorted(self, texts: List[str]) -> np.ndarray:
+        """Encode texts in one length-sorted batch, returning vectors in input order."""
+        # Sort by length so each batch pads to similar-sized inputs,
+        # then scatter the vectors back into the original order
+        order = np.argsort([len(text) for text in texts])
+        sorted_texts = [texts[i] for i in order]
+        
+        if self.use_fp16:
+            # Keep half-precision outputs on the GPU and convert once; pgvector stores float32
+            sorted_vectors = self.model.encode(
+                sorted_texts,
+                batch_size=64,
+                convert_to_tensor=True,
+                show_progress_bar=False,
+                normalize_embeddings=True
+            ).float().cpu().numpy()
+        else:
+            sorted_vectors = self.model.encode(
+                sorted_texts,
+                batch_size=64,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+                normalize_embeddings=True
             )
-            
-            logger.info(f"Successfully embedded patent {patent_id}")
-            
-        except Exception as e:
-            logger.error(f"Error embedding patent {patent_id}: {e}")
-            raise
+        vectors = np.empty_like(sorted_vectors)
+        vectors[order] = sorted_vectors
+        return vectors
     
-    async def embed_claims(self, claims: List[Dict]) -> Dict[str, np.ndarray]:
-        """Generate embeddings for patent claims."""
-        claim_embeddings = {}
+    def embed_claims(self, claims: List[Dict]) -> Tuple[List[str], List[str]]:
+        """Collect preprocessed claim texts for embedding."""
+        if not claims:
+            return [], []
+        
+        claim_ids = []
+        claim_texts = []
         
         for claim in claims:
-            claim_id = claim['id']
-            claim_text = claim['text']
-            
-            # Clean and prepare claim text
-            cleaned_text = self.preprocess_text(claim_text)
-            
-            # Generate embedding
-            embedding = self.model.encode(cleaned_text, convert_to_numpy=True)
-            claim_embeddings[claim_id] = embedding
+            claim_ids.append(claim['id'])
+            claim_texts.append(self.preprocess_text(claim['text']))
         
-        return claim_embeddings
+        return claim_ids, claim_texts
     
-    async def embed_clauses(self, claims: List[Dict]) -> Dict[str, np.ndarray]:
-        """Generate embeddings for individual claim clauses."""
-        clause_embeddings = {}
+    def embed_clauses(self, claims: List[Dict]) -> Tuple[List[Tuple[str, int, str]], List[str]]:
+        """Collect preprocessed texts of individual claim clauses for embedding.
+        
+        Clauses are keyed by (claim ID, clause index, clause text).
+        """
+        if not claims:
+            return [], []
+        
+        clause_keys = []
+        clause_texts = []
         
         for claim in claims:
             claim_id = claim['id']
             clauses = claim.get('clauses', [])
             
             for i, clause in enumerate(clauses):
-                clause_id = f"{claim_id}_clause_{i}"
                 clause_text = clause.get('text', '')
                 
                 if clause_text.strip():
-                    # Clean and prepare clause text
-                    cleaned_text = self.preprocess_text(clause_text)
-                    
-                    # Generate embedding
-                    embedding = self.model.encode(cleaned_text, convert_to_numpy=True)
-                    clause_embeddings[clause_id] = embedding
-        
-        return clause_embeddings
+                    clause_keys.append((claim_id, i, clause_text))
+                    clause_texts.append(self.preprocess_text(clause_text))
+        
+        return clause_keys, clause_texts
     
-    async def embed_passages(self, patent: Dict) -> Dict[str, np.ndarray]:
-        """Generate embeddings for patent passages (abstract, description sections)."""
-        passage_embeddings = {}
+    def embed_passages(self, patent: Dict) -> Tuple[List[Tuple[str, int, str]], List[str]]:
+        """Collect preprocessed passage texts (abstract, description sections) for embedding.
+        
+        Passages are keyed by (patent ID, passage index, passage text); the
+        abstract is passage 0 and description chunks follow it.
+        """
+        passage_keys = []
+        passage_texts = []
         
         # Abstract
         if patent.get('abstract'):
-            abstract_text = self.preprocess_text(patent['abstract'])
-            abstract_embedding = self.model.encode(abstract_text, convert_to_numpy=True)
-            passage_embeddings['abstract'] = abstract_embedding
+            passage_keys.append((patent['id'], 0, patent['abstract']))
+            passage_texts.append(self.preprocess_text(patent['abstract']))
         
         # Description sections (if available)
         description = patent.get('description', '')
         if description:
             # Split description into chunks for better embedding
-            chunks = self.chunk_text(description, max_length=512)
+            chunks = self.chunk_text(description)
             
-            for i, chunk in enumerate(chunks):
-                chunk_id = f"description_chunk_{i}"
-                cleaned_chunk = self.preprocess_text(chunk)
-                chunk_embedding = self.model.encode(cleaned_chunk, convert_to_numpy=True)
-                passage_embeddings[chunk_id] = chunk_embedding
+            for i, chunk in enumerate(chunks, start=1):
+                passage_keys.append((patent['id'], i, chunk))
+                passage_texts.append(self.preprocess_text(chunk))
         
-        return passage_embeddings
+        return passage_keys, passage_texts
     
     def preprocess_text(self, text: str) -> str:
         """Preprocess text for embedding generation."""
         if not text:
             return ""
         
-        # Remove extra whitespace
-        text = ' '.join(text.split())
-        
         # Remove special characters that might interfere with embedding
         # Keep alphanumeric, spaces, and basic punctuation
-        import re
-        text = re.sub(r'[^\w\s\.\,\;\:\!\?\-\(\)]', ' ', text)
+        if text.isascii():
+            text = text.translate(_DISALLOWED_ASCII_TABLE)
+        else:
+            text = _DISALLOWED_CHARS_PATTERN.sub(' ', text)
         
-        # Limit length to prevent token overflow
-        max_tokens = 512
-        words = text.split()
-        if len(words) > max_tokens:
-            text = ' '.join(words[:max_tokens])
-        
-        return text.strip()
+        # Collapse whitespace; over-long inputs are truncated by the tokenizer at max_seq_length
+        return ' '.join(text.split())
     
-    def chunk_text(self, text: str, max_length: int = 512) -> List[str]:
-        """Split text into chunks for embedding."""
-        words = text.split()
-        chunks = []
+    def chunk_text(self, text: str, max_tokens: int = CHUNK_TOKENS, overlap: int = CHUNK_OVERLAP_TOKENS) -> List[str]:
+        """Split text into overlapping chunks of at most max_tokens model tokens.
         
-        current_chunk = []
-        current_length = 0
-        
-        for word in words:
-            if current_length + len(word) + 1 <= max_length:
-                current_chunk.append(word)
-                current_length += len(word) + 1
-            else:
-                if current_chunk:
-                    chunks.append(' '.join(current_chunk))
-                current_chunk = [word]
-                current_length = len(word)
+        Chunks end at the last sentence boundary inside the token window when
+        there is one, and each chunk repeats the last overlap tokens of the previous one.
+        """
+        offsets = self.tokenizer(
+            text, add_special_tokens=False, return_offsets_mapping=True
+        )['offset_mapping']
+        chunks = []
         
-        if current_chunk:
-            chunks.append(' '.join(current_chunk))
+        start = 0
+        while start < len(offsets):
+            end = min(start + max_tokens, len(offsets))
+            
+            if end < len(offsets):
+                # Prefer to cut after the last sentence-ending token in the window
+                for k in range(end - 1, start + overlap, -1):
+                    if text[offsets[k][1] - 1] in '.!?':
+                        end = k + 1
+                        break
+            
+            chunks.append(text[offsets[start][0]:offsets[end - 1][1]])
+            if end == len(offsets):
+                break
+            start = max(end - overlap, start + 1)
         
         return chunks
 
@@ -1,10 +1,15 @@
 import asyncio
+import heapq
 import json
 import logging
+import msgpack
 from typing import Dict, List, Optional, Any, Tuple
+import igraph as ig
 import networkx as nx
 import numpy as np
-from datetime import datetime, timedelta
+from scipy.sparse.csgraph import shortest_path
+from datetime import date, datetime, timedelta
+from operator import itemgetter
 
 from ..base import BaseWorker
 from ...utils.database import DatabaseClient
@@ -12,6 +17,37 @@ from ...utils.storage import StorageClient
 
 logger = logging.getLogger(__name__)
 
+# Graphs up to this size get exact clustering and shortest-path metrics
+EXACT_METRICS_MAX_NODES = 500
+
+# Nodes sampled to estimate those metrics on larger graphs
+METRICS_SAMPLE_SIZE = 200
+
+
+def parse_citation_dates(values: List[Any]) -> np.ndarray:
+    """Parse citation dates into a UTC datetime64[s] array, with NaT where a value is not a date."""
+    # A trailing 'Z' already means UTC, which is how numpy reads naive timestamps
+    values = [value[:-1] if isinstance(value, str) and value.endswith('Z') else value for value in values]
+    try:
+        return np.array(values, dtype='datetime64[s]')
+    except (ValueError, TypeError):
+        dates = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[s]')
+        for i, value in enumerate(values):
+            try:
+                dates[i] = np.datetime64(value, 's')
+            except (ValueError, TypeError):
+                continue
+        return dates
+
+
+def _msgpack_default(obj: Any) -> Any:
+    """Encode values msgpack has no native type for (citation dates, NumPy scalars)."""
+    if isinstance(obj, (date, datetime)):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
 
 class GraphWorker(BaseWorker):
     """Worker for citation graph analysis and metrics."""
@@ -72,8 +108,8 @@ class GraphWorker(BaseWorker):
                 "analysis_id": analysis_id,
                 "patent_ids": patent_ids,
                 "graph_type": graph_type,
-                "node_count": len(graph.nodes()),
-                "edge_count": len(graph.edges()),
+                "node_count": graph.number_of_nodes(),
+                "edge_count": graph.number_of_edges(),
                 "metrics": metrics,
                 "status": "success"
             })
@@ -134,35 +170,30 @@ class GraphWorker(BaseWorker):
             graph = nx.DiGraph()
             
             # Add nodes for all patents
-            for patent_id in patent_ids:
-                graph.add_node(patent_id)
+            graph.add_nodes_from(patent_ids)
             
-            # Get citation relationships
+            # Get citation relationships; both endpoints are restricted to patent_ids in SQL
             if graph_type == 'citations':
                 citations = await self.db.get_patent_citations(patent_ids)
                 
-                for citation in citations:
-                    citing_patent = citation['citing_patent_id']
-                    cited_patent = citation['cited_patent_id']
-                    
-                    if citing_patent in patent_ids and cited_patent in patent_ids:
-                        graph.add_edge(citing_patent, cited_patent, 
-                                     weight=citation.get('citation_strength', 1.0),
-                                     date=citation.get('citation_date'))
+                graph.add_edges_from(
+                    (citation['citing_patent_id'], citation['cited_patent_id'], {
+                        'weight': citation.get('citation_strength', 1.0),
+                        'date': citation.get('citation_date')
+                    })
+                    for citation in citations
+                )
             
             elif graph_type == 'family':
-                families = await self.db.get_patent_families(patent_ids)
+                family_pairs = await self.db.get_patent_family_pairs(patent_ids)
                 
-                for family in families:
-                    family_patents = family['patent_ids']
-                    for i, patent1 in enumerate(family_patents):
-                        for patent2 in family_patents[i+1:]:
-                            if patent1 in patent_ids and patent2 in patent_ids:
-                                graph.add_edge(patent1, patent2, 
-                                             weight=1.0,
-                                             relationship='family')
-            
-            logger.info(f"Built {graph_type} graph with {len(graph.nodes())} nodes and {len(graph.edges())} edges")
+                graph.add_edges_from(
+                    ((pair['patent_id'], pair['related_patent_id']) for pair in family_pairs),
+                    weight=1.0,
+                    relationship='family'
+                )
+            
+            logger.info(f"Built {graph_type} graph with {graph.number_of_nodes()} nodes and {graph.number_of_edges()} edges")
             return graph
             
         except Exception as e:
@@ -187,46 +218,126 @@ class GraphWorker(BaseWorker):
             raise
     
     async def calculate_basic_metrics(self, graph: nx.DiGraph) -> Dict[str, Any]:
-        """Calculate basic graph metrics."""
+        """Calculate basic graph metrics.
+        
+        Clustering and shortest-path length are exact up to EXACT_METRICS_MAX_NODES
+        nodes and estimated from a random sample of nodes above that. The shortest-path
+        average covers reachable pairs only, as citation graphs are rarely strongly connected.
+        """
         try:
-            return {
-                'node_count': len(graph.nodes()),
-                'edge_count': len(graph.edges()),
+            if graph.number_of_nodes() < 2:
+                # Empty and single-node graphs have fixed values; NetworkX raises on the former
+                single = graph.number_of_nodes() == 1
+                return {
+                    'node_count': graph.number_of_nodes(),
+                    'edge_count': graph.number_of_edges(),
+                    'density': 0.0,
+                    'is_connected': single,
+                    'connected_components': graph.number_of_nodes(),
+                    'average_clustering': 0.0,
+                    'average_shortest_path': 0.0 if single else None,
+                    'approximate': False
+                }
+            
+            is_connected = nx.is_weakly_connected(graph)
+            nodes = list(graph.nodes())
+            approximate = len(nodes) > EXACT_METRICS_MAX_NODES
+            
+            if approximate:
+                sample = np.random.default_rng().choice(len(nodes), size=METRICS_SAMPLE_SIZE, replace=False)
+            else:
+                sample = np.arange(len(nodes))
+            
+            average_shortest_path = None
+            if is_connected:
+                # BFS from the sampled sources over the unweighted adjacency matrix
+                adjacency = nx.to_scipy_sparse_array(graph, nodelist=nodes, weight=None, format='csr')
+                distances = shortest_path(adjacency, directed=True, unweighted=True, indices=sample)
+                reachable = distances[np.isfinite(distances) & (distances > 0)]
+                average_shortest_path = float(reachable.mean()) if reachable.size else None
+            
+            metrics = {
+                'node_count': len(nodes),
+                'edge_count': graph.number_of_edges(),
                 'density': nx.density(graph),
-                'is_connected': nx.is_weakly_connected(graph),
+                'is_connected': is_connected,
                 'connected_components': nx.number_weakly_connected_components(graph),
-                'average_clustering': nx.average_clustering(graph),
-                'average_shortest_path': nx.average_shortest_path_length(graph) if nx.is_weakly_connected(graph) else None
+                'average_clustering': nx.average_clustering(graph, nodes=[nodes[i] for i in sample]),
+                'average_shortest_path': average_shortest_path,
+                'approximate': approximate
             }
+            if approximate:
+                metrics['sample_size'] = METRICS_SAMPLE_SIZE
+            
+            return metrics
         except Exception as e:
             logger.error(f"Error calculating basic metrics: {e}")
             return {}
     
+    def to_igraph(self, graph: nx.DiGraph) -> Tuple[ig.Graph, List[str]]:
+        """Convert a citation graph to igraph, returning it with node IDs in vertex order."""
+        nodes = list(graph.nodes())
+        index = {node: i for i, node in enumerate(nodes)}
+        
+        edges = []
+        weights = []
+        for source, target, attrs in graph.edges(data=True):
+            edges.append((index[source], index[target]))
+            weights.append(attrs.get('weight', 1.0))
+        
+        g = ig.Graph(n=len(nodes), edges=edges, directed=True)
+        g.es['weight'] = weights
+        return g, nodes
+    
     async def calculate_centrality_metrics(self, graph: nx.DiGraph) -> Dict[str, Any]:
         """Calculate centrality metrics for nodes."""
         try:
-            # In-degree centrality (how many patents cite this one)
-            in_degree_centrality = nx.in_degree_centrality(graph)
-            
-            # Out-degree centrality (how many patents this one cites)
-            out_degree_centrality = nx.out_degree_centrality(graph)
-            
-            # Betweenness centrality (importance as a bridge)
-            betweenness_centrality = nx.betweenness_centrality(graph)
-            
-            # Closeness centrality (average distance to other nodes)
-            closeness_centrality = nx.closeness_centrality(graph)
-            
-            # PageRank (importance based on citations)
-            pagerank = nx.pagerank(graph)
+            n = graph.number_of_nodes()
+            
+            if graph.number_of_edges() == 0:
+                # Without citations every node is isolated; degree scores follow the
+                # NetworkX single-node convention and PageRank is uniform
+                isolated_degree = 1.0 if n == 1 else 0.0
+                in_degree_centrality = dict.fromkeys(graph, isolated_degree)
+                out_degree_centrality = dict.fromkeys(graph, isolated_degree)
+                betweenness_centrality = dict.fromkeys(graph, 0.0)
+                closeness_centrality = dict.fromkeys(graph, 0.0)
+                pagerank = dict.fromkeys(graph, 1.0 / n) if n else {}
+            else:
+                g, nodes = self.to_igraph(graph)
+                
+                if n > 1:
+                    # In-degree centrality (how many patents cite this one)
+                    in_degree_centrality = dict(zip(nodes, (d / (n - 1) for d in g.indegree())))
+                    
+                    # Out-degree centrality (how many patents this one cites)
+                    out_degree_centrality = dict(zip(nodes, (d / (n - 1) for d in g.outdegree())))
+                else:
+                    in_degree_centrality = {node: 1 for node in nodes}
+                    out_degree_centrality = {node: 1 for node in nodes}
+                
+                # Betweenness centrality (importance as a bridge)
+                betweenness_scale = 1.0 / ((n - 1) * (n - 2)) if n > 2 else 1.0
+                betweenness_centrality = dict(zip(nodes, (b * betweenness_scale for b in g.betweenness(directed=True))))
+                
+                # Closeness centrality (average incoming distance from the nodes that reach it),
+                # scaled by the reachable fraction of the graph
+                reach = g.neighborhood_size(order=n, mode='in', mindist=1)
+                closeness_centrality = {
+                    node: (c * r / (n - 1) if r else 0.0)
+                    for node, c, r in zip(nodes, g.closeness(mode='in'), reach)
+                }
+                
+                # PageRank (importance based on citations)
+                pagerank = dict(zip(nodes, g.pagerank(damping=0.85, weights='weight')))
             
             # Find top nodes for each metric
             top_nodes = {
-                'in_degree': sorted(in_degree_centrality.items(), key=lambda x: x[1], reverse=True)[:10],
-                'out_degree': sorted(out_degree_centrality.items(), key=lambda x: x[1], reverse=True)[:10],
-                'betweenness': sorted(betweenness_centrality.items(), key=lambda x: x[1], reverse=True)[:10],
-                'closeness': sorted(closeness_centrality.items(), key=lambda x: x[1], reverse=True)[:10],
-                'pagerank': sorted(pagerank.items(), key=lambda x: x[1], reverse=True)[:10]
+                'in_degree': heapq.nlargest(10, in_degree_centrality.items(), key=itemgetter(1)),
+                'out_degree': heapq.nlargest(10, out_degree_centrality.items(), key=itemgetter(1)),
+                'betweenness': heapq.nlargest(10, betweenness_centrality.items(), key=itemgetter(1)),
+                'closeness': heapq.nlargest(10, closeness_centrality.items(), key=itemgetter(1)),
+                'pagerank': heapq.nlargest(10, pagerank.items(), key=itemgetter(1))
             }
             
             return {
@@ -254,52 +365,39 @@ class GraphWorker(BaseWorker):
             if not edge_dates:
                 return {'error': 'No date information available for decay analysis'}
             
-            # Calculate time-based decay
-            current_date = datetime.utcnow()
-            decay_scores = {}
+            # Calculate time-based decay for all dated edges at once
+            edges = list(edge_dates)
+            dates = parse_citation_dates(list(edge_dates.values()))
+            valid = ~np.isnat(dates)
+            days_old = np.floor((np.datetime64('now', 's') - dates) / np.timedelta64(1, 'D'))
             
-            for edge, date_str in edge_dates.items():
-                try:
-                    edge_date = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                    days_old = (current_date - edge_date).days
-                    
-                    # Exponential decay: older citations have lower weight
-                    decay_factor = np.exp(-days_old / 365.25)  # 1 year half-life
-                    decay_scores[edge] = decay_factor
-                    
-                except (ValueError, TypeError):
-                    decay_scores[edge] = 1.0  # Default weight for invalid dates
+            # Exponential decay: older citations have lower weight (1 year half-life);
+            # invalid dates keep the default weight
+            decay_factors = np.where(valid, np.exp(-days_old / 365.25), 1.0)
+            decay_scores = dict(zip(edges, decay_factors.tolist()))
             
-            # Calculate decay-weighted centrality
-            decay_weighted_graph = graph.copy()
-            for edge in decay_weighted_graph.edges():
-                if edge in decay_scores:
-                    decay_weighted_graph[edge[0]][edge[1]]['weight'] *= decay_scores[edge]
+            # Calculate decay-weighted centrality; decay factors scale the edge weights in place
+            g, nodes = self.to_igraph(graph)
+            decay = np.array([decay_scores.get(edge, 1.0) for edge in graph.edges()])
+            g.es['weight'] = (np.array(g.es['weight']) * decay).tolist()
             
-            decay_pagerank = nx.pagerank(decay_weighted_graph)
+            decay_pagerank = dict(zip(nodes, g.pagerank(damping=0.85, weights='weight')))
             
             # Calculate citation age distribution
-            citation_ages = []
-            for date_str in edge_dates.values():
-                try:
-                    edge_date = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                    days_old = (current_date - edge_date).days
-                    citation_ages.append(days_old)
-                except (ValueError, TypeError):
-                    continue
+            citation_ages = days_old[valid]
             
             age_stats = {
-                'mean_age_days': np.mean(citation_ages) if citation_ages else 0,
-                'median_age_days': np.median(citation_ages) if citation_ages else 0,
-                'oldest_citation_days': max(citation_ages) if citation_ages else 0,
-                'newest_citation_days': min(citation_ages) if citation_ages else 0
+                'mean_age_days': float(np.mean(citation_ages)) if citation_ages.size else 0,
+                'median_age_days': float(np.median(citation_ages)) if citation_ages.size else 0,
+                'oldest_citation_days': int(citation_ages.max()) if citation_ages.size else 0,
+                'newest_citation_days': int(citation_ages.min()) if citation_ages.size else 0
             }
             
             return {
                 'decay_scores': decay_scores,
                 'decay_pagerank': decay_pagerank,
                 'age_statistics': age_stats,
-                'top_decay_nodes': sorted(decay_pagerank.items(), key=lambda x: x[1], reverse=True)[:10]
+                'top_decay_nodes': heapq.nlargest(10, decay_pagerank.items(), key=itemgetter(1))
             }
             
         except Exception as e:
@@ -312,7 +410,7 @@ class GraphWorker(BaseWorker):
         try:
             # Convert graph to serializable format
             graph_data = {
-                'nodes': list(graph.nodes()),
+                'nodes': list(graph),
                 'edges': list(graph.edges(data=True)),
                 'graph_type': graph_type,
                 'patent_ids': patent_ids,
@@ -324,12 +422,11 @@ class GraphWorker(BaseWorker):
             await self.db.store_graph_analysis(analysis_id, graph_data)
             
             # Store graph data in storage for larger graphs
-            if len(graph.nodes()) > 1000:
-                graph_json = json.dumps(graph_data)
+            if graph.number_of_nodes() > 1000:
                 await self.storage.upload_file(
-                    f"graphs/{analysis_id}.json",
-                    graph_json.encode(),
-                    "application/json"
+                    f"graphs/{analysis_id}.msgpack",
+                    msgpack.packb(graph_data, use_bin_type=True, default=_msgpack_default),
+                    "application/msgpack"
                 )
             
             logger.info(f"Stored graph analysis {analysis_id}")
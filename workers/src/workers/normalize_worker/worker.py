@@ -1,29 +1,71 @@
 """Normalize worker for standardizing patent data."""
 
 import asyncio
-import re
-from typing import Dict, List, Optional, Any
-from datetime import datetime
-import hashlib
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Any, Tuple
+from datetime import date, datetime
 
-from pydantic import BaseModel
+import msgspec
 import structlog
+from cachetools import TTLCache
 
 from ..base import BaseWorker
-from ...models.patent import PatentMetadata
 from ...utils.database import DatabaseClient
 from ...utils.normalizer import PatentNormalizer
 
 logger = structlog.get_logger(__name__)
 
+# Buffered patent updates that trigger an immediate flush
+WRITE_BATCH_SIZE = 500
 
-class NormalizeRequest(BaseModel):
+# Seconds between periodic flushes of the write buffer
+FLUSH_INTERVAL = 0.1
+
+# Normalize requests fetched per pull from the JetStream consumer
+NORMALIZE_BATCH_SIZE = 256
+
+# Batches smaller than this are normalized on the event loop, where pickling
+# round-trips to the process pool would cost more than they save
+PROCESS_POOL_MIN_BATCH = 32
+
+# Known (workspace_id, family_id) pairs kept to skip repeated existence checks
+FAMILY_CACHE_SIZE = 50_000
+FAMILY_CACHE_TTL = 300
+
+
+# Message structs never form reference cycles, so they skip GC tracking
+class PatentMetadata(msgspec.Struct, frozen=True, kw_only=True, gc=False):
+    """Patent metadata as carried on normalize requests.
+
+    Mirrors ``models.patent.PatentMetadata`` as a msgspec struct so requests
+    are validated while decoding from JSON bytes.
+    """
+    pub_number: str
+    app_number: Optional[str] = None
+    prio_date: Optional[date] = None
+    family_id: Optional[str] = None
+    workspace_id: Optional[str] = None
+    title: str
+    abstract: Optional[str] = None
+    assignees: Optional[List[str]] = None
+    inventors: Optional[List[str]] = None
+    cpc_codes: Optional[List[str]] = None
+    ipc_codes: Optional[List[str]] = None
+    lang: str = "en"
+    source: str
+    ocr_used: bool = False
+
+
+class NormalizeRequest(msgspec.Struct, frozen=True, gc=False):
     """Request model for patent normalization."""
     patent_id: str
     metadata: PatentMetadata
 
 
-class NormalizeResponse(BaseModel):
+class NormalizeResponse(msgspec.Struct, frozen=True, gc=False):
     """Response model for patent normalization."""
     patent_id: str
     status: str
@@ -31,6 +73,128 @@ class NormalizeResponse(BaseModel):
     normalized_data: Dict[str, Any]
 
 
+def _normalize_assignees(normalizer: PatentNormalizer, assignees: Optional[List[str]]) -> List[str]:
+    """Normalize assignee names."""
+    if not assignees:
+        return []
+    
+    # Skip raw duplicates before normalizing, then drop names that
+    # normalize to the same value, preserving order
+    seen = set()
+    unique_assignees = []
+    for assignee in dict.fromkeys(assignees):
+        normalized_assignee = normalizer.normalize_assignee(assignee)
+        if normalized_assignee and normalized_assignee not in seen:
+            seen.add(normalized_assignee)
+            unique_assignees.append(normalized_assignee)
+    
+    return unique_assignees
+
+
+def _normalize_inventors(normalizer: PatentNormalizer, inventors: Optional[List[str]]) -> List[str]:
+    """Normalize inventor names."""
+    if not inventors:
+        return []
+    
+    # Skip raw duplicates before normalizing, then drop names that
+    # normalize to the same value, preserving order
+    seen = set()
+    unique_inventors = []
+    for inventor in dict.fromkeys(inventors):
+        normalized_inventor = normalizer.normalize_inventor(inventor)
+        if normalized_inventor and normalized_inventor not in seen:
+            seen.add(normalized_inventor)
+            unique_inventors.append(normalized_inventor)
+    
+    return unique_inventors
+
+
+def _normalize_dates(normalizer: PatentNormalizer, metadata: PatentMetadata) -> Dict[str, Optional[datetime]]:
+    """Normalize dates."""
+    normalized_dates = {}
+    
+    # Normalize priority date
+    if metadata.prio_date:
+        normalized_dates['prio_date'] = normalizer.normalize_date(metadata.prio_date)
+    
+    # Add other dates if available
+    # This could include filing date, publication date, etc.
+    
+    return normalized_dates
+
+
+def _normalize_codes(normalizer: PatentNormalizer, metadata: PatentMetadata) -> Dict[str, List[str]]:
+    """Normalize CPC and IPC codes."""
+    normalized_codes = {}
+    
+    # Normalize CPC codes and compute their rollups in the same pass
+    if metadata.cpc_codes:
+        normalized_cpc = []
+        cpc_rollups = []
+        for code in metadata.cpc_codes:
+            normalized_code = normalizer.normalize_cpc_code(code)
+            if normalized_code:
+                normalized_cpc.append(normalized_code)
+                rollup = normalizer.get_cpc_rollup(normalized_code)
+                if rollup:
+                    cpc_rollups.append(rollup)
+        normalized_codes['cpc_codes'] = normalized_cpc
+        normalized_codes['cpc_rollups'] = cpc_rollups
+    
+    # Normalize IPC codes and compute their rollups in the same pass
+    if metadata.ipc_codes:
+        normalized_ipc = []
+        ipc_rollups = []
+        for code in metadata.ipc_codes:
+            normalized_code = normalizer.normalize_ipc_code(code)
+            if normalized_code:
+                normalized_ipc.append(normalized_code)
+                rollup = normalizer.get_ipc_rollup(normalized_code)
+                if rollup:
+                    ipc_rollups.append(rollup)
+        normalized_codes['ipc_codes'] = normalized_ipc
+        normalized_codes['ipc_rollups'] = ipc_rollups
+    
+    return normalized_codes
+
+
+def _normalize_fields(normalizer: PatentNormalizer, metadata: PatentMetadata) -> Tuple:
+    """Normalize the fields that need no database access.
+
+    Returns (assignees, inventors, dates, codes).
+    """
+    return (
+        _normalize_assignees(normalizer, metadata.assignees),
+        _normalize_inventors(normalizer, metadata.inventors),
+        _normalize_dates(normalizer, metadata),
+        _normalize_codes(normalizer, metadata)
+    )
+
+
+# Normalizer owned by each process-pool worker, with its own memo caches
+_pool_normalizer: Optional[PatentNormalizer] = None
+
+
+def _init_pool_normalizer():
+    """Create the normalizer for a process-pool worker."""
+    global _pool_normalizer
+    _pool_normalizer = PatentNormalizer()
+
+
+def _normalize_fields_batch(metadatas: List[PatentMetadata]) -> List[Any]:
+    """Normalize a chunk of patents in a pool worker.
+
+    Returns the fields tuple, or the raised exception, for each patent in order.
+    """
+    results = []
+    for metadata in metadatas:
+        try:
+            results.append(_normalize_fields(_pool_normalizer, metadata))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
 class NormalizeWorker(BaseWorker):
     """Worker for normalizing patent data."""
 
@@ -38,30 +202,39 @@ class NormalizeWorker(BaseWorker):
         super().__init__()
         self.normalizer = PatentNormalizer()
         self.db_client = DatabaseClient()
+        self._write_buffer: List[tuple] = []
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._request_decoder = msgspec.json.Decoder(NormalizeRequest)
+        self._response_encoder = msgspec.json.Encoder()
+        self._family_cache = TTLCache(maxsize=FAMILY_CACHE_SIZE, ttl=FAMILY_CACHE_TTL)
+        
+        # Process pool for regex-heavy field normalization of large batches
+        self._pool_size = os.cpu_count() or 1
+        self._normalize_pool: Optional[ProcessPoolExecutor] = None
+
+    async def process_message(self, message: NormalizeRequest, fields: Any = None) -> NormalizeResponse:
+        """Process a patent normalization request.
 
-    async def process_message(self, message: NormalizeRequest) -> NormalizeResponse:
-        """Process a patent normalization request."""
+        ``fields`` carries the result of ``_normalize_fields`` when it was already
+        computed in the process pool; otherwise it is computed here. Errors from any
+        normalization stage surface here and fail the request; the patent ID is
+        bound to the logging context for every stage.
+        """
+        structlog.contextvars.bind_contextvars(patent_id=message.patent_id)
         try:
-            logger.info("Starting patent normalization", 
-                       patent_id=message.patent_id)
+            logger.info("Starting patent normalization")
 
-            # Normalize family ID
-            normalized_family_id = await self._normalize_family_id(message.metadata)
-            
-            # Normalize assignees
-            normalized_assignees = await self._normalize_assignees(message.metadata.assignees)
-            
-            # Normalize inventors
-            normalized_inventors = await self._normalize_inventors(message.metadata.inventors)
+            if fields is None:
+                fields = _normalize_fields(self.normalizer, message.metadata)
+            elif isinstance(fields, Exception):
+                raise fields
             
-            # Normalize dates
-            normalized_dates = await self._normalize_dates(message.metadata)
-            
-            # Normalize CPC/IPC codes
-            normalized_codes = await self._normalize_codes(message.metadata)
+            normalized_assignees, normalized_inventors, normalized_dates, normalized_codes = fields
+            normalized_family_id = await self._normalize_family_id(message.metadata)
             
-            # Update database with normalized data
-            await self._update_patent_metadata(
+            # Queue the database update and index event for the next batched flush
+            await self._enqueue_write(
                 message.patent_id,
                 normalized_family_id,
                 normalized_assignees,
@@ -70,11 +243,7 @@ class NormalizeWorker(BaseWorker):
                 normalized_codes
             )
 
-            # Publish event for indexing
-            await self._publish_index_event(message.patent_id)
-
-            logger.info("Patent normalization completed", 
-                       patent_id=message.patent_id)
+            logger.info("Patent normalization completed")
 
             return NormalizeResponse(
                 patent_id=message.patent_id,
@@ -90,129 +259,81 @@ class NormalizeWorker(BaseWorker):
             )
 
         except Exception as e:
-            logger.error("Patent normalization failed", 
-                        error=str(e),
-                        patent_id=message.patent_id)
+            logger.error("Patent normalization failed", error=str(e))
             raise
+        finally:
+            structlog.contextvars.unbind_contextvars("patent_id")
 
-    async def _normalize_family_id(self, metadata: PatentMetadata) -> Optional[str]:
-        """Normalize family ID."""
-        try:
-            if not metadata.family_id:
-                return None
-            
-            # Extract and standardize family ID
-            family_id = self.normalizer.normalize_family_id(metadata.family_id)
-            
-            # Check if family exists, create if not
-            await self._ensure_family_exists(family_id, metadata)
-            
-            return family_id
-        except Exception as e:
-            logger.error("Family ID normalization failed", error=str(e))
-            return metadata.family_id
-
-    async def _normalize_assignees(self, assignees: Optional[List[str]]) -> List[str]:
-        """Normalize assignee names."""
-        try:
-            if not assignees:
-                return []
-            
-            normalized = []
-            for assignee in assignees:
-                normalized_assignee = self.normalizer.normalize_assignee(assignee)
-                if normalized_assignee:
-                    normalized.append(normalized_assignee)
-            
-            # Remove duplicates while preserving order
-            seen = set()
-            unique_assignees = []
-            for assignee in normalized:
-                if assignee not in seen:
-                    seen.add(assignee)
-                    unique_assignees.append(assignee)
-            
-            return unique_assignees
-        except Exception as e:
-            logger.error("Assignee normalization failed", error=str(e))
-            return assignees or []
+    async def handle_normalize_batch(self, msgs):
+        """Decode a batch of normalize requests straight from the message bytes and process them."""
+        requests = []
+        for msg in msgs:
+            try:
+                requests.append(self._request_decoder.decode(msg.data))
+            except msgspec.DecodeError as e:
+                logger.error("Invalid normalize request", error=str(e))
+        
+        if not requests:
+            return
+        
+        responses = await self.process_batch(requests)
+        
+        # Write the whole batch before the messages are acknowledged
+        await self._flush()
+        
+        await asyncio.gather(*(
+            self.publish("normalize.complete", self._response_encoder.encode(response))
+            for response in responses
+            if isinstance(response, NormalizeResponse)
+        ))
 
-    async def _normalize_inventors(self, inventors: Optional[List[str]]) -> List[str]:
-        """Normalize inventor names."""
-        try:
-            if not inventors:
-                return []
-            
-            normalized = []
-            for inventor in inventors:
-                normalized_inventor = self.normalizer.normalize_inventor(inventor)
-                if normalized_inventor:
-                    normalized.append(normalized_inventor)
-            
-            # Remove duplicates while preserving order
-            seen = set()
-            unique_inventors = []
-            for inventor in normalized:
-                if inventor not in seen:
-                    seen.add(inventor)
-                    unique_inventors.append(inventor)
-            
-            return unique_inventors
-        except Exception as e:
-            logger.error("Inventor normalization failed", error=str(e))
-            return inventors or []
+    async def process_batch(self, requests: List[NormalizeRequest]) -> List[Any]:
+        """Normalize a batch of patents concurrently.
 
-    async def _normalize_dates(self, metadata: PatentMetadata) -> Dict[str, Optional[datetime]]:
-        """Normalize dates."""
-        try:
-            normalized_dates = {}
-            
-            # Normalize priority date
-            if metadata.prio_date:
-                normalized_dates['prio_date'] = self.normalizer.normalize_date(metadata.prio_date)
-            
-            # Add other dates if available
-            # This could include filing date, publication date, etc.
-            
-            return normalized_dates
-        except Exception as e:
-            logger.error("Date normalization failed", error=str(e))
-            return {}
+        Large batches have their CPU-bound fields normalized in the process pool,
+        split into one chunk per pool worker. Returns a NormalizeResponse or the
+        raised exception for each request, in order.
+        """
+        if self._normalize_pool is None or len(requests) < PROCESS_POOL_MIN_BATCH:
+            fields = [None] * len(requests)
+        else:
+            loop = asyncio.get_running_loop()
+            chunk_size = -(-len(requests) // self._pool_size)
+            chunks = await asyncio.gather(*(
+                loop.run_in_executor(
+                    self._normalize_pool,
+                    _normalize_fields_batch,
+                    [request.metadata for request in requests[i:i + chunk_size]]
+                )
+                for i in range(0, len(requests), chunk_size)
+            ))
+            fields = [result for chunk in chunks for result in chunk]
+        
+        return await asyncio.gather(
+            *(self.process_message(request, request_fields) for request, request_fields in zip(requests, fields)),
+            return_exceptions=True
+        )
 
-    async def _normalize_codes(self, metadata: PatentMetadata) -> Dict[str, List[str]]:
-        """Normalize CPC and IPC codes."""
-        try:
-            normalized_codes = {}
-            
-            # Normalize CPC codes
-            if metadata.cpc_codes:
-                normalized_cpc = []
-                for code in metadata.cpc_codes:
-                    normalized_code = self.normalizer.normalize_cpc_code(code)
-                    if normalized_code:
-                        normalized_cpc.append(normalized_code)
-                normalized_codes['cpc_codes'] = normalized_cpc
-            
-            # Normalize IPC codes
-            if metadata.ipc_codes:
-                normalized_ipc = []
-                for code in metadata.ipc_codes:
-                    normalized_code = self.normalizer.normalize_ipc_code(code)
-                    if normalized_code:
-                        normalized_ipc.append(normalized_code)
-                normalized_codes['ipc_codes'] = normalized_ipc
-            
-            # Add rollup codes
-            rollup_codes = await self._get_rollup_codes(normalized_codes)
-            normalized_codes.update(rollup_codes)
-            
-            return normalized_codes
-        except Exception as e:
-            logger.error("Code normalization failed", error=str(e))
-            return {}
+    async def _normalize_family_id(self, metadata: PatentMetadata) -> Optional[str]:
+        """Normalize family ID."""
+        if not metadata.family_id:
+            return None
+        
+        # Extract and standardize family ID
+        family_id = self.normalizer.normalize_family_id(metadata.family_id)
+        
+        # Check if family exists, create if not
+        await self._ensure_family_exists(family_id, metadata)
+        
+        return family_id
 
     async def _ensure_family_exists(self, family_id: str, metadata: PatentMetadata):
         """Ensure patent family exists in database."""
+        # Sibling patents share a family, so most checks hit the cache
+        key = (metadata.workspace_id, family_id)
+        if key in self._family_cache:
+            return
+        
         try:
             # Check if family exists
             existing_family = await self.db_client.get_patent_family(family_id, metadata.workspace_id)
@@ -221,64 +342,71 @@ class NormalizeWorker(BaseWorker):
                 # Create family record
                 await self.db_client.create_patent_family(family_id, metadata)
                 logger.info("Created patent family", family_id=family_id)
+            
+            self._family_cache[key] = True
         except Exception as e:
             logger.error("Failed to ensure family exists", error=str(e))
 
-    async def _get_rollup_codes(self, normalized_codes: Dict[str, List[str]]) -> Dict[str, List[str]]:
-        """Get rollup codes for CPC/IPC codes."""
-        try:
-            rollup_codes = {}
-            
-            # Get CPC rollups
-            if 'cpc_codes' in normalized_codes:
-                cpc_rollups = []
-                for code in normalized_codes['cpc_codes']:
-                    rollup = self.normalizer.get_cpc_rollup(code)
-                    if rollup:
-                        cpc_rollups.append(rollup)
-                rollup_codes['cpc_rollups'] = cpc_rollups
+    async def _enqueue_write(self, patent_id: str, family_id: Optional[str], 
+                             assignees: List[str], inventors: List[str], 
+                             dates: Dict[str, Optional[datetime]], 
+                             codes: Dict[str, List[str]]):
+        """Buffer normalized metadata, flushing once the buffer is full."""
+        prio_date = dates.get('prio_date')
+        self._write_buffer.append((
+            patent_id,
+            family_id,
+            assignees,
+            inventors,
+            prio_date.date() if prio_date else None,
+            codes.get('cpc_codes'),
+            codes.get('ipc_codes')
+        ))
+        
+        if len(self._write_buffer) >= WRITE_BATCH_SIZE:
+            await self._flush()
+
+    async def _flush(self):
+        """Write buffered metadata in one UPDATE and publish the index events.
+
+        If the write fails, the rows go back to the front of the buffer and the
+        error is re-raised, so the caller's batch is redelivered rather than acked.
+        """
+        async with self._flush_lock:
+            if not self._write_buffer:
+                return
             
-            # Get IPC rollups
-            if 'ipc_codes' in normalized_codes:
-                ipc_rollups = []
-                for code in normalized_codes['ipc_codes']:
-                    rollup = self.normalizer.get_ipc_rollup(code)
-                    if rollup:
-                        ipc_rollups.append(rollup)
-                rollup_codes['ipc_rollups'] = ipc_rollups
+            # Keep only the latest update per patent; UPDATE ... FROM applies
+            # an arbitrary row when the same id appears twice
+            rows = list({row[0]: row for row in self._write_buffer}.values())
+            self._write_buffer = []
             
-            return rollup_codes
-        except Exception as e:
-            logger.error("Failed to get rollup codes", error=str(e))
-            return {}
-
-    async def _update_patent_metadata(self, patent_id: str, family_id: Optional[str], 
-                                    assignees: List[str], inventors: List[str], 
-                                    dates: Dict[str, Optional[datetime]], 
-                                    codes: Dict[str, List[str]]):
-        """Update patent metadata with normalized data."""
-        try:
-            await self.db_client.update_patent_metadata(
-                patent_id=patent_id,
-                family_id=family_id,
-                assignees=assignees,
-                inventors=inventors,
-                dates=dates,
-                codes=codes
-            )
+            try:
+                await self.db_client.update_patent_metadata_bulk(rows)
+            except Exception as e:
+                logger.error("Failed to flush patent metadata", count=len(rows), error=str(e))
+                # Rows buffered since keep priority, as they are newer
+                self._write_buffer[:0] = rows
+                raise
             
-            logger.info("Updated patent metadata", patent_id=patent_id)
-        except Exception as e:
-            logger.error("Failed to update patent metadata", error=str(e))
-            raise
+            await self._publish_index_events([row[0] for row in rows])
+
+    async def _flush_loop(self, interval: float):
+        """Periodically flush the write buffer so small bursts are not delayed."""
+        while self.running:
+            await asyncio.sleep(interval)
+            try:
+                await self._flush()
+            except Exception as e:
+                logger.error("Periodic flush failed", error=str(e))
 
-    async def _publish_index_event(self, patent_id: str):
-        """Publish event for indexing."""
+    async def _publish_index_events(self, patent_ids: List[str]):
+        """Publish a single indexing event covering every patent in a flush."""
         try:
-            await self.nats_client.publish(
-                "index.upsert",
+            await self.publish(
+                "index.upsert_batch",
                 {
-                    "patent_id": patent_id,
+                    "patent_ids": patent_ids,
                     "action": "normalize"
                 }
             )
@@ -288,10 +416,58 @@ class NormalizeWorker(BaseWorker):
     async def start(self):
         """Start the normalize worker."""
         await super().start()
-        await self.nats_client.subscribe("patent.normalize", self.process_message)
+        await self.db_client.connect()
+        self._normalize_pool = ProcessPoolExecutor(
+            max_workers=self._pool_size,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_pool_normalizer
+        )
+        self._flush_task = asyncio.create_task(self._flush_loop(FLUSH_INTERVAL))
+        await self.subscribe_batch("patent.normalize", self.handle_normalize_batch, batch_size=NORMALIZE_BATCH_SIZE)
         logger.info("Normalize worker started")
 
     async def stop(self):
         """Stop the normalize worker."""
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        
+        # Drain buffered writes while the NATS connection is still open
+        try:
+            await self._flush()
+        except Exception as e:
+            logger.error("Final flush failed", error=str(e))
+        await self.db_client.disconnect()
+        if self._normalize_pool is not None:
+            self._normalize_pool.shutdown(wait=False, cancel_futures=True)
+            self._normalize_pool = None
         await super().stop()
         logger.info("Normalize worker stopped")
+
+
+async def main():
+    """Main entry point for the normalize worker."""
+    worker = NormalizeWorker()
+    
+    try:
+        await worker.start()
+        
+        # Keep the worker running
+        while True:
+            await asyncio.sleep(1)
+            
+    except KeyboardInterrupt:
+        logger.info("Shutting down normalize worker...")
+    finally:
+        await worker.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        import uvloop
+    except ImportError:
+        # uvloop is unavailable on Windows; fall back to the default loop
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
@@ -1,17 +1,198 @@
 import asyncio
-import json
+import hashlib
 import logging
-from typing import Dict, List, Optional, Any, Tuple
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Any, Tuple
 import numpy as np
+import orjson
+import redis.asyncio as redis
+from cachetools import LRUCache, TTLCache
+from numba import njit
 from sentence_transformers import SentenceTransformer
 import torch
 
+try:
+    from model2vec import StaticModel
+except ImportError:
+    StaticModel = None
+
 from ..base import BaseWorker
+from ..embed_worker.worker import OnnxSentenceEncoder
 from ...utils.database import DatabaseClient
 from ...utils.storage import StorageClient
 
 logger = logging.getLogger(__name__)
 
+# Novelty requests pulled and scored together per batch
+NOVELTY_BATCH_SIZE = 32
+
+# Clause embeddings kept in process, keyed by a hash of the text
+EMBED_CACHE_SIZE = 100_000
+
+# Optional shared cache tier so restarted workers reuse earlier encodes
+EMBED_CACHE_REDIS_URL = os.getenv("NOVELTY_EMBED_CACHE_URL")
+EMBED_CACHE_REDIS_TTL = 7 * 24 * 3600
+
+# Patent-pair relationship decisions, kept briefly since normalization can change family metadata
+RELATIONSHIP_CACHE_SIZE = 65_536
+RELATIONSHIP_CACHE_TTL = 300
+
+# Distilled static embedding model used for the coarse topic-coherence signal
+COHERENCE_MODEL_ID = 'minishlab/potion-base-8M'
+
+# Calibration factors by CPC subclass (first four characters of the code)
+_CPC_FACTORS = {
+    'G06F': 1.1,  # Computing - higher novelty expected
+    'G06N': 1.2,  # AI/ML - very high novelty expected
+    'A61B': 0.9,  # Medical devices - moderate novelty
+    'A61K': 0.8,  # Pharmaceuticals - lower novelty
+    'H04L': 1.0,  # Telecommunications - standard
+    'H04W': 1.0,  # Wireless - standard
+}
+
+# The same table as sorted byte-string keys and aligned factors for vectorized lookups
+_CPC_FACTOR_KEYS = np.array(sorted(_CPC_FACTORS), dtype='S4')
+_CPC_FACTOR_VALUES = np.array([_CPC_FACTORS[key.decode()] for key in _CPC_FACTOR_KEYS])
+
+# Calibration factors by priority-date decade (older = higher novelty expected)
+_DECADE_FACTORS = {
+    1980: 1.3,  # Very old - high novelty
+    1990: 1.2,  # Old - high novelty
+    2000: 1.1,  # Recent - moderate novelty
+    2010: 1.0,  # Current - standard
+    2020: 0.9,  # Very recent - lower novelty
+}
+
+
+# Clause weight multiplier indexed by the first character of the confidence
+# level ('h'igh, 'm'edium, 'l'ow); anything else gets the medium weight
+_CONFIDENCE_MULTIPLIERS = np.full(128, 0.8)
+_CONFIDENCE_MULTIPLIERS[ord('h')] = 1.0
+_CONFIDENCE_MULTIPLIERS[ord('m')] = 0.8
+_CONFIDENCE_MULTIPLIERS[ord('l')] = 0.6
+
+
+@njit(cache=True)
+def weighted_claim_novelty(novelty_scores, clause_indices, confidence_multipliers):
+    """Confidence-weighted mean of clause novelty scores, with the preamble (clause 0) weighted double."""
+    weighted_sum = 0.0
+    total_weight = 0.0
+    
+    for i in range(novelty_scores.shape[0]):
+        weight = (2.0 if clause_indices[i] == 0 else 1.0) * confidence_multipliers[i]
+        weighted_sum += novelty_scores[i] * weight
+        total_weight += weight
+    
+    return weighted_sum / total_weight if total_weight > 0 else 1.0
+
+
+def mean_pairwise_similarity(embeddings: np.ndarray) -> float:
+    """Mean dot product over all distinct pairs of rows.
+    
+    The pairwise dot products sum to ``(|sum(v)|^2 - sum(|v|^2)) / 2``, so this
+    is O(n * d) and never builds the n x n similarity matrix.
+    """
+    count = len(embeddings)
+    total = embeddings.sum(axis=0)
+    pair_sum = (total @ total - np.einsum('ij,ij->', embeddings, embeddings)) / 2
+    return float(pair_sum / (count * (count - 1) / 2))
+
+
+def top_k_indices(values: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k largest values, largest first, in O(n).
+    
+    Ties keep their original order, matching a stable descending sort.
+    """
+    if len(values) > k:
+        # Only values at or above the k-th largest can make the cut
+        threshold = values[np.argpartition(values, -k)[-k]]
+        candidates = np.flatnonzero(values >= threshold)
+    else:
+        candidates = np.arange(len(values))
+    return candidates[np.argsort(-values[candidates], kind='stable')[:k]]
+
+
+# Numeric alignment fields; reference is an index into AlignmentColumns.reference_ids
+ALIGNMENT_DTYPE = np.dtype([
+    ('clause_index', np.int64),
+    ('similarity', np.float64),
+    ('reference', np.int64)
+])
+
+
+class AlignmentColumns(NamedTuple):
+    """Column view of a claim's alignments, built once and shared by the scoring factors."""
+    records: np.ndarray
+    reference_ids: List[Any]
+    reference_texts: List[str]
+    reference_embeddings: Optional[np.ndarray] = None
+    
+    @classmethod
+    def from_alignments(
+        cls,
+        alignments: List[Dict],
+        reference_embeddings: Optional[np.ndarray] = None
+    ) -> 'AlignmentColumns':
+        """Convert alignment rows, numbering reference patents in order of first appearance.
+        
+        ``reference_embeddings``, when already computed, holds one normalized
+        coherence embedding per alignment row.
+        """
+        reference_index: Dict[Any, int] = {}
+        records = np.fromiter(
+            (
+                (
+                    align['clause_index'],
+                    align['similarity_score'],
+                    reference_index.setdefault(align['reference_patent_id'], len(reference_index))
+                )
+                for align in alignments
+            ),
+            dtype=ALIGNMENT_DTYPE,
+            count=len(alignments)
+        )
+        return cls(
+            records,
+            list(reference_index),
+            [align['reference_clause_text'] for align in alignments],
+            reference_embeddings
+        )
+
+
+def novelty_request_key(data: Dict[str, Any]) -> Tuple[str, int]:
+    """Validated (patent ID, claim number) key of a novelty request.
+    
+    Raises ValueError if the patent ID is not a UUID or the claim number is
+    not a positive integer, so one bad request cannot fail a batched query.
+    """
+    patent_id = str(uuid.UUID(str(data['patent_id'])))
+    claim_num = data['claim_num']
+    if isinstance(claim_num, bool) or not isinstance(claim_num, (int, str)):
+        raise ValueError(f"Invalid claim number: {claim_num!r}")
+    claim_num = int(claim_num)
+    if not 0 < claim_num < 2 ** 31:
+        raise ValueError(f"Invalid claim number: {claim_num}")
+    return patent_id, claim_num
+
+
+def text_key(text: str) -> str:
+    """Cache key for a text's embedding."""
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def quantize_embeddings(embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Quantize normalized embeddings to int8 with a per-vector scale.
+    
+    ``embeddings[i] ~= quantized[i] / scales[i]``, so the cosine similarity of
+    two vectors is their integer dot product divided by ``scales[i] * scales[j]``.
+    """
+    peaks = np.abs(embeddings).max(axis=1)
+    scales = (127.0 / np.where(peaks > 0, peaks, 1.0)).astype(np.float32)
+    quantized = np.rint(embeddings * scales[:, None]).astype(np.int8)
+    return quantized, scales
+
 
 class NoveltyWorker(BaseWorker):
     """Worker for calculating novelty scores and obviousness analysis."""
@@ -21,9 +202,25 @@ class NoveltyWorker(BaseWorker):
         self.db = DatabaseClient()
         self.storage = StorageClient()
         
-        # Initialize models
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        # Initialize models; CPU-only hosts use the embed worker's quantized ONNX export
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        if self.device.type == 'cuda':
+            self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2', device=str(self.device))
+            self.embedding_model_name = 'all-MiniLM-L6-v2'
+        else:
+            self.embedding_model = OnnxSentenceEncoder()
+            self.embedding_model_name = 'all-MiniLM-L6-v2-int8'
+        self.coherence_model = self.load_coherence_model()
+        
+        # Quantized (int8, scale) embeddings by text key, backed by Redis when configured
+        self.embedding_cache = LRUCache(maxsize=EMBED_CACHE_SIZE)
+        self.embedding_redis = redis.from_url(EMBED_CACHE_REDIS_URL) if EMBED_CACHE_REDIS_URL else None
+        
+        # Relationship decisions keyed by the unordered pair of patent IDs
+        self.relationship_cache = TTLCache(maxsize=RELATIONSHIP_CACHE_SIZE, ttl=RELATIONSHIP_CACHE_TTL)
+        
+        # Single thread for model inference so encodes overlap DB I/O on the event loop
+        self._encode_executor = ThreadPoolExecutor(max_workers=1)
         
         logger.info(f"NoveltyWorker initialized with models on {self.device}")
     
@@ -33,8 +230,11 @@ class NoveltyWorker(BaseWorker):
         await self.db.connect()
         await self.storage.connect()
         
-        # Subscribe to novelty calculation requests
-        await self.subscribe("patent.novelty", self.handle_novelty_request)
+        # Initialize inference sessions, CUDA context and JIT kernels before taking requests
+        await asyncio.get_running_loop().run_in_executor(self._encode_executor, self.warm_up)
+        
+        # Consume novelty calculation requests in batches
+        await self.subscribe_batch("patent.novelty", self.handle_novelty_batch, batch_size=NOVELTY_BATCH_SIZE)
         
         logger.info("NoveltyWorker started and listening for requests")
     
@@ -42,139 +242,238 @@ class NoveltyWorker(BaseWorker):
         """Stop the novelty worker."""
         await self.db.disconnect()
         await self.storage.disconnect()
+        if self.embedding_redis is not None:
+            await self.embedding_redis.aclose()
+        self._encode_executor.shutdown(wait=False)
         await super().stop()
     
-    async def handle_novelty_request(self, msg):
-        """Handle novelty calculation requests."""
-        try:
-            data = json.loads(msg.data.decode())
+    async def handle_novelty_batch(self, msgs):
+        """Handle a batch of novelty calculation requests, scoring their claims together."""
+        requests = []
+        keys = []
+        rejected = []
+        for msg in msgs:
+            try:
+                data = orjson.loads(msg.data)
+                if not isinstance(data, dict):
+                    raise ValueError("request is not a JSON object")
+            except ValueError as e:
+                logger.error(f"Invalid novelty request: {e}")
+                continue
+            
             novelty_id = data.get('novelty_id')
             patent_id = data.get('patent_id')
             claim_num = data.get('claim_num')
             
             if not all([novelty_id, patent_id, claim_num]):
                 logger.error("Missing required fields in novelty request")
-                return
-            
-            logger.info(f"Processing novelty request {novelty_id} for patent {patent_id}, claim {claim_num}")
-            
-            # Calculate novelty scores
-            novelty_results = await self.calculate_novelty_scores(patent_id, claim_num)
+                continue
             
-            # Publish completion event
-            await self.publish("novelty.complete", {
-                "novelty_id": novelty_id,
-                "patent_id": patent_id,
-                "claim_num": claim_num,
-                "results": novelty_results,
-                "status": "success"
-            })
+            # Reject malformed keys here so they fail alone, not with the batch query
+            try:
+                keys.append(novelty_request_key(data))
+            except ValueError as e:
+                rejected.append((data, e))
+                continue
             
-        except Exception as e:
-            logger.error(f"Error processing novelty request: {e}")
+            logger.info(f"Processing novelty request {novelty_id} for patent {patent_id}, claim {claim_num}")
+            requests.append(data)
+        
+        results = []
+        if requests:
+            try:
+                results = await self.calculate_novelty_scores_batch(keys)
+            except Exception as e:
+                results = [e] * len(requests)
+        
+        await asyncio.gather(*(
+            self.publish_novelty_result(data, result)
+            for data, result in [*zip(requests, results), *rejected]
+        ), return_exceptions=True)
+    
+    async def publish_novelty_result(self, data: Dict[str, Any], result: Any):
+        """Publish the completion or error event for one novelty request."""
+        if isinstance(result, Exception):
+            logger.error(f"Error processing novelty request: {result}")
             await self.publish("novelty.error", {
                 "novelty_id": data.get('novelty_id'),
-                "error": str(e)
+                "error": str(result)
             })
+            return
+        
+        # Publish completion event
+        await self.publish("novelty.complete", {
+            "novelty_id": data['novelty_id'],
+            "patent_id": data['patent_id'],
+            "claim_num": data['claim_num'],
+            "results": result,
+            "status": "success"
+        })
     
     async def calculate_novelty_scores(self, patent_id: str, claim_num: int) -> Dict[str, Any]:
         """Calculate novelty scores for a patent claim."""
         try:
             # Get the target claim and its alignments
             target_claim = await self.db.get_claim(patent_id, claim_num)
-            if not target_claim:
-                raise ValueError(f"Claim {claim_num} not found for patent {patent_id}")
-            
-            # Get alignments for this claim
             alignments = await self.db.get_claim_alignments(patent_id, claim_num)
             
-            # Calculate clause-level novelty scores
-            clause_novelty_scores = await self.calculate_clause_novelty(
-                target_claim, alignments
-            )
-            
-            # Calculate claim-level novelty score (weighted aggregate)
-            claim_novelty_score = self.calculate_claim_novelty(clause_novelty_scores)
-            
-            # Calculate obviousness score
-            obviousness_score = await self.calculate_obviousness_score(
-                patent_id, claim_num, alignments
-            )
-            
-            # Apply calibration by CPC/decade
-            calibrated_scores = self.calibrate_scores(
-                claim_novelty_score, obviousness_score, target_claim
-            )
+            results = await self.score_claim(patent_id, claim_num, target_claim, alignments)
             
             # Store novelty scores in database
             await self.store_novelty_scores(
-                patent_id, claim_num, clause_novelty_scores, 
-                claim_novelty_score, obviousness_score, calibrated_scores
+                patent_id, claim_num, results['clause_novelty_scores'],
+                results['claim_novelty_score'], results['obviousness_score'], results['calibrated_scores']
             )
             
-            return {
-                'patent_id': patent_id,
-                'claim_num': claim_num,
-                'clause_novelty_scores': clause_novelty_scores,
-                'claim_novelty_score': claim_novelty_score,
-                'obviousness_score': obviousness_score,
-                'calibrated_scores': calibrated_scores,
-                'confidence_band': self.calculate_confidence_band(calibrated_scores)
-            }
+            return results
             
         except Exception as e:
             logger.error(f"Error calculating novelty scores: {e}")
             raise
     
+    async def calculate_novelty_scores_batch(self, keys: List[Tuple[str, int]]) -> List[Any]:
+        """Calculate novelty scores for many (patent ID, claim number) pairs.
+        
+        Claims and alignments are fetched with one query each, and every distinct
+        reference clause is encoded in one call before the claims are scored
+        concurrently; the scores are then stored in one bulk write. Returns the
+        scores or the raised exception for each key, in order.
+        """
+        claims, alignments = await asyncio.gather(
+            self.db.get_claims_bulk(keys),
+            self.db.get_claim_alignments_bulk(keys)
+        )
+        
+        # Embed every distinct reference clause in the batch once; each claim's
+        # topic coherence then works on its rows of the shared matrix
+        ref_texts = list(dict.fromkeys(
+            align['reference_clause_text']
+            for claim_alignments in alignments
+            for align in claim_alignments
+        ))
+        try:
+            ref_embeddings = await self.coherence_embeddings(ref_texts)
+            rows = {text: row for row, text in enumerate(ref_texts)}
+            claim_embeddings = [
+                ref_embeddings[[rows[align['reference_clause_text']] for align in claim_alignments]]
+                for claim_alignments in alignments
+            ]
+        except Exception as e:
+            logger.warning(f"Error encoding reference clauses for batch: {e}")
+            claim_embeddings = [None] * len(keys)
+        
+        results = await asyncio.gather(*(
+            self.score_claim(patent_id, claim_num, claim, claim_alignments, embeddings)
+            for (patent_id, claim_num), claim, claim_alignments, embeddings
+            in zip(keys, claims, alignments, claim_embeddings)
+        ), return_exceptions=True)
+        
+        scored = [result for result in results if not isinstance(result, Exception)]
+        try:
+            await self.db.create_novelty_scores_bulk([self.novelty_score_row(result) for result in scored])
+        except Exception as e:
+            logger.error(f"Error storing novelty scores: {e}")
+            results = [e if not isinstance(result, Exception) else result for result in results]
+        
+        return results
+    
+    async def score_claim(
+        self,
+        patent_id: str,
+        claim_num: int,
+        target_claim: Optional[Dict],
+        alignments: List[Dict],
+        reference_embeddings: Optional[np.ndarray] = None
+    ) -> Dict[str, Any]:
+        """Score the novelty of a fetched claim against its alignments.
+        
+        ``reference_embeddings`` optionally supplies the coherence embedding of
+        each alignment's reference clause, as computed for a whole batch.
+        """
+        if not target_claim:
+            raise ValueError(f"Claim {claim_num} not found for patent {patent_id}")
+        
+        # Read the alignment fields once for every factor below
+        columns = AlignmentColumns.from_alignments(alignments, reference_embeddings)
+        
+        # Calculate clause-level novelty scores
+        clause_novelty_scores = await self.calculate_clause_novelty(
+            target_claim, alignments, columns
+        )
+        
+        # Calculate claim-level novelty score (weighted aggregate)
+        claim_novelty_score = self.calculate_claim_novelty(clause_novelty_scores)
+        
+        # Calculate obviousness score
+        obviousness_score = await self.calculate_obviousness_score(
+            patent_id, claim_num, alignments, columns
+        )
+        
+        # Apply calibration by CPC/decade
+        calibrated_scores = self.calibrate_scores(
+            claim_novelty_score, obviousness_score, target_claim
+        )
+        
+        return {
+            'patent_id': patent_id,
+            'claim_num': claim_num,
+            'clause_novelty_scores': clause_novelty_scores,
+            'claim_novelty_score': claim_novelty_score,
+            'obviousness_score': obviousness_score,
+            'calibrated_scores': calibrated_scores,
+            'confidence_band': self.calculate_confidence_band(calibrated_scores)
+        }
+    
     async def calculate_clause_novelty(
         self, 
         target_claim: Dict, 
-        alignments: List[Dict]
+        alignments: List[Dict],
+        columns: Optional[AlignmentColumns] = None
     ) -> List[Dict[str, Any]]:
         """Calculate novelty scores for individual clauses."""
-        clause_scores = []
+        if not alignments:
+            return []
+        if columns is None:
+            columns = AlignmentColumns.from_alignments(alignments)
         
-        # Group alignments by clause index
-        alignments_by_clause = {}
-        for alignment in alignments:
-            clause_idx = alignment['clause_index']
-            if clause_idx not in alignments_by_clause:
-                alignments_by_clause[clause_idx] = []
-            alignments_by_clause[clause_idx].append(alignment)
-        
-        # Calculate novelty for each clause
-        for clause_idx, clause_alignments in alignments_by_clause.items():
-            if not clause_alignments:
-                # No alignments found - high novelty
-                clause_scores.append({
-                    'clause_index': clause_idx,
-                    'clause_text': clause_alignments[0]['clause_text'] if clause_alignments else '',
-                    'novelty_score': 1.0,
-                    'max_similarity': 0.0,
-                    'alignment_count': 0,
-                    'confidence': 'high'
-                })
-                continue
+        # Group alignments by clause index with one stable sort, keeping each
+        # clause's alignments in their original (similarity-descending) order
+        count = len(alignments)
+        similarities = columns.records['similarity']
+        clause_indices = columns.records['clause_index']
+        order = np.argsort(clause_indices, kind='stable')
+        sorted_indices = clause_indices[order]
+        sorted_similarities = similarities[order]
+        
+        starts = np.flatnonzero(np.diff(sorted_indices, prepend=sorted_indices[0] - 1))
+        counts = np.diff(np.append(starts, count))
+        max_similarities = np.maximum.reduceat(sorted_similarities, starts)
+        
+        # Calculate novelty for each clause, in order of first appearance
+        clause_scores = []
+        for group in np.argsort(order[starts], kind='stable'):
+            start, alignment_count = starts[group], int(counts[group])
+            clause_alignments = [alignments[i] for i in order[start:start + alignment_count]]
             
             # Calculate novelty as 1 - max_similarity
-            max_similarity = max(align['similarity_score'] for align in clause_alignments)
+            max_similarity = float(max_similarities[group])
             novelty_score = 1.0 - max_similarity
             
             # Calculate confidence based on alignment quality
-            confidence = self.calculate_clause_confidence(clause_alignments)
+            group_similarities = sorted_similarities[start:start + alignment_count]
+            avg_similarity = group_similarities.mean()
+            confidence = self.clause_confidence_level(avg_similarity, alignment_count)
             
             clause_scores.append({
-                'clause_index': clause_idx,
+                'clause_index': clause_alignments[0]['clause_index'],
                 'clause_text': clause_alignments[0]['clause_text'],
                 'novelty_score': novelty_score,
                 'max_similarity': max_similarity,
-                'alignment_count': len(clause_alignments),
+                'alignment_count': alignment_count,
                 'confidence': confidence,
-                'top_alignments': sorted(
-                    clause_alignments, 
-                    key=lambda x: x['similarity_score'], 
-                    reverse=True
-                )[:3]
+                'top_alignments': [
+                    clause_alignments[i] for i in top_k_indices(group_similarities, 3)
+                ]
             })
         
         return clause_scores
@@ -184,49 +483,55 @@ class NoveltyWorker(BaseWorker):
         if not clause_scores:
             return 1.0
         
-        # Weight clauses by importance (independent claims get higher weight)
-        total_weight = 0
-        weighted_sum = 0
-        
-        for clause_score in clause_scores:
-            # Simple weighting: first clause (preamble) gets higher weight
-            weight = 2.0 if clause_score['clause_index'] == 0 else 1.0
-            
-            # Adjust weight by confidence
-            confidence_multiplier = {
-                'high': 1.0,
-                'medium': 0.8,
-                'low': 0.6
-            }.get(clause_score['confidence'], 0.8)
-            
-            final_weight = weight * confidence_multiplier
-            weighted_sum += clause_score['novelty_score'] * final_weight
-            total_weight += final_weight
+        # Weight clauses by importance (first clause, the preamble, gets higher
+        # weight) and by confidence; the arithmetic runs in weighted_claim_novelty
+        count = len(clause_scores)
+        novelty_scores = np.fromiter((score['novelty_score'] for score in clause_scores), dtype=np.float64, count=count)
+        clause_indices = np.fromiter((score['clause_index'] for score in clause_scores), dtype=np.int64, count=count)
+        initials = ''.join([score['confidence'][0] for score in clause_scores]).encode('ascii', 'replace')
+        confidence_multipliers = _CONFIDENCE_MULTIPLIERS[np.frombuffer(initials, dtype=np.uint8)]
         
-        return weighted_sum / total_weight if total_weight > 0 else 1.0
+        return float(weighted_claim_novelty(novelty_scores, clause_indices, confidence_multipliers))
     
     async def calculate_obviousness_score(
         self, 
         patent_id: str, 
         claim_num: int, 
-        alignments: List[Dict]
+        alignments: List[Dict],
+        columns: Optional[AlignmentColumns] = None
     ) -> float:
         """Calculate obviousness score using multiple factors."""
         try:
-            # Get patent metadata
-            patent = await self.db.get_patent(patent_id)
+            if columns is None:
+                columns = AlignmentColumns.from_alignments(alignments)
+            
+            # Fetch patent metadata while the co-citation and topic coherence
+            # factors run; their DB queries and model inference overlap
+            patent, cocitation_score, topic_coherence = await asyncio.gather(
+                self.db.get_patent(patent_id),
+                self.calculate_cocitation_score(patent_id, alignments, columns),
+                self.calculate_topic_coherence(alignments, columns),
+                return_exceptions=True
+            )
+            if isinstance(patent, Exception):
+                logger.error(f"Error getting patent for obviousness score: {patent}")
+                patent = None
             if not patent:
                 return 0.5  # Default score
             
             # Factor 1: Multi-document penalty
-            unique_ref_patents = len(set(align['reference_patent_id'] for align in alignments))
+            unique_ref_patents = len(columns.reference_ids)
             multi_doc_penalty = min(unique_ref_patents * 0.1, 0.5)
             
             # Factor 2: Co-citation analysis
-            cocitation_score = await self.calculate_cocitation_score(patent_id, alignments)
+            if isinstance(cocitation_score, Exception):
+                logger.error(f"Error calculating co-citation score: {cocitation_score}")
+                cocitation_score = 0.0
             
             # Factor 3: Topic coherence
-            topic_coherence = await self.calculate_topic_coherence(alignments)
+            if isinstance(topic_coherence, Exception):
+                logger.error(f"Error calculating topic coherence: {topic_coherence}")
+                topic_coherence = 0.0
             
             # Factor 4: Temporal proximity
             temporal_factor = self.calculate_temporal_factor(patent, alignments)
@@ -245,49 +550,68 @@ class NoveltyWorker(BaseWorker):
             logger.error(f"Error calculating obviousness score: {e}")
             return 0.5
     
-    async def calculate_cocitation_score(self, patent_id: str, alignments: List[Dict]) -> float:
+    async def calculate_cocitation_score(
+        self,
+        patent_id: str,
+        alignments: List[Dict],
+        columns: Optional[AlignmentColumns] = None
+    ) -> float:
         """Calculate co-citation score based on reference patent relationships."""
         try:
             # Get reference patent IDs
-            ref_patent_ids = list(set(align['reference_patent_id'] for align in alignments))
+            if columns is None:
+                columns = AlignmentColumns.from_alignments(alignments)
+            ref_patent_ids = columns.reference_ids
             
             if len(ref_patent_ids) < 2:
                 return 0.0
             
-            # Check for co-citations (patents that cite each other)
-            cocitation_count = 0
-            total_pairs = 0
+            # Relationship decisions by unordered pair, shared across claims
+            # that cite the same references
+            ids = [str(ref) for ref in ref_patent_ids]
+            related = {
+                pair: self.relationship_cache.get(pair)
+                for pair in (frozenset((id1, id2)) for i, id1 in enumerate(ids) for id2 in ids[i+1:])
+            }
+            uncached = [pair for pair, decision in related.items() if decision is None]
             
-            for i, ref1 in enumerate(ref_patent_ids):
-                for ref2 in ref_patent_ids[i+1:]:
-                    total_pairs += 1
+            # Fetch the patents of uncached pairs in one query and compare them in memory
+            if uncached:
+                patents = await self.db.get_patents_bulk(list(set().union(*uncached)))
+                for pair in uncached:
+                    patent1, patent2 = (patents.get(patent_id) for patent_id in pair)
                     # Check if patents are in the same family or have similar citations
-                    if await self.check_patent_relationship(ref1, ref2):
-                        cocitation_count += 1
+                    related[pair] = self.patents_related(patent1, patent2)
+                    # Only cache decisions made from metadata that was actually found
+                    if patent1 and patent2:
+                        self.relationship_cache[pair] = related[pair]
             
-            return cocitation_count / total_pairs if total_pairs > 0 else 0.0
+            cocitation_count = sum(related.values())
+            return cocitation_count / len(related)
             
         except Exception as e:
             logger.error(f"Error calculating co-citation score: {e}")
             return 0.0
     
-    async def calculate_topic_coherence(self, alignments: List[Dict]) -> float:
+    async def calculate_topic_coherence(
+        self,
+        alignments: List[Dict],
+        columns: Optional[AlignmentColumns] = None
+    ) -> float:
         """Calculate topic coherence among aligned references."""
         try:
             if len(alignments) < 2:
                 return 0.0
             
-            # Extract reference clause texts
-            ref_texts = [align['reference_clause_text'] for align in alignments]
+            # Reuse the batch's embeddings when present, otherwise encode the reference clause texts
+            if columns is None:
+                columns = AlignmentColumns.from_alignments(alignments)
+            embeddings = columns.reference_embeddings
+            if embeddings is None:
+                embeddings = await self.coherence_embeddings(columns.reference_texts)
             
-            # Calculate pairwise similarities
-            similarities = []
-            for i, text1 in enumerate(ref_texts):
-                for text2 in ref_texts[i+1:]:
-                    similarity = await self.calculate_embedding_similarity(text1, text2)
-                    similarities.append(similarity)
-            
-            return np.mean(similarities) if similarities else 0.0
+            # Average the cosine similarity over all pairs
+            return mean_pairwise_similarity(embeddings)
             
         except Exception as e:
             logger.error(f"Error calculating topic coherence: {e}")
@@ -325,53 +649,177 @@ class NoveltyWorker(BaseWorker):
             logger.error(f"Error calculating temporal factor: {e}")
             return 0.5
     
+    async def coherence_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Return a normalized float64 coherence embedding per text, encoding each distinct text once."""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float64)
+        
+        rows: Dict[str, int] = {}
+        inverse = [rows.setdefault(text, len(rows)) for text in texts]
+        unique_texts = list(rows)
+        
+        if self.coherence_model is not None:
+            # Static embeddings are cheap enough to compute inline on every call
+            embeddings = self.coherence_model.encode(unique_texts).astype(np.float64)
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        else:
+            quantized, scales = await self.encode_texts(unique_texts)
+            embeddings = quantized / scales[:, None].astype(np.float64)
+        
+        return embeddings[inverse]
+    
+    def load_coherence_model(self):
+        """Load the static topic-coherence model, or return None to fall back to MiniLM embeddings."""
+        if StaticModel is None:
+            logger.info("model2vec is not installed; topic coherence uses MiniLM embeddings")
+            return None
+        
+        try:
+            return StaticModel.from_pretrained(COHERENCE_MODEL_ID)
+        except Exception as e:
+            logger.warning(f"Failed to load coherence model {COHERENCE_MODEL_ID}, using MiniLM embeddings: {e}")
+            return None
+    
+    async def encode_texts(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Return int8-quantized normalized embeddings and their scales for texts.
+        
+        Lookups go to the in-process LRU first, then Redis when configured; the
+        remaining texts are encoded together in one batched call. See
+        quantize_embeddings for how to recover similarities.
+        """
+        keys = [text_key(text) for text in texts]
+        vectors: Dict[str, Tuple[np.ndarray, np.float32]] = {}
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key in vectors or key in missing:
+                continue
+            cached = self.embedding_cache.get(key)
+            if cached is not None:
+                vectors[key] = cached
+            else:
+                missing[key] = text
+        
+        if missing and self.embedding_redis is not None:
+            try:
+                stored = await self.embedding_redis.mget([f"novelty:emb8:{self.embedding_model_name}:{key}" for key in missing])
+                for key, value in zip(list(missing), stored):
+                    if value is not None:
+                        # Stored as a float32 scale followed by the int8 vector
+                        scale = np.frombuffer(value, dtype=np.float32, count=1)[0]
+                        vector = np.frombuffer(value, dtype=np.int8, offset=4)
+                        vectors[key] = self.embedding_cache[key] = (vector, scale)
+                        del missing[key]
+            except Exception as e:
+                logger.warning(f"Embedding cache lookup failed: {e}")
+        
+        if missing:
+            quantized, scales = await asyncio.get_running_loop().run_in_executor(
+                self._encode_executor, self.encode_quantized, list(missing.values())
+            )
+            for key, vector, scale in zip(missing, quantized, scales):
+                vectors[key] = self.embedding_cache[key] = (vector, scale)
+            
+            if self.embedding_redis is not None:
+                try:
+                    async with self.embedding_redis.pipeline(transaction=False) as pipe:
+                        for key in missing:
+                            vector, scale = vectors[key]
+                            pipe.set(
+                                f"novelty:emb8:{self.embedding_model_name}:{key}",
+                                scale.tobytes() + vector.tobytes(),
+                                ex=EMBED_CACHE_REDIS_TTL
+                            )
+                        await pipe.execute()
+                except Exception as e:
+                    logger.warning(f"Embedding cache store failed: {e}")
+        
+        if not keys:
+            return np.empty((0, 0), dtype=np.int8), np.empty(0, dtype=np.float32)
+        return (
+            np.stack([vectors[key][0] for key in keys]),
+            np.array([vectors[key][1] for key in keys], dtype=np.float32)
+        )
+    
+    def encode_quantized(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Encode texts with MiniLM and quantize the normalized embeddings to int8.
+        
+        On CUDA the embeddings stay on the device until they are quantized, so
+        only the int8 vectors and their scales are copied back to the host.
+        """
+        # Sort by length so each batch pads to similar-sized inputs,
+        # then scatter the vectors back into the original order
+        order = np.argsort([len(text) for text in texts])
+        sorted_texts = [texts[i] for i in order]
+        
+        if self.device.type != 'cuda':
+            embeddings = self.embedding_model.encode(
+                sorted_texts,
+                batch_size=64,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            )
+            sorted_quantized, sorted_scales = quantize_embeddings(embeddings)
+        else:
+            with torch.inference_mode():
+                embeddings = self.embedding_model.encode(
+                    sorted_texts,
+                    batch_size=64,
+                    convert_to_tensor=True,
+                    normalize_embeddings=True,
+                    show_progress_bar=False
+                ).float()
+                peaks = embeddings.abs().amax(dim=1)
+                scales = 127.0 / torch.where(peaks > 0, peaks, torch.ones_like(peaks))
+                quantized = torch.round(embeddings * scales[:, None]).to(torch.int8)
+            sorted_quantized, sorted_scales = quantized.cpu().numpy(), scales.cpu().numpy()
+        
+        quantized = np.empty_like(sorted_quantized)
+        quantized[order] = sorted_quantized
+        scales = np.empty_like(sorted_scales)
+        scales[order] = sorted_scales
+        return quantized, scales
+    
+    def warm_up(self):
+        """Run each model and compiled kernel once so the first requests skip their initialization."""
+        self.encode_quantized(["warm up"] * 8)
+        if self.coherence_model is not None:
+            self.coherence_model.encode(["warm up"])
+        weighted_claim_novelty(np.ones(1), np.zeros(1, dtype=np.int64), np.ones(1))
+    
     async def calculate_embedding_similarity(self, text1: str, text2: str) -> float:
         """Calculate embedding similarity between two texts."""
         try:
-            embedding1 = self.embedding_model.encode(text1, convert_to_numpy=True)
-            embedding2 = self.embedding_model.encode(text2, convert_to_numpy=True)
+            (embedding1, embedding2), (scale1, scale2) = await self.encode_texts([text1, text2])
             
-            similarity = np.dot(embedding1, embedding2) / (
-                np.linalg.norm(embedding1) * np.linalg.norm(embedding2)
-            )
-            
-            return float(similarity)
+            dot = int(np.dot(embedding1.astype(np.int32), embedding2.astype(np.int32)))
+            return float(dot / (scale1 * scale2))
         except Exception as e:
             logger.warning(f"Error calculating embedding similarity: {e}")
             return 0.0
     
-    async def check_patent_relationship(self, patent1_id: str, patent2_id: str) -> bool:
-        """Check if two patents have a relationship (same family, similar citations, etc.)."""
-        try:
-            # Get patent metadata
-            patent1 = await self.db.get_patent(patent1_id)
-            patent2 = await self.db.get_patent(patent2_id)
-            
-            if not patent1 or not patent2:
-                return False
-            
-            # Check if same family
-            if patent1.get('family_id') and patent2.get('family_id'):
-                if patent1['family_id'] == patent2['family_id']:
-                    return True
-            
-            # Check if same assignee
-            if patent1.get('assignees') and patent2.get('assignees'):
-                common_assignees = set(patent1['assignees']) & set(patent2['assignees'])
-                if common_assignees:
-                    return True
-            
-            # Check CPC overlap
-            if patent1.get('cpc_codes') and patent2.get('cpc_codes'):
-                common_cpcs = set(patent1['cpc_codes']) & set(patent2['cpc_codes'])
-                if len(common_cpcs) >= 2:  # At least 2 common CPC codes
-                    return True
-            
-            return False
-            
-        except Exception as e:
-            logger.error(f"Error checking patent relationship: {e}")
+    def patents_related(self, patent1: Optional[Dict], patent2: Optional[Dict]) -> bool:
+        """Check if two patents share a family, an assignee, or at least two CPC codes."""
+        if not patent1 or not patent2:
             return False
+        
+        # Check if same family
+        if patent1.get('family_id') and patent2.get('family_id'):
+            if patent1['family_id'] == patent2['family_id']:
+                return True
+        
+        # Check if same assignee
+        if patent1.get('assignees') and patent2.get('assignees'):
+            if not set(patent1['assignees']).isdisjoint(patent2['assignees']):
+                return True
+        
+        # Check CPC overlap
+        if patent1.get('cpc_codes') and patent2.get('cpc_codes'):
+            common_cpcs = set(patent1['cpc_codes']) & set(patent2['cpc_codes'])
+            if len(common_cpcs) >= 2:  # At least 2 common CPC codes
+                return True
+        
+        return False
     
     def calculate_clause_confidence(self, alignments: List[Dict]) -> str:
         """Calculate confidence level for a clause based on alignment quality."""
@@ -381,9 +829,10 @@ class NoveltyWorker(BaseWorker):
         # Calculate average similarity score
         avg_similarity = np.mean([align['similarity_score'] for align in alignments])
         
-        # Calculate alignment count
-        alignment_count = len(alignments)
-        
+        return self.clause_confidence_level(avg_similarity, len(alignments))
+    
+    def clause_confidence_level(self, avg_similarity: float, alignment_count: int) -> str:
+        """Map a clause's average alignment similarity and alignment count to a confidence level."""
         # Determine confidence based on scores and count
         if avg_similarity > 0.7 and alignment_count >= 3:
             return 'high'
@@ -438,25 +887,16 @@ class NoveltyWorker(BaseWorker):
         if not cpc_codes:
             return 1.0
         
-        # Define calibration factors for different technology areas
-        cpc_factors = {
-            'G06F': 1.1,  # Computing - higher novelty expected
-            'G06N': 1.2,  # AI/ML - very high novelty expected
-            'A61B': 0.9,  # Medical devices - moderate novelty
-            'A61K': 0.8,  # Pharmaceuticals - lower novelty
-            'H04L': 1.0,  # Telecommunications - standard
-            'H04W': 1.0,  # Wireless - standard
-        }
-        
-        # Find matching CPC codes
-        matching_factors = []
-        for cpc in cpc_codes:
-            for pattern, factor in cpc_factors.items():
-                if cpc.startswith(pattern):
-                    matching_factors.append(factor)
-                    break
+        # Truncate every code to its four-character subclass and binary-search the sorted keys
+        try:
+            subclasses = np.array(cpc_codes, dtype='S4')
+        except UnicodeEncodeError:
+            subclasses = np.array([cpc.encode()[:4] for cpc in cpc_codes], dtype='S4')
+        positions = np.searchsorted(_CPC_FACTOR_KEYS, subclasses)
+        positions[positions == len(_CPC_FACTOR_KEYS)] = 0
+        matching_factors = _CPC_FACTOR_VALUES[positions[_CPC_FACTOR_KEYS[positions] == subclasses]]
         
-        return np.mean(matching_factors) if matching_factors else 1.0
+        return float(matching_factors.mean()) if matching_factors.size else 1.0
     
     def get_decade_calibration_factor(self, prio_date) -> float:
         """Get calibration factor based on patent decade."""
@@ -464,19 +904,9 @@ class NoveltyWorker(BaseWorker):
             return 1.0
         
         try:
-            year = prio_date.year
-            decade = (year // 10) * 10
-            
-            # Define factors by decade (older = higher novelty expected)
-            decade_factors = {
-                1980: 1.3,  # Very old - high novelty
-                1990: 1.2,  # Old - high novelty
-                2000: 1.1,  # Recent - moderate novelty
-                2010: 1.0,  # Current - standard
-                2020: 0.9,  # Very recent - lower novelty
-            }
+            decade = (prio_date.year // 10) * 10
             
-            return decade_factors.get(decade, 1.0)
+            return _DECADE_FACTORS.get(decade, 1.0)
             
         except Exception as e:
             logger.error(f"Error calculating decade factor: {e}")
@@ -498,6 +928,22 @@ class NoveltyWorker(BaseWorker):
         """Calculate overall confidence band."""
         return calibrated_scores.get('confidence_band', 'medium')
     
+    def novelty_score_row(self, results: Dict[str, Any]) -> Tuple:
+        """Build a create_novelty_scores_bulk row from a claim's novelty results."""
+        calibrated_scores = results['calibrated_scores']
+        return (
+            results['patent_id'],
+            results['claim_num'],
+            calibrated_scores['novelty_score'],
+            calibrated_scores['obviousness_score'],
+            calibrated_scores['confidence_band'],
+            {
+                'cpc_factor': calibrated_scores['cpc_factor'],
+                'decade_factor': calibrated_scores['decade_factor']
+            },
+            results['clause_novelty_scores']
+        )
+    
     async def store_novelty_scores(
         self,
         patent_id: str,
@@ -21,6 +21,9 @@ from ...utils.database import DatabaseClient
 
 logger = structlog.get_logger(__name__)
 
+# Characters of patent text encoded and hashed at a time
+HASH_CHUNK_CHARS = 64 * 1024
+
 
 class IngestRequest(BaseModel):
     """Request model for patent ingestion."""
@@ -161,7 +164,7 @@ class PatentIngestWorker(BaseWorker):
     async def _store_patent(self, patent_doc: PatentDocument, workspace_id: str) -> str:
         """Store patent document in database."""
         try:
-            # Create patent record
+            # Create patent record; its claims are copied in the same transaction
             patent_id = await self.db_client.create_patent(
                 workspace_id=workspace_id,
                 metadata=patent_doc.metadata,
@@ -169,15 +172,6 @@ class PatentIngestWorker(BaseWorker):
                 claims=patent_doc.claims
             )
 
-            # Store claims
-            for claim in patent_doc.claims:
-                await self.db_client.create_claim(
-                    patent_id=patent_id,
-                    claim_number=claim.number,
-                    text=claim.text,
-                    is_independent=claim.is_independent
-                )
-
             return patent_id
         except Exception as e:
             logger.error("Failed to store patent", error=str(e))
@@ -239,9 +233,16 @@ class PatentIngestWorker(BaseWorker):
             raise
 
     def _calculate_content_hash(self, patent_doc: PatentDocument) -> str:
-        """Calculate content hash for duplicate detection."""
-        content = f"{patent_doc.metadata.pub_number}{patent_doc.text}"
-        return hashlib.sha256(content.encode()).hexdigest()
+        """Calculate content hash for duplicate detection.
+
+        Equal to the SHA-256 of ``pub_number + text`` encoded as UTF-8, but the
+        text is encoded and fed in chunks so no full-size copy is built.
+        """
+        digest = hashlib.sha256(patent_doc.metadata.pub_number.encode(), usedforsecurity=False)
+        text = patent_doc.text
+        for start in range(0, len(text), HASH_CHUNK_CHARS):
+            digest.update(text[start:start + HASH_CHUNK_CHARS].encode())
+        return digest.hexdigest()
 
     async def start(self):
         """Start the patent ingest worker."""
@@ -2,14 +2,59 @@ import asyncio
 import json
 import logging
 import re
-from typing import Dict, List, Optional, Any, Set
+import string
+from functools import lru_cache
+from typing import Dict, List, Optional, Any, Set, Tuple
 from collections import defaultdict
 
+import ahocorasick
+
 from ..base import BaseWorker
 from ...utils.database import DatabaseClient
 
 logger = logging.getLogger(__name__)
 
+# Characters replaced in queries: anything but word characters, whitespace and basic punctuation
+_DISALLOWED_CHARS_PATTERN = re.compile(r'[^\w\s\-\.\,\;\:\!\?\(\)]')
+_DISALLOWED_ASCII_TABLE = str.maketrans({
+    char: ' ' for char in map(chr, range(128)) if _DISALLOWED_CHARS_PATTERN.match(char)
+})
+
+# CPC subclass codes (e.g. A61B, G06F) mentioned in a query
+_CPC_CODE_PATTERN = re.compile(r'\b[A-H]\d{2}[A-Z]\b')
+
+# Common words never treated as technical terms
+_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
+    'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
+    'should', 'may', 'might', 'can', 'this', 'that', 'these', 'those'
+})
+
+# Multi-word terms kept as technical terms in their own right
+_TECHNICAL_COMPOUNDS = frozenset({
+    'machine learning', 'artificial intelligence', 'deep learning',
+    'neural network', 'data processing', 'signal processing',
+    'image processing', 'voice recognition', 'face recognition',
+    'wireless communication', 'mobile device', 'cloud computing',
+    'block chain', 'internet of things', 'virtual reality',
+    'augmented reality', 'autonomous vehicle', 'electric vehicle'
+})
+
+# First words of the technical compounds; other words never start one
+_COMPOUND_HEADS = frozenset(compound.split(' ', 1)[0] for compound in _TECHNICAL_COMPOUNDS)
+
+
+@lru_cache(maxsize=4096)
+def _expand_cpc_code(cpc: str) -> Tuple[str, ...]:
+    """The code itself, its parent, and its siblings (same parent, different last letter)."""
+    if len(cpc) == 4:
+        parent = cpc[:-1]
+        return (cpc, parent, *(parent + char for char in string.ascii_uppercase if char != cpc[-1]))
+    if len(cpc) > 3:
+        return (cpc, cpc[:-1])
+    return (cpc,)
+
 
 class QueryPlannerWorker(BaseWorker):
     """Worker for query planning with synonyms and CPC expansions."""
@@ -20,6 +65,7 @@ class QueryPlannerWorker(BaseWorker):
         
         # Synonym dictionary for patent terminology
         self.synonyms = self._load_synonyms()
+        self._synonym_automaton, self._synonym_key_substrings = self._index_synonyms()
         
         # CPC classification mappings
         self.cpc_mappings = self._load_cpc_mappings()
@@ -105,7 +151,9 @@ class QueryPlannerWorker(BaseWorker):
                 "cpc_codes": cpc_codes,
                 "expanded_cpcs": expanded_cpcs,
                 "alternative_queries": alternative_queries,
-                "search_strategy": self.determine_search_strategy(cleaned_query, search_type)
+                "search_strategy": self.determine_search_strategy(
+                    cleaned_query, search_type, technical_terms, cpc_codes
+                )
             }
             
             return planned_query
@@ -122,63 +170,60 @@ class QueryPlannerWorker(BaseWorker):
         # Convert to lowercase
         query = query.lower()
         
-        # Remove extra whitespace
-        query = ' '.join(query.split())
-        
         # Remove special characters but keep important ones
-        query = re.sub(r'[^\w\s\-\.\,\;\:\!\?\(\)]', ' ', query)
+        if query.isascii():
+            query = query.translate(_DISALLOWED_ASCII_TABLE)
+        else:
+            query = _DISALLOWED_CHARS_PATTERN.sub(' ', query)
         
         # Normalize whitespace
-        query = ' '.join(query.split())
-        
-        return query.strip()
+        return ' '.join(query.split())
     
     def extract_technical_terms(self, query: str) -> List[str]:
         """Extract technical terms from the query."""
-        terms = []
+        terms = set()
         
         # Split into words
         words = query.split()
+        last = len(words) - 1
         
-        # Identify technical terms (longer words, compound terms)
+        # Identify technical terms (longer words, compound terms) in one pass
         for i, word in enumerate(words):
             # Skip common words
-            if word in self._get_stop_words():
+            if word in _STOP_WORDS:
                 continue
             
             # Add single technical terms
             if len(word) > 4:
-                terms.append(word)
+                terms.add(word)
             
-            # Add compound terms
-            if i < len(words) - 1:
+            # Add compound terms, building the pair only after a possible first word
+            if i < last and word.lower() in _COMPOUND_HEADS:
                 compound = f"{word} {words[i + 1]}"
-                if self._is_technical_compound(compound):
-                    terms.append(compound)
+                if compound.lower() in _TECHNICAL_COMPOUNDS:
+                    terms.add(compound)
         
-        return list(set(terms))
+        return list(terms)
     
     def generate_synonyms(self, terms: List[str]) -> Dict[str, List[str]]:
         """Generate synonyms for technical terms."""
         synonyms = {}
         
         for term in terms:
-            term_synonyms = []
-            
-            # Check our synonym dictionary
-            if term in self.synonyms:
-                term_synonyms.extend(self.synonyms[term])
+            # Keys occurring inside the term, found in one automaton scan, and
+            # keys containing the term, including an exact match
+            matched_keys = {key for _, key in self._synonym_automaton.iter(term)}
+            matched_keys.update(self._synonym_key_substrings.get(term, ()))
             
-            # Check for partial matches
-            for key, values in self.synonyms.items():
-                if term in key or key in term:
-                    term_synonyms.extend(values)
+            term_synonyms = set()
+            for key in matched_keys:
+                term_synonyms.update(self.synonyms[key])
             
-            # Remove duplicates and the original term
-            term_synonyms = list(set(term_synonyms) - {term})
+            # Remove the original term
+            term_synonyms.discard(term)
             
             if term_synonyms:
-                synonyms[term] = term_synonyms
+                synonyms[term] = list(term_synonyms)
         
         return synonyms
     
@@ -187,8 +232,7 @@ class QueryPlannerWorker(BaseWorker):
         cpc_codes = []
         
         # Look for CPC code patterns (e.g., A61B, G06F, etc.)
-        cpc_pattern = r'\b[A-H]\d{2}[A-Z]\b'
-        matches = re.findall(cpc_pattern, query.upper())
+        matches = _CPC_CODE_PATTERN.findall(query.upper())
         cpc_codes.extend(matches)
         
         # Look for technical terms that might map to CPC codes
@@ -199,32 +243,12 @@ class QueryPlannerWorker(BaseWorker):
         
         return list(set(cpc_codes))
     
-    def expand_cpc_codes(self, cpc_codes: List[str]) -> Dict[str, List[str]]:
-        """Expand CPC codes to include related classifications."""
-        expanded = {}
-        
-        for cpc in cpc_codes:
-            related = []
-            
-            # Add the original code
-            related.append(cpc)
-            
-            # Add parent codes (remove last character)
-            if len(cpc) > 3:
-                parent = cpc[:-1]
-                related.append(parent)
-            
-            # Add sibling codes (same parent, different last character)
-            if len(cpc) == 4:
-                parent = cpc[:-1]
-                for char in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ':
-                    sibling = parent + char
-                    if sibling != cpc:
-                        related.append(sibling)
-            
-            expanded[cpc] = related
-        
-        return expanded
+    def expand_cpc_codes(self, cpc_codes: List[str]) -> Dict[str, Tuple[str, ...]]:
+        """Expand CPC codes to include related classifications.
+
+        Expansions are static per code, so they are built once and shared as tuples.
+        """
+        return {cpc: _expand_cpc_code(cpc) for cpc in cpc_codes}
     
     def generate_alternative_queries(self, query: str, synonyms: Dict[str, List[str]]) -> List[str]:
         """Generate alternative queries using synonyms."""
@@ -253,8 +277,18 @@ class QueryPlannerWorker(BaseWorker):
         
         return list(set(alternatives))[:10]  # Limit to 10 alternatives
     
-    def determine_search_strategy(self, query: str, search_type: str) -> Dict[str, Any]:
-        """Determine the best search strategy for the query."""
+    def determine_search_strategy(
+        self,
+        query: str,
+        search_type: str,
+        technical_terms: List[str],
+        cpc_codes: List[str]
+    ) -> Dict[str, Any]:
+        """Determine the best search strategy for the query.
+
+        ``technical_terms`` and ``cpc_codes`` are the ones plan_query already
+        extracted from the same query.
+        """
         strategy = {
             "primary_method": search_type,
             "weight_bm25": 0.5,
@@ -278,12 +312,10 @@ class QueryPlannerWorker(BaseWorker):
             strategy["weight_dense"] = 0.3
         
         # Queries with technical terms benefit from synonyms
-        technical_terms = self.extract_technical_terms(query)
         if len(technical_terms) > 2:
             strategy["use_synonyms"] = True
         
         # Queries with potential CPC codes benefit from expansion
-        cpc_codes = self.extract_cpc_codes(query)
         if cpc_codes:
             strategy["use_cpc_expansion"] = True
         
@@ -326,6 +358,23 @@ class QueryPlannerWorker(BaseWorker):
             "sensor": ["detector", "transducer", "probe", "monitor"]
         }
     
+    def _index_synonyms(self) -> Tuple[ahocorasick.Automaton, Dict[str, Set[str]]]:
+        """Index synonym keys for partial matching.
+
+        Returns an Aho-Corasick automaton that finds every key inside a term,
+        and a map from each substring of a key to the keys containing it.
+        """
+        automaton = ahocorasick.Automaton()
+        key_substrings = defaultdict(set)
+        for key in self.synonyms:
+            automaton.add_word(key, key)
+            for start in range(len(key) + 1):
+                for end in range(start, len(key) + 1):
+                    key_substrings[key[start:end]].add(key)
+        automaton.make_automaton()
+        
+        return automaton, dict(key_substrings)
+    
     def _load_cpc_mappings(self) -> Dict[str, List[str]]:
         """Load mappings from technical terms to CPC codes."""
         return {
@@ -367,27 +416,6 @@ class QueryPlannerWorker(BaseWorker):
             "cell": ["C12N"],
             "gene": ["C12N", "C12Q"]
         }
-    
-    def _get_stop_words(self) -> Set[str]:
-        """Get common stop words."""
-        return {
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-            'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
-            'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
-            'should', 'may', 'might', 'can', 'this', 'that', 'these', 'those'
-        }
-    
-    def _is_technical_compound(self, compound: str) -> bool:
-        """Check if a compound term is technical."""
-        technical_compounds = {
-            'machine learning', 'artificial intelligence', 'deep learning',
-            'neural network', 'data processing', 'signal processing',
-            'image processing', 'voice recognition', 'face recognition',
-            'wireless communication', 'mobile device', 'cloud computing',
-            'block chain', 'internet of things', 'virtual reality',
-            'augmented reality', 'autonomous vehicle', 'electric vehicle'
-        }
-        return compound.lower() in technical_compounds
 
 
 async def main():
@@ -4,8 +4,11 @@ from typing import List, Dict, Any, Tuple
 from unittest.mock import Mock, patch
 
 # Import the workers we want to test
-from src.workers.align_worker.worker import AlignWorker
-from src.workers.novelty_worker.worker import NoveltyWorker
+from src.workers.align_worker.worker import (
+    AlignWorker, ALIGNMENT_THRESHOLDS, ALIGNMENT_TYPES, classify_alignment,
+    combine_and_classify, quantize_embeddings, quantized_similarity
+)
+from src.workers.novelty_worker.worker import NoveltyWorker, novelty_request_key
 
 
 def calculate_brier_score(probabilities: List[float], actual_outcomes: List[int]) -> float:
@@ -318,6 +321,53 @@ class TestAlignmentEvaluation:
         assert results['overlap_f1'] == 0
 
 
+class TestAlignmentScoring:
+    """Test cases for the JIT-compiled alignment scoring kernel."""
+    
+    def test_combine_and_classify(self):
+        """Test weighted combination and type classification of score matrices."""
+        emb_scores = np.array([[0.9, 0.1], [0.5, 0.0]])
+        tfidf_scores = np.array([[0.6, 0.2], [0.75, 0.0]])
+        
+        combined, types_idx = combine_and_classify(emb_scores, tfidf_scores, ALIGNMENT_THRESHOLDS)
+        
+        np.testing.assert_allclose(combined, 0.6 * emb_scores + 0.4 * tfidf_scores)
+        assert [ALIGNMENT_TYPES[i] for i in types_idx[0]] == ['high_similarity', 'no_match']
+        assert [ALIGNMENT_TYPES[i] for i in types_idx[1]] == ['high_similarity', 'no_match']
+    
+    def test_kernel_matches_classify_alignment(self):
+        """Test that the kernel and the scalar classifier agree in every band."""
+        scores = np.array([[0.0, 0.1, 0.3, 0.5, 0.7, 0.9]])
+        
+        _, types_idx = combine_and_classify(scores / 0.6, np.zeros_like(scores), ALIGNMENT_THRESHOLDS)
+        
+        expected = [classify_alignment(float(s)) for s in scores[0]]
+        assert [ALIGNMENT_TYPES[i] for i in types_idx[0]] == expected
+    
+    def test_nan_scores_are_no_match(self):
+        """Test that a NaN similarity is classified as no_match."""
+        emb_scores = np.array([[np.nan, 0.9]])
+        tfidf_scores = np.array([[0.9, np.nan]])
+        
+        combined, types_idx = combine_and_classify(emb_scores, tfidf_scores, ALIGNMENT_THRESHOLDS)
+        
+        assert np.isnan(combined).all()
+        assert [ALIGNMENT_TYPES[i] for i in types_idx[0]] == ['no_match', 'no_match']
+        assert classify_alignment(float('nan')) == 'no_match'
+    
+    def test_quantized_similarity(self):
+        """Test that int8 similarities track float32 cosine similarity."""
+        rng = np.random.default_rng(0)
+        embeddings = rng.normal(size=(8, 384)).astype(np.float32)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        
+        quantized, scales = quantize_embeddings(embeddings)
+        similarities = quantized_similarity(quantized, scales, quantized, scales)
+        
+        assert quantized.dtype == np.int8
+        np.testing.assert_allclose(similarities, embeddings @ embeddings.T, atol=0.01)
+
+
 class TestNoveltyEvaluation:
     """Test cases for novelty evaluation."""
     
@@ -404,6 +454,36 @@ class TestNoveltyEvaluation:
         assert results['clause_accuracy'] == 0
 
 
+class TestNoveltyRequestKey:
+    """Test cases for novelty request validation."""
+    
+    PATENT_ID = "0b9d6f5e-3c1a-4e8b-9f2d-7a6c5b4e3d21"
+    
+    def test_valid_key(self):
+        """Test that a valid request yields a canonical (patent ID, claim number) key."""
+        key = novelty_request_key({'patent_id': self.PATENT_ID.upper(), 'claim_num': '3'})
+        
+        assert key == (self.PATENT_ID, 3)
+    
+    @pytest.mark.parametrize("claim_num", [True, False, 1.5, None, [1]])
+    def test_rejects_non_integer_claim_number(self, claim_num):
+        """Test that booleans and non-integer claim numbers are rejected."""
+        with pytest.raises(ValueError):
+            novelty_request_key({'patent_id': self.PATENT_ID, 'claim_num': claim_num})
+    
+    @pytest.mark.parametrize("claim_num", [0, -1, 2 ** 31, "99999999999"])
+    def test_rejects_out_of_range_claim_number(self, claim_num):
+        """Test that claim numbers outside the int4 column's positive range are rejected."""
+        with pytest.raises(ValueError):
+            novelty_request_key({'patent_id': self.PATENT_ID, 'claim_num': claim_num})
+    
+    @pytest.mark.parametrize("patent_id", ["patent_1", "", 123])
+    def test_rejects_non_uuid_patent_id(self, patent_id):
+        """Test that patent IDs that are not UUIDs are rejected."""
+        with pytest.raises(ValueError):
+            novelty_request_key({'patent_id': patent_id, 'claim_num': 1})
+
+
 class TestIntegrationEvaluation:
     """Integration tests for alignment and novelty evaluation."""
     
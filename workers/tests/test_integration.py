@@ -1,9 +1,12 @@
 import pytest
 import asyncio
 import json
+import uuid
 from unittest.mock import Mock, patch, AsyncMock
 from typing import Dict, Any, List
 
+import numpy as np
+
 # Import the components we want to test
 from src.workers.patent_ingest.worker import PatentIngestWorker
 from src.workers.embed_worker.worker import EmbedWorker
@@ -12,6 +15,7 @@ from src.workers.align_worker.worker import AlignWorker
 from src.workers.novelty_worker.worker import NoveltyWorker
 from src.workers.chart_worker.worker import ChartWorker
 from src.workers.graph_worker.worker import GraphWorker
+from src.workers.normalize_worker.worker import NormalizeWorker
 from src.utils.database import DatabaseClient
 from src.utils.storage import StorageClient
 from src.utils.observability import setup_tracing, metrics, health_checker
@@ -82,7 +86,8 @@ class TestPatentProcessingPipeline:
         
         assert patent_id == "patent_123"
         mock_db_client.create_patent.assert_called_once()
-        assert mock_db_client.create_claim.call_count == 2
+        # Claims are written by create_patent, not one create_claim call each
+        mock_db_client.create_claim.assert_not_called()
     
     @pytest.mark.asyncio
     async def test_embedding_generation_pipeline(self, mock_db_client, mock_storage_client, sample_patent_data):
@@ -450,5 +455,199 @@ class TestErrorHandling:
         assert True  # If we get here, the worker handled the error gracefully
 
 
+class TestNormalizeBatchWrites:
+    """Test that normalize batches are only acknowledged once written."""
+    
+    @pytest.fixture
+    def normalize_worker(self):
+        """Normalize worker with a mocked database and NATS publisher."""
+        worker = NormalizeWorker()
+        worker.db_client = Mock(spec=DatabaseClient)
+        worker.db_client.update_patent_metadata_bulk = AsyncMock(return_value=1)
+        worker.publish = AsyncMock()
+        return worker
+    
+    @staticmethod
+    def normalize_message(patent_id: str) -> Mock:
+        """Normalize request message for a patent."""
+        message = Mock()
+        message.data = json.dumps({
+            "patent_id": patent_id,
+            "metadata": {"pub_number": "US1234567B2", "title": "Test Patent", "source": "uspto"}
+        }).encode()
+        return message
+    
+    @pytest.mark.asyncio
+    async def test_flush_failure_keeps_rows(self, normalize_worker):
+        """Test that a failed write re-raises and keeps the rows buffered."""
+        normalize_worker.db_client.update_patent_metadata_bulk.side_effect = Exception("Database down")
+        row = ("patent_1", None, [], [], None, None, None)
+        normalize_worker._write_buffer = [row]
+        
+        with pytest.raises(Exception, match="Database down"):
+            await normalize_worker._flush()
+        
+        assert normalize_worker._write_buffer == [row]
+        normalize_worker.publish.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_batch_not_completed_when_write_fails(self, normalize_worker):
+        """Test that no completion is published for a batch whose write failed."""
+        normalize_worker.db_client.update_patent_metadata_bulk.side_effect = Exception("Database down")
+        
+        with pytest.raises(Exception, match="Database down"):
+            await normalize_worker.handle_normalize_batch([self.normalize_message("patent_1")])
+        
+        normalize_worker.publish.assert_not_called()
+        assert [row[0] for row in normalize_worker._write_buffer] == ["patent_1"]
+        
+        # The retried write succeeds and publishes the index event and completion
+        normalize_worker.db_client.update_patent_metadata_bulk.side_effect = None
+        await normalize_worker.handle_normalize_batch([self.normalize_message("patent_1")])
+        
+        rows = normalize_worker.db_client.update_patent_metadata_bulk.call_args.args[0]
+        assert [row[0] for row in rows] == ["patent_1"]
+        subjects = [call.args[0] for call in normalize_worker.publish.call_args_list]
+        assert subjects == ["index.upsert_batch", "normalize.complete"]
+        assert normalize_worker._write_buffer == []
+
+
+
+class BatchNoveltyWorker(NoveltyWorker):
+    """Novelty worker that skips model loading and connections."""
+    
+    def __init__(self):
+        self.relationship_cache = {}
+    
+    async def process_message(self, message):
+        raise NotImplementedError
+
+
+class TestNoveltyBatchRequests:
+    """Test that batched novelty requests succeed or fail one at a time."""
+    
+    @pytest.fixture
+    def novelty_worker(self):
+        """Novelty worker with a mocked database and NATS publisher."""
+        worker = BatchNoveltyWorker()
+        worker.db = Mock(spec=DatabaseClient)
+        worker.db.get_claims_bulk = AsyncMock()
+        worker.db.get_claim_alignments_bulk = AsyncMock()
+        worker.db.get_patent = AsyncMock(return_value=None)
+        worker.db.create_novelty_scores_bulk = AsyncMock(return_value=1)
+        worker.coherence_embeddings = AsyncMock(return_value=np.empty((0, 8), dtype=np.float32))
+        worker.publish = AsyncMock()
+        return worker
+    
+    @staticmethod
+    def novelty_message(novelty_id: str, patent_id: Any, claim_num: Any) -> Mock:
+        """Novelty request message for a claim."""
+        message = Mock()
+        message.data = json.dumps({
+            "novelty_id": novelty_id,
+            "patent_id": patent_id,
+            "claim_num": claim_num
+        }).encode()
+        return message
+    
+    @staticmethod
+    def published(worker) -> Dict[str, Any]:
+        """Published (subject, payload) by novelty ID."""
+        return {
+            call.args[1]["novelty_id"]: (call.args[0], call.args[1])
+            for call in worker.publish.call_args_list
+        }
+    
+    @pytest.mark.asyncio
+    async def test_malformed_request_fails_alone(self, novelty_worker):
+        """Test that malformed requests publish errors while the rest of the batch is scored."""
+        patent_id = str(uuid.uuid4())
+        novelty_worker.db.get_claims_bulk.return_value = [{"id": "claim_1", "text": "A method."}]
+        novelty_worker.db.get_claim_alignments_bulk.return_value = [[]]
+        
+        await novelty_worker.handle_novelty_batch([
+            self.novelty_message("n1", patent_id, 1),
+            self.novelty_message("n2", "patent_1", 1),
+            self.novelty_message("n3", patent_id, True),
+            self.novelty_message("n4", patent_id, 2 ** 31)
+        ])
+        
+        novelty_worker.db.get_claims_bulk.assert_awaited_once_with([(patent_id, 1)])
+        published = self.published(novelty_worker)
+        assert published["n1"][0] == "novelty.complete"
+        assert published["n1"][1]["results"]["claim_num"] == 1
+        assert [published[novelty_id][0] for novelty_id in ("n2", "n3", "n4")] == ["novelty.error"] * 3
+    
+    @pytest.mark.asyncio
+    async def test_results_follow_request_keys(self, novelty_worker):
+        """Test that each result is published for its own key and a missing claim is not found."""
+        patent_ids = [str(uuid.uuid4()) for _ in range(3)]
+        novelty_worker.db.get_claims_bulk.return_value = [
+            {"id": "claim_1", "text": "A method."},
+            None,
+            {"id": "claim_3", "text": "A system."}
+        ]
+        novelty_worker.db.get_claim_alignments_bulk.return_value = [[], [], []]
+        
+        await novelty_worker.handle_novelty_batch([
+            self.novelty_message(f"n{i}", patent_id, i)
+            for i, patent_id in enumerate(patent_ids, start=1)
+        ])
+        
+        published = self.published(novelty_worker)
+        for novelty_id, patent_id, claim_num in (("n1", patent_ids[0], 1), ("n3", patent_ids[2], 3)):
+            subject, payload = published[novelty_id]
+            assert subject == "novelty.complete"
+            assert (payload["results"]["patent_id"], payload["results"]["claim_num"]) == (patent_id, claim_num)
+        assert published["n2"][0] == "novelty.error"
+        assert "not found" in published["n2"][1]["error"]
+        
+        rows = novelty_worker.db.create_novelty_scores_bulk.call_args.args[0]
+        assert [row[:2] for row in rows] == [(patent_ids[0], 1), (patent_ids[2], 3)]
+    
+    @pytest.mark.asyncio
+    async def test_store_failure_fails_scored_requests(self, novelty_worker):
+        """Test that a failed bulk write turns every scored result into an error."""
+        patent_ids = [str(uuid.uuid4()) for _ in range(3)]
+        novelty_worker.db.get_claims_bulk.return_value = [
+            {"id": "claim_1", "text": "A method."},
+            {"id": "claim_2", "text": "A system."},
+            None
+        ]
+        novelty_worker.db.get_claim_alignments_bulk.return_value = [[], [], []]
+        novelty_worker.db.create_novelty_scores_bulk.side_effect = Exception("Database down")
+        
+        await novelty_worker.handle_novelty_batch([
+            self.novelty_message(f"n{i}", patent_id, i)
+            for i, patent_id in enumerate(patent_ids, start=1)
+        ])
+        
+        published = self.published(novelty_worker)
+        assert {subject for subject, _ in published.values()} == {"novelty.error"}
+        assert published["n1"][1]["error"] == published["n2"][1]["error"] == "Database down"
+        assert "not found" in published["n3"][1]["error"]
+    
+    @pytest.mark.asyncio
+    async def test_get_claims_bulk_places_rows_by_key_index(self):
+        """Test that bulk-fetched claims are returned in key order with None for missing claims."""
+        keys = [(str(uuid.uuid4()), claim_num) for claim_num in (1, 2, 3)]
+        conn = Mock()
+        conn.fetch = AsyncMock(return_value=[
+            {"id": "claim_3", "claim_number": 3, "key_index": 3},
+            {"id": "claim_1", "claim_number": 1, "key_index": 1}
+        ])
+        db_client = DatabaseClient()
+        db_client.pool = Mock()
+        db_client.pool.acquire.return_value.__aenter__ = AsyncMock(return_value=conn)
+        db_client.pool.acquire.return_value.__aexit__ = AsyncMock(return_value=False)
+        
+        claims = await db_client.get_claims_bulk(keys)
+        
+        assert claims == [
+            {"id": "claim_1", "claim_number": 1},
+            None,
+            {"id": "claim_3", "claim_number": 3}
+        ]
+
 if __name__ == "__main__":
     pytest.main([__file__])